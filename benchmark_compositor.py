@@ -0,0 +1,228 @@
+"""Headless benchmark for the OmniScreen Forge still-image compositor.
+
+Generates synthetic sources (gradients plus noise, so encoders can't cheat on flat colour)
+and synthetic monitor layouts (mixed resolutions and diagonals, negative OS coordinates),
+runs composite_image() on every combination and reports wall time, per-stage time, peak
+RSS and output throughput. Each case runs in its own process so peak RSS is per case.
+
+    python benchmark_compositor.py --sizes 1080p 4k --monitors 2 4 8 --json results.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import main as forge
+
+SOURCE_SIZES = {
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+    "16k": (15360, 8640),
+}
+LAYOUT_COUNTS = (2, 4, 8, 16, 32)
+
+# (res_w, res_h, diagonal) of the panels mixed into synthetic layouts
+MONITOR_MODELS = [
+    (1920, 1080, 24.0),
+    (2560, 1440, 27.0),
+    (3840, 2160, 32.0),
+    (1080, 1920, 24.0), # Portrait
+    (3440, 1440, 34.0),
+    (1366, 768, 15.6),
+]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if the platform can't tell)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+def make_source(path, size, seed=0):
+    """Writes a deterministic gradient + noise test image of the given size."""
+    import numpy as np
+    from PIL import Image
+    w, h = size
+    rng = np.random.default_rng(seed)
+    img = np.empty((h, w, 3), dtype=np.uint8)
+    xs = np.linspace(0, 1, w, dtype=np.float32)
+    band = 512
+    for y in range(0, h, band):
+        n = min(band, h - y)
+        gx = np.broadcast_to(xs[None, :], (n, w))
+        gy = np.broadcast_to(np.linspace(y / h, (y + n) / h, n, dtype=np.float32)[:, None], (n, w))
+        rows = np.stack([gx * 255, gy * 255, (gx + gy) * 127.5], axis=-1)
+        rows += rng.normal(0, 12, rows.shape).astype(np.float32)
+        img[y:y + band] = rows.clip(0, 255).astype(np.uint8)
+    with forge.unbounded_pixels():
+        if path.lower().endswith('.png'):
+            forge.write_png(path, img, compress_level=1)
+        else:
+            Image.fromarray(img).save(path, quality=95)
+
+def make_layout(count, seed=0):
+    """Builds a deterministic layout of count mixed monitors in a rough grid.
+
+    OS coordinates are shifted so the middle monitor is the primary at (0, 0), giving the
+    others negative coordinates like a real multi-row desk.
+    """
+    rnd = random.Random(seed * 1000 + count)
+    cols = math.ceil(math.sqrt(count))
+    monitors = []
+    phys_y = os_y = 0.0
+    for row_start in range(0, count, cols):
+        phys_x = os_x = 0
+        row_h = row_os_h = 0
+        for i in range(row_start, min(count, row_start + cols)):
+            res_w, res_h, diag = rnd.choice(MONITOR_MODELS)
+            mon = forge.MonitorConfig(name=f"Bench {i + 1}", diag=diag, res_w=res_w, res_h=res_h,
+                                      x=phys_x, y=phys_y, os_x=os_x, os_y=int(os_y))
+            monitors.append(mon)
+            phys_x += mon.phys_w + 0.8 # Bezel
+            os_x += res_w
+            row_h = max(row_h, mon.phys_h)
+            row_os_h = max(row_os_h, res_h)
+        phys_y += row_h + 0.8
+        os_y += row_os_h
+    primary = monitors[len(monitors) // 2]
+    px, py = primary.os_x, primary.os_y
+    for mon in monitors:
+        mon.os_x -= px
+        mon.os_y -= py
+    return monitors
+
+def run_case(source, count, args):
+    """Runs one (source, layout) case in this process and returns its result record."""
+    monitors = make_layout(count, seed=args.seed)
+    ext = forge.ENCODE_PROFILES[args.profile]["ext"]
+    out_path = os.path.join(args.workdir, f"out_{os.path.splitext(os.path.basename(source))[0]}_{count}{ext}")
+    runs = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        stats = forge.composite_image(source, out_path, monitors, ram_budget_mb=args.ram_budget, profile=args.profile)
+        stats["wall_s"] = round(time.perf_counter() - started, 4)
+        runs.append(stats)
+    if not args.keep:
+        os.remove(out_path)
+
+    best = min(runs, key=lambda r: r["wall_s"])
+    out_mp = best["output"][0] * best["output"][1] / 1e6
+    return {
+        "source": os.path.basename(source),
+        "source_size": best["source"],
+        "monitors": count,
+        "monitor_mp": round(sum(m.res_w * m.res_h for m in monitors) / 1e6, 2),
+        "output_size": best["output"],
+        "mode": best["mode"],
+        "reader": best["reader"],
+        "profile": best["encode"]["profile"],
+        "output_bytes": best["encode"]["bytes"],
+        "wall_s": best["wall_s"],
+        "wall_median_s": round(statistics.median(r["wall_s"] for r in runs), 4),
+        "stages": best["stages"],
+        "peak_rss_mb": peak_rss_mb(),
+        "output_mp_per_s": round(out_mp / best["wall_s"], 2),
+    }
+
+def environment():
+    import numpy as np
+    import PIL
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OmniScreen Forge still-image compositor.")
+    parser.add_argument("--sizes", nargs="+", default=list(SOURCE_SIZES), choices=list(SOURCE_SIZES),
+                        help="Synthetic source sizes to test (default: all).")
+    parser.add_argument("--monitors", nargs="+", type=int, default=list(LAYOUT_COUNTS),
+                        help="Monitor counts of the synthetic layouts (default: 2 4 8 16 32).")
+    parser.add_argument("--source-format", choices=["jpg", "png"], default="jpg", help="Container of the synthetic sources.")
+    parser.add_argument("--profile", choices=list(forge.ENCODE_PROFILES), default=forge.DEFAULT_ENCODE_PROFILE,
+                        help="Encode profile for the composited output.")
+    parser.add_argument("--ram-budget", type=int, default=forge.DEFAULT_RAM_BUDGET_MB, help="Compositor RAM budget in MB.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for sources and layouts.")
+    parser.add_argument("--workdir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench_cache"),
+                        help="Where sources are cached and outputs written.")
+    parser.add_argument("--keep", action="store_true", help="Keep the composited outputs.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH.")
+    parser.add_argument("--case", nargs=2, metavar=("SOURCE", "COUNT"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.workdir, exist_ok=True)
+
+    if args.case:
+        # Child process: one case, result as JSON on stdout
+        print(json.dumps(run_case(args.case[0], int(args.case[1]), args)))
+        return 0
+
+    passthrough = ["--profile", args.profile, "--ram-budget", str(args.ram_budget), "--repeat", str(args.repeat),
+                   "--seed", str(args.seed), "--workdir", args.workdir] + (["--keep"] if args.keep else [])
+    results = []
+    print(f"{'source':>8} {'mons':>4} {'output':>13} {'mode':>11} {'wall s':>8} {'MP/s':>7} {'RSS MB':>7}  stages")
+    for size_name in args.sizes:
+        source = os.path.join(args.workdir, f"src_{size_name}_{args.seed}.{args.source_format}")
+        if not os.path.exists(source):
+            make_source(source, SOURCE_SIZES[size_name], seed=args.seed)
+        for count in args.monitors:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", source, str(count)] + passthrough,
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{size_name:>8} {count:>4}  FAILED: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+                results.append({"source": os.path.basename(source), "monitors": count, "error": proc.stderr.strip()})
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(r)
+            stages = " ".join(f"{k}={v:.2f}" for k, v in r["stages"].items())
+            print(f"{size_name:>8} {count:>4} {r['output_size'][0]:>6}x{r['output_size'][1]:<6} {r['mode']:>11} "
+                  f"{r['wall_s']:>8.2f} {r['output_mp_per_s']:>7.1f} {r['peak_rss_mb'] or 0:>7.0f}  {stages}")
+
+    report = {"benchmark": "compositor", "environment": environment(), "settings": {
+        "profile": args.profile, "ram_budget_mb": args.ram_budget, "repeat": args.repeat,
+        "seed": args.seed, "source_format": args.source_format}, "cases": results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 1 if any("error" in r for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
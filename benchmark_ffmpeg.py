@@ -0,0 +1,125 @@
+"""Offline benchmark for the OmniScreen Forge video filter graph.
+
+Feeds FFmpeg's synthetic lavfi sources (testsrc2, mandelbrot) through the exact command
+render_ffmpeg builds, for a matrix of layouts, source resolutions and encoder profiles,
+and encodes both to the null muxer (graph + encoder cost only) and to real files. FFmpeg's
+-benchmark output gives CPU and wall time, from which fps and the realtime factor follow.
+
+    python benchmark_ffmpeg.py --resolutions 1280x720 1920x1080 --monitors 2 4 --json video.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+import main as forge
+from benchmark_compositor import make_layout, environment
+
+LAVFI_SOURCES = ("testsrc2", "mandelbrot")
+
+# Encoder profiles: the app's own codec settings plus faster/cheaper references
+ENCODER_PROFILES = {
+    "app": forge.VIDEO_CODEC_ARGS,
+    "x264-veryfast": ['-c:v', 'libx264', '-preset', 'veryfast'],
+    "x264-ultrafast": ['-c:v', 'libx264', '-preset', 'ultrafast'],
+    "rawvideo": ['-c:v', 'rawvideo'], # Graph cost with (almost) no encoder
+}
+
+BENCH_PATTERN = re.compile(r"bench: utime=([\d.]+)s stime=([\d.]+)s rtime=([\d.]+)s")
+MAXRSS_PATTERN = re.compile(r"bench: maxrss=(\d+)\s*KiB")
+FRAME_PATTERN = re.compile(r"frame=\s*(\d+)")
+
+def lavfi_input(source, resolution, fps, duration):
+    """Input args for a synthetic lavfi source of the given size, rate and length."""
+    return ['-t', str(duration), '-f', 'lavfi', '-i', f"{source}=size={resolution}:rate={fps}"]
+
+def run_case(monitors, source, resolution, fps, duration, encoder, output, workdir):
+    """Runs one configuration through FFmpeg and returns its result record."""
+    if output == "null":
+        output_args = ENCODER_PROFILES[encoder] + ['-f', 'null', '-']
+    else:
+        # NUT takes every codec here, including rawvideo in the overlay's RGB output
+        path = os.path.join(workdir, f"video_{source}_{resolution}_{len(monitors)}_{encoder}.nut")
+        output_args = ENCODER_PROFILES[encoder] + [path]
+    cmd = forge.build_render_command(monitors, lavfi_input(source, resolution, fps, duration),
+                                     ['-benchmark'] + output_args, include_audio=False, rate=fps)
+    proc = subprocess.run(cmd, capture_output=True, text=True,
+                          creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    record = {"source": source, "resolution": resolution, "fps": fps, "duration_s": duration,
+              "monitors": len(monitors), "encoder": encoder, "output": output}
+    bench = BENCH_PATTERN.search(proc.stderr)
+    if proc.returncode != 0 or not bench:
+        record["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+        return record
+
+    utime, stime, rtime = map(float, bench.groups())
+    frames = [int(f) for f in FRAME_PATTERN.findall(proc.stderr)]
+    frames = frames[-1] if frames else int(fps * duration)
+    plan = forge.get_layout_plan(monitors)
+    maxrss = MAXRSS_PATTERN.search(proc.stderr)
+    record.update({
+        "output_size": (plan.enc_w, plan.enc_h),
+        "frames": frames,
+        "wall_s": rtime,
+        "cpu_s": round(utime + stime, 3),
+        "fps_out": round(frames / rtime, 2) if rtime else None,
+        "realtime_factor": round(duration / rtime, 3) if rtime else None,
+        "cpu_per_frame_ms": round((utime + stime) * 1000 / frames, 2) if frames else None,
+        "maxrss_mb": round(int(maxrss.group(1)) / 1024, 1) if maxrss else None,
+    })
+    if output == "file":
+        record["output_bytes"] = os.path.getsize(path)
+        os.remove(path)
+    return record
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OmniScreen Forge FFmpeg filter graph on synthetic inputs.")
+    parser.add_argument("--sources", nargs="+", default=list(LAVFI_SOURCES), choices=LAVFI_SOURCES, help="lavfi test sources.")
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080", "3840x2160"], help="Source resolutions (WxH).")
+    parser.add_argument("--durations", nargs="+", type=float, default=[2.0], help="Source lengths in seconds.")
+    parser.add_argument("--fps", type=int, default=30, help="Source frame rate.")
+    parser.add_argument("--monitors", nargs="+", type=int, default=[2, 4, 8], help="Monitor counts of the synthetic layouts.")
+    parser.add_argument("--encoders", nargs="+", default=list(ENCODER_PROFILES), choices=list(ENCODER_PROFILES), help="Encoder profiles.")
+    parser.add_argument("--outputs", nargs="+", default=["null", "file"], choices=["null", "file"],
+                        help="Encode to the null muxer, to real files, or both.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic layouts.")
+    parser.add_argument("--workdir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench_cache"),
+                        help="Where file outputs are written (and removed).")
+    parser.add_argument("--print-graph", action="store_true", help="Print each layout's filter_complex.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    print(f"{'source':>10} {'res':>9} {'mons':>4} {'encoder':>14} {'out':>4} {'fps':>7} {'xRT':>6} {'cpu s':>7} {'ms/frm':>7}")
+    for count in args.monitors:
+        monitors = make_layout(count, seed=args.seed)
+        if args.print_graph:
+            print(forge.build_filter_graph(monitors))
+        for source in args.sources:
+            for resolution in args.resolutions:
+                for duration in args.durations:
+                    for encoder in args.encoders:
+                        for output in args.outputs:
+                            r = run_case(monitors, source, resolution, args.fps, duration, encoder, output, args.workdir)
+                            results.append(r)
+                            if "error" in r:
+                                print(f"{source:>10} {resolution:>9} {count:>4} {encoder:>14} {output:>4}  FAILED: {r['error']}")
+                                continue
+                            print(f"{source:>10} {resolution:>9} {count:>4} {encoder:>14} {output:>4} {r['fps_out']:>7.1f} "
+                                  f"{r['realtime_factor']:>6.2f} {r['cpu_s']:>7.2f} {r['cpu_per_frame_ms']:>7.1f}")
+
+    report = {"benchmark": "ffmpeg-graph", "environment": environment(), "settings": {
+        "fps": args.fps, "seed": args.seed, "encoder_args": {k: ENCODER_PROFILES[k] for k in args.encoders}}, "cases": results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 1 if any("error" in r for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,135 @@
+import time
+_MODULE_T0 = time.perf_counter() # Start of the import phase for --profile-startup
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import math
+import bisect
+import itertools
 import os
 import json
-import ffmpeg
-from PIL import Image, ImageTk
-from screeninfo import get_monitors
-import sv_ttk
+import io
+import hashlib
+import argparse
+import contextlib
 import threading
 import queue
+import collections
 import re
 import subprocess
+import sys
+import traceback
+
+# Set OMNISCREEN_DEBUG=1 to print interaction/perf counters to the console
+DEBUG = os.environ.get("OMNISCREEN_DEBUG", "") not in ("", "0")
+
+# Canvas drag/resize is applied at most once per display frame (~60 Hz)
+DRAG_FRAME_MS = 16
+
+# Edges within this many canvas pixels of another monitor's edge snap to it
+SNAP_DISTANCE_PX = 8
+
+# Longest side of the downscaled media proxy shown inside the Layout Canvas
+MEDIA_PROXY_MAX_SIDE = 1024
+
+# Derived images (resized logos, QR thumbnails, shimmer sprite sheets) live here between launches
+ASSET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+
+# Half the short side of 1080p, 1440p and 4K screens; baked together the first time the QR is opened
+QR_THUMB_SIZES = (540, 720, 1080)
+
+# The global shimmer sweeps over this many 40 ms phases; each logo shines during its (start, end) window
+SHIMMER_PHASES = 60
+SHIMMER_WINDOWS = {'logo': (0.35, 0.65), 'logo2': (0.65, 0.95)}
+
+# Omni alignment grid: cells per side, circle count, dash on/off in grid units and palette
+OMNI_GRID_CELLS = 16
+OMNI_GRID_CIRCLES = 8
+OMNI_GRID_DASH = (0.082, 0.036)
+OMNI_GRID_COLORS = {'bg': (0, 0, 0), 'grid': (128, 0, 128), 'angle': (0, 255, 255), 'circle': (0, 255, 0), 'label': (255, 0, 255)}
+
+# Calibration patterns and the spanned file each one is written to
+CALIBRATION_PATTERNS = {
+    "gradient": "gradient_morals_calibrator.png",
+    "grid": "calibration_grid.png",
+    "uniformity": "calibration_uniformity.png",
+}
+
+# Reduced decodes for renders keep at least this many source pixels per output pixel
+RENDER_REDUCING_GAP = 3
+
+# Video codec used by render_ffmpeg
+VIDEO_CODEC_ARGS = ['-c:v', 'libx264']
+
+# Encode profiles for composited stills; PNG ones use the parallel band writer
+ENCODE_PROFILES = {
+    "PNG Fast": {"ext": ".png", "compress_level": 1},
+    "PNG Balanced": {"ext": ".png", "compress_level": 6},
+    "PNG Smallest": {"ext": ".png", "compress_level": 9},
+    "JPEG Fast": {"ext": ".jpg", "quality": 92, "optimize": False, "progressive": False},
+    "WebP Fast": {"ext": ".webp", "quality": 90, "method": 2},
+    "WebP Lossless": {"ext": ".webp", "lossless": True, "quality": 25, "method": 1},
+    "TIFF": {"ext": ".tiff"},
+    "BMP": {"ext": ".bmp"},
+}
+DEFAULT_ENCODE_PROFILE = "PNG Balanced"
+
+# Still-image compositing: sources estimated to need more than this are composited out-of-core
+DEFAULT_RAM_BUDGET_MB = 2048
+# FFmpeg refuses pictures with (w + 128) * (h + 128) >= INT_MAX / 8 (av_image_check_size), about 268 MP;
+# out-of-core sources past it are decoded by Pillow instead
+FFMPEG_MAX_PICTURE = (2**31 - 1) // 8
+
+# Span events kept per RenderTrace for the Chrome trace export (totals are always kept)
+RENDER_TRACE_MAX_EVENTS = 200000
+
+# How often a running render's process is sampled, and how many render records are kept
+RESOURCE_SAMPLE_INTERVAL_S = 0.5
+RENDER_HISTORY_LIMIT = 50
+
+# Tk stall watchdog (--watch-stalls): heartbeat period, default threshold, and bookkeeping limits
+STALL_HEARTBEAT_MS = 50
+STALL_THRESHOLD_MS = 100
+STALL_MAX_SAMPLES = 20 # Stack samples kept per stall
+STALL_WORST_KEPT = 10
+
+# Watch-folder daemon (--watch): manifest file name, output naming and polling fallback period
+WATCH_MANIFEST_NAME = "omniscreen_manifest.json"
+WATCH_OUTPUT_SUFFIX = "_spanned"
+WATCH_POLL_INTERVAL_S = 2.0
+WATCH_DEFAULT_WORKERS = 2
+
+# Render server (--serve / --worker): default port, job lease, worker long-poll and heartbeat periods
+RENDER_SERVER_PORT = 8765
+RENDER_JOB_LEASE_S = 30.0 # A running job whose worker is silent this long goes back to the queue
+RENDER_JOB_MAX_ATTEMPTS = 3
+RENDER_CLAIM_WAIT_S = 20.0
+RENDER_HEARTBEAT_S = 1.0
+
+# CPU governor of renders: niceness, best-effort I/O level (0-7) and whether the core budget
+# applies; the default budget leaves this many cores to the desktop
+RENDER_POLICIES = {
+    "background": {"nice": 10, "io_level": 7, "budgeted": True},
+    "turbo": {"nice": 0, "io_level": 4, "budgeted": False},
+}
+DEFAULT_RENDER_POLICY = "background"
+RENDER_RESERVED_CORES = 2
+
+# Frame decimation pre-stage of video renders: near-duplicate frames are dropped, but never
+# for longer than this in a row; static sources are encoded as a still loop at this rate
+DECIMATE_MAX_GAP_S = 1.0
+STATIC_LOOP_FPS = 1
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff')
+VIDEO_EXTS = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mpeg', '.mpg', '.gif')
 
 # --- Data Structures ---
 
 class MonitorConfig:
+    # Every mutation takes a fresh number from this counter, so a tuple of monitor
+    # revisions uniquely identifies one state of the whole layout.
+    _revisions = itertools.count(1)
+
     def __init__(self, name="Monitor", diag=24.0, res_w=1920, res_h=1080, x=0.0, y=0.0, os_x=0, os_y=0, cal_gray=1.0, cal_r=1.0, cal_g=1.0, cal_b=1.0, gamma=1.0, brightness=0.0, saturation=1.0):
         self.name = name
         self.diag = diag
@@ -32,21 +147,33 @@ class MonitorConfig:
         self.brightness = brightness
         self.saturation = saturation
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            # Invalidate the cached physical size and any LayoutPlan built from this monitor
+            object.__setattr__(self, '_phys', None)
+            object.__setattr__(self, '_revision', next(MonitorConfig._revisions))
+
+    def _phys_size(self):
+        if self._phys is None:
+            try:
+                ppi = math.sqrt(self.res_w**2 + self.res_h**2) / self.diag
+                self._phys = (self.res_w / ppi, self.res_h / ppi)
+            except ZeroDivisionError:
+                self._phys = (16.0, 9.0)
+        return self._phys
+
     @property
     def phys_w(self):
-        try:
-            ppi = math.sqrt(self.res_w**2 + self.res_h**2) / self.diag
-            return self.res_w / ppi
-        except ZeroDivisionError:
-            return 16.0
+        return self._phys_size()[0]
 
     @property
     def phys_h(self):
-        try:
-            ppi = math.sqrt(self.res_w**2 + self.res_h**2) / self.diag
-            return self.res_h / ppi
-        except ZeroDivisionError:
-            return 9.0
+        return self._phys_size()[1]
+
+    def copy(self):
+        """Independent copy, calibration included, e.g. for a render thread while the UI keeps editing."""
+        return MonitorConfig.from_dict(self.to_dict(), keep_calibration=True)
 
     def to_dict(self):
         return {
@@ -68,13 +195,14 @@ class MonitorConfig:
         }
 
     @classmethod
-    def from_dict(cls, data):
+    def from_dict(cls, data, keep_calibration=False):
         if 'offset_y' in data: del data['offset_y']
-        # Remove old calibration values if they exist in the loaded data
-        data.pop('cal_gray', None)
-        data.pop('cal_r', None)
-        data.pop('cal_g', None)
-        data.pop('cal_b', None)
+        if not keep_calibration:
+            # Remove old calibration values if they exist in the loaded data
+            data.pop('cal_gray', None)
+            data.pop('cal_r', None)
+            data.pop('cal_g', None)
+            data.pop('cal_b', None)
 
         data.setdefault('x', 0.0)
         data.setdefault('y', 0.0)
@@ -85,6 +213,2840 @@ class MonitorConfig:
         data.setdefault('saturation', 1.0)
         return cls(**data)
 
+class MonitorPlan:
+    """Precomputed geometry of one monitor inside a LayoutPlan."""
+    __slots__ = ('phys', 'crop', 'paste', 'res')
+
+    def __init__(self, phys, crop, paste, res):
+        object.__setattr__(self, 'phys', phys)   # (x1, y1, x2, y2) in physical inches
+        object.__setattr__(self, 'crop', crop)   # (x, y, w, h) in map pixels, all even
+        object.__setattr__(self, 'paste', paste) # (x, y) on the output canvas
+        object.__setattr__(self, 'res', res)     # (w, h) native resolution
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MonitorPlan is immutable")
+
+class LayoutPlan:
+    """Immutable geometry for one revision of the monitor layout.
+
+    Every consumer (image render, FFmpeg graph, layout canvas) reads its bounding boxes and
+    crop rectangles from here, so the image and video paths always crop identical pixels.
+    Use get_layout_plan() rather than constructing one directly to share the memoized copy.
+    """
+    __slots__ = ('map_ppi', 'min_phys_x', 'min_phys_y', 'max_phys_x', 'max_phys_y', 'map_w', 'map_h',
+                 'min_os_x', 'min_os_y', 'out_w', 'out_h', 'enc_w', 'enc_h', 'canvas_bounds', 'monitors')
+
+    _cache = (None, None) # (key, plan), replaced as one tuple so threads never pair a key with another plan
+
+    def __init__(self, monitors, map_ppi=100.0):
+        set_ = lambda name, value: object.__setattr__(self, name, value)
+        phys = [(m.x, m.y, m.x + m.phys_w, m.y + m.phys_h) for m in monitors]
+        set_('map_ppi', map_ppi)
+        
+        if not monitors:
+            for name in ('min_phys_x', 'min_phys_y', 'min_os_x', 'min_os_y'):
+                set_(name, 0)
+            for name in ('max_phys_x', 'max_phys_y'):
+                set_(name, 1)
+            for name in ('map_w', 'map_h', 'out_w', 'out_h', 'enc_w', 'enc_h'):
+                set_(name, 2)
+            set_('canvas_bounds', (0, 0, 1, 1))
+            set_('monitors', ())
+            return
+        
+        min_phys_x = min(p[0] for p in phys)
+        min_phys_y = min(p[1] for p in phys)
+        max_phys_x = max(p[2] for p in phys)
+        max_phys_y = max(p[3] for p in phys)
+        set_('min_phys_x', min_phys_x)
+        set_('min_phys_y', min_phys_y)
+        set_('max_phys_x', max_phys_x)
+        set_('max_phys_y', max_phys_y)
+        
+        # The layout canvas always keeps the physical origin in view
+        set_('canvas_bounds', (min(min_phys_x, 0), min(min_phys_y, 0), max(max_phys_x, 1), max(max_phys_y, 1)))
+        
+        # Virtual coordinate system the source is stretched onto, even-sized for YUV encoders
+        map_w = int(max(1, (max_phys_x - min_phys_x) * map_ppi))
+        map_h = int(max(1, (max_phys_y - min_phys_y) * map_ppi))
+        map_w += map_w % 2
+        map_h += map_h % 2
+        set_('map_w', map_w)
+        set_('map_h', map_h)
+        
+        # Determine OS Virtual Desktop bounds (can be negative!)
+        min_os_x = min(m.os_x for m in monitors)
+        min_os_y = min(m.os_y for m in monitors)
+        out_w = max(1, max(m.os_x + m.res_w for m in monitors) - min_os_x)
+        out_h = max(1, max(m.os_y + m.res_h for m in monitors) - min_os_y)
+        set_('min_os_x', min_os_x)
+        set_('min_os_y', min_os_y)
+        set_('out_w', out_w)
+        set_('out_h', out_h)
+        set_('enc_w', out_w + out_w % 2)
+        set_('enc_h', out_h + out_h % 2)
+        
+        plans = []
+        for m, p in zip(monitors, phys):
+            crop_w = int(m.phys_w * map_ppi)
+            crop_h = int(m.phys_h * map_ppi)
+            crop_x = int((m.x - min_phys_x) * map_ppi)
+            crop_y = int((m.y - min_phys_y) * map_ppi)
+            crop_w += crop_w % 2
+            crop_h += crop_h % 2
+            crop_x += crop_x % 2
+            crop_y += crop_y % 2
+            # Even rounding can push a crop past the map edge; pull it back inside
+            crop_w = min(crop_w, map_w)
+            crop_h = min(crop_h, map_h)
+            crop_x = min(crop_x, map_w - crop_w)
+            crop_y = min(crop_y, map_h - crop_h)
+            plans.append(MonitorPlan(p, (crop_x, crop_y, crop_w, crop_h), (m.os_x - min_os_x, m.os_y - min_os_y), (m.res_w, m.res_h)))
+        set_('monitors', tuple(plans))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LayoutPlan is immutable")
+
+    @property
+    def phys_rects(self):
+        return [mp.phys for mp in self.monitors]
+
+def get_layout_plan(monitors, map_ppi=100.0):
+    """Returns the LayoutPlan for the current state of `monitors`, reusing the last one if nothing changed."""
+    key = (map_ppi,) + tuple(m._revision for m in monitors)
+    cached_key, plan = LayoutPlan._cache
+    if cached_key != key:
+        plan = LayoutPlan(monitors, map_ppi)
+        LayoutPlan._cache = (key, plan)
+    return plan
+
+class SpatialIndex:
+    """Slab index over monitor rectangles (physical inches) for hit-testing large video walls.
+
+    The x axis is cut into slabs at every rectangle edge and each slab lists the rectangles
+    covering it, topmost (last in the list) first. A hit-test is a bisect to find the slab
+    plus a short scan of the few rectangles stacked in that column.
+    """
+    def __init__(self, rects):
+        self.rects = rects
+        self.xs = sorted(set(x for r in rects for x in (r[0], r[2])))
+        self.slabs = [[] for _ in range(max(0, len(self.xs) - 1))]
+        for i in reversed(range(len(rects))):
+            lo = bisect.bisect_left(self.xs, rects[i][0])
+            hi = bisect.bisect_left(self.xs, rects[i][2])
+            for s in range(lo, hi):
+                self.slabs[s].append(i)
+
+    def _first_hit(self, slab, x, y):
+        for i in self.slabs[slab]:
+            x1, y1, x2, y2 = self.rects[i]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return i
+        return -1
+
+    def hit(self, x, y):
+        """Returns the index of the topmost rectangle containing (x, y), or -1."""
+        s = bisect.bisect_right(self.xs, x) - 1
+        best = -1
+        if 0 <= s < len(self.slabs):
+            best = self._first_hit(s, x, y)
+        # A point exactly on a slab boundary also touches the rectangles ending there
+        if 0 < s <= len(self.slabs) and x == self.xs[s]:
+            best = max(best, self._first_hit(s - 1, x, y))
+        return best
+
+class SnapEngine:
+    """Snaps a dragged monitor's edges onto the edges of the other monitors.
+
+    Each axis keeps two sorted target lists: positions the dragged rectangle's leading edge
+    (left/top) may snap to, and positions its trailing edge (right/bottom) may snap to. Abutting
+    targets are offset by the bezel gap so snapped screens sit exactly one bezel apart.
+    """
+    def __init__(self, rects, gap):
+        self.lead_x = sorted([r[0] for r in rects] + [r[2] + gap for r in rects])
+        self.trail_x = sorted([r[2] for r in rects] + [r[0] - gap for r in rects])
+        self.lead_y = sorted([r[1] for r in rects] + [r[3] + gap for r in rects])
+        self.trail_y = sorted([r[3] for r in rects] + [r[1] - gap for r in rects])
+
+    @staticmethod
+    def _nearest(targets, value, tolerance):
+        # Returns the signed offset to the closest target within tolerance, or None
+        i = bisect.bisect_left(targets, value)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(targets):
+                d = targets[j] - value
+                if abs(d) <= tolerance and (best is None or abs(d) < abs(best)):
+                    best = d
+        return best
+
+    def _axis_offset(self, lead, trail, lead_targets, trail_targets, tolerance):
+        offsets = [d for d in (self._nearest(lead_targets, lead, tolerance), self._nearest(trail_targets, trail, tolerance)) if d is not None]
+        return min(offsets, key=abs) if offsets else 0.0
+
+    def snap_move(self, x, y, w, h, tolerance):
+        """Returns the snapped top-left corner for a w x h rectangle dragged to (x, y)."""
+        dx = self._axis_offset(x, x + w, self.lead_x, self.trail_x, tolerance)
+        dy = self._axis_offset(y, y + h, self.lead_y, self.trail_y, tolerance)
+        return x + dx, y + dy
+
+    def snap_resize(self, x, y, w, h, tolerance):
+        """Returns the snapped width for a corner resize that keeps the aspect ratio (h / w)."""
+        aspect = h / w if w else 1.0
+        dx = self._nearest(self.trail_x, x + w, tolerance)
+        dy = self._nearest(self.trail_y, y + h, tolerance)
+        # Vertical snaps are converted back into a width change through the aspect ratio
+        candidates = [d for d in (dx, None if dy is None else dy / aspect) if d is not None]
+        if not candidates:
+            return w
+        return max(1.0, w + min(candidates, key=abs))
+
+class AssetCache:
+    """On-disk cache of images derived from the bundled PNG assets.
+
+    Entries are keyed by the source file's path, mtime and size plus a variant string
+    (target size, recolor, ...), so replacing a source asset invalidates its derivatives.
+    Failures to read or write the cache are never fatal; the caller just rebuilds.
+    """
+    def __init__(self, directory=ASSET_CACHE_DIR):
+        self.directory = directory
+
+    def path_for(self, source, variant):
+        st = os.stat(source)
+        key = f"{os.path.abspath(source)}|{st.st_mtime_ns}|{st.st_size}|{variant}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        base = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.directory, f"{base}.{variant}.{digest}.png")
+
+    def load(self, source, variant):
+        from PIL import Image
+        try:
+            img = Image.open(self.path_for(source, variant))
+            img.load()
+            return img
+        except (OSError, ValueError):
+            return None
+
+    def store(self, source, variant, img):
+        try:
+            path = self.path_for(source, variant)
+            os.makedirs(self.directory, exist_ok=True)
+            # Drop derivatives of older versions of the same source/variant
+            prefix = os.path.basename(path).rsplit(".", 2)[0] + "."
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix) and name != os.path.basename(path):
+                    os.remove(os.path.join(self.directory, name))
+            tmp_path = path + ".tmp"
+            img.save(tmp_path, format="PNG", compress_level=1)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write asset cache entry: {e}")
+
+    def get(self, source, variant, build):
+        img = self.load(source, variant)
+        if img is None:
+            img = build()
+            self.store(source, variant, img)
+        return img
+
+def render_shimmer_frame(progress, base_img):
+    """Composites one frame of the diagonal logo shimmer (progress 0..1) over base_img."""
+    from PIL import Image, ImageDraw, ImageChops
+    overlay = Image.new('RGBA', base_img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    w, h = base_img.size
+    center_x = int(progress * (w + h + 80)) - int(h/2) - 40
+    
+    # Widen the shimmer wave significantly
+    draw.line([(center_x - 15, 0), (center_x - h - 15, h)], fill=(0, 255, 255, 110), width=25)
+    draw.line([(center_x,      0), (center_x - h,      h)], fill=(255, 255, 255, 220), width=18)
+    draw.line([(center_x + 15, 0), (center_x - h + 15, h)], fill=(255, 0, 255, 110), width=25)
+    base_rgba = base_img.convert('RGBA')
+    r, g, b, alpha = base_rgba.split()
+    overlay_alpha = overlay.split()[3]
+    overlay.putalpha(ImageChops.darker(overlay_alpha, alpha))
+    return Image.alpha_composite(base_rgba, overlay)
+
+def shimmer_window_phases(window):
+    start, end = window
+    return [phase for phase in range(SHIMMER_PHASES + 1) if start <= phase / SHIMMER_PHASES <= end]
+
+def build_shimmer_sheet(base_img, window):
+    """Renders every shimmer frame a logo shows during its window into one vertical sprite sheet."""
+    from PIL import Image
+    start, end = window
+    phases = shimmer_window_phases(window)
+    w, h = base_img.size
+    sheet = Image.new('RGBA', (w, h * len(phases)), (0, 0, 0, 0))
+    for k, phase in enumerate(phases):
+        progress = (phase / SHIMMER_PHASES - start) / (end - start)
+        sheet.paste(render_shimmer_frame(progress, base_img), (0, k * h))
+    return sheet
+
+def render_omni_grid(width, height, scale, origin=(0.0, OMNI_GRID_CELLS), cells=OMNI_GRID_CELLS):
+    """Rasterizes the Omni alignment grid into a width x height RGB image.
+
+    The pattern lives on a cells x cells square of grid units with (0, 0) at the bottom-left
+    (cell numbering starts at 1,1 there). scale is pixels per grid unit and origin the grid
+    coordinate of the image's top-left corner, so any window of the pattern can be drawn
+    straight at a monitor's native resolution.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+    import numpy as np
+
+    img = Image.new("RGB", (width, height), OMNI_GRID_COLORS['bg'])
+    draw = ImageDraw.Draw(img)
+    ox, oy = origin
+    # Stroke widths are proportional to the cell size (matched to the old 4096px plot)
+    thin = max(1, round(scale / 90))
+    thick = max(1, round(scale / 45))
+    pad = thick / scale
+    u_lo, u_hi = ox - pad, ox + width / scale + pad
+    v_lo, v_hi = oy - height / scale - pad, oy + pad
+
+    def to_px(u, v):
+        return (u - ox) * scale, (oy - v) * scale
+
+    # --- 1. Green concentric circles (painted first, lines and labels sit on top) ---
+    radii = np.arange(1, OMNI_GRID_CIRCLES + 1) / OMNI_GRID_CIRCLES * (cells * 0.7)
+    cx, cy = to_px(cells / 2, cells / 2)
+    for r in radii * scale:
+        if cx + r < 0 or cx - r > width or cy + r < 0 or cy - r > height:
+            continue
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=OMNI_GRID_COLORS['circle'], width=thick)
+
+    # --- 2. Magenta grid, only the lines inside this window ---
+    ticks = np.arange(cells + 1)
+    x0, y0 = to_px(0, 0)
+    x1, y1 = to_px(cells, cells)
+    for i in ticks[(ticks >= u_lo) & (ticks <= u_hi)]:
+        px = to_px(i, 0)[0]
+        draw.line([(px, y1), (px, y0)], fill=OMNI_GRID_COLORS['grid'], width=thin)
+    for i in ticks[(ticks >= v_lo) & (ticks <= v_hi)]:
+        py = to_px(0, i)[1]
+        draw.line([(x0, py), (x1, py)], fill=OMNI_GRID_COLORS['grid'], width=thin)
+
+    # --- 3. Cyan dashed angle lines from every corner ---
+    # All dashes of all 24 rays are generated in one go and clipped to the grid square
+    angles = np.radians([15, 30, 45, 60, 75, 90])
+    corner_dirs = [((0, 0), angles), ((cells, 0), np.pi - angles), ((0, cells), -angles), ((cells, cells), np.pi + angles)]
+    origins = np.concatenate([np.tile(c, (len(a), 1)) for c, a in corner_dirs]).astype(float)
+    theta = np.concatenate([a for c, a in corner_dirs])
+    dirs = np.stack([np.cos(theta), np.sin(theta)], axis=1)
+    dirs[np.abs(dirs) < 1e-9] = 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exit_t = np.where(dirs > 0, (cells - origins) / dirs, np.where(dirs < 0, -origins / dirs, np.inf))
+    length = np.minimum(exit_t.min(axis=1), cells * 2)
+    period = OMNI_GRID_DASH[0] + OMNI_GRID_DASH[1]
+    t0 = np.arange(0, cells * 2, period)[None, :]
+    t1 = np.minimum(t0 + OMNI_GRID_DASH[0], length[:, None])
+    valid = t0 < length[:, None]
+    starts = origins[:, None, :] + dirs[:, None, :] * t0[..., None]
+    ends = origins[:, None, :] + dirs[:, None, :] * t1[..., None]
+    lo = np.minimum(starts, ends)
+    hi = np.maximum(starts, ends)
+    valid &= (hi[..., 0] >= u_lo) & (lo[..., 0] <= u_hi) & (hi[..., 1] >= v_lo) & (lo[..., 1] <= v_hi)
+    sx, sy = to_px(starts[valid][:, 0], starts[valid][:, 1])
+    ex, ey = to_px(ends[valid][:, 0], ends[valid][:, 1])
+    for seg in np.stack([sx, sy, ex, ey], axis=1).tolist():
+        draw.line(seg, fill=OMNI_GRID_COLORS['angle'], width=thick)
+
+    # Circles overhang the square; the old plot clipped everything to its axes
+    bg = OMNI_GRID_COLORS['bg']
+    if x0 > 0: draw.rectangle([0, 0, x0 - 1, height], fill=bg)
+    if x1 < width: draw.rectangle([x1 + 1, 0, width, height], fill=bg)
+    if y1 > 0: draw.rectangle([0, 0, width, y1 - 1], fill=bg)
+    if y0 < height: draw.rectangle([0, y0 + 1, width, height], fill=bg)
+
+    # --- 4. Cell numbering along the bottom and left edges ---
+    font_size = max(8, round(scale * 0.133))
+    try:
+        font = ImageFont.truetype("arialbd.ttf", size=font_size)
+    except IOError:
+        font = ImageFont.load_default(size=font_size)
+    for i in ticks[1:]:
+        if u_lo - 1 <= i <= u_hi + 1 and v_lo <= 0.2 <= v_hi + 1:
+            draw.text(to_px(i - 0.5, 0.2), str(i), font=font, fill=OMNI_GRID_COLORS['label'], anchor="ms")
+        if v_lo - 1 <= i <= v_hi + 1 and u_lo - 1 <= 0.2 <= u_hi:
+            draw.text(to_px(0.2, i - 0.5), str(i), font=font, fill=OMNI_GRID_COLORS['label'], anchor="lm")
+    return img
+
+def render_omni_grid_per_monitor(monitors, cells=OMNI_GRID_CELLS):
+    """Renders each monitor's slice of one physically continuous Omni grid at native resolution.
+
+    The grid square spans the larger side of the physical layout, anchored at its bottom-left
+    so the cell numbering stays on screen. Each monitor is drawn at its own pixels per inch, so
+    lines run straight across bezels once the layout matches reality.
+    """
+    plan = get_layout_plan(monitors)
+    inches_per_unit = max(plan.max_phys_x - plan.min_phys_x, plan.max_phys_y - plan.min_phys_y) / cells
+    images = []
+    for m, mp in zip(monitors, plan.monitors):
+        x1, y1, x2, y2 = mp.phys
+        scale = m.res_w / (x2 - x1) * inches_per_unit
+        origin = ((x1 - plan.min_phys_x) / inches_per_unit, (plan.max_phys_y - y1) / inches_per_unit)
+        images.append(render_omni_grid(m.res_w, m.res_h, scale, origin, cells))
+    return images
+
+def render_calibration_pattern(pattern, width, height):
+    """Renders one calibration pattern ('gradient', 'grid' or 'uniformity') at width x height.
+
+    Everything is laid out relative to the requested size, so a pattern rendered at a
+    monitor's native resolution maps 1:1 onto its pixels.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+    import numpy as np
+
+    s = height / 2160.0
+    def load_font(size):
+        try:
+            return ImageFont.truetype("arial.ttf", size=max(10, round(size * s)))
+        except IOError:
+            return ImageFont.load_default(size=max(10, round(size * s)))
+
+    if pattern == "gradient":
+        # Gray / Red / Green / Blue bands, each a 0-255 sweep across the width (broadcast, no tiling)
+        band_h = height // 4
+        sweep = np.linspace(0, 255, width).round().astype(np.uint8)
+        img_arr = np.zeros((height, width, 3), dtype=np.uint8)
+        img_arr[0:band_h] = sweep[None, :, None]
+        img_arr[band_h:band_h*2, :, 0] = sweep
+        img_arr[band_h*2:band_h*3, :, 1] = sweep
+        img_arr[band_h*3:height, :, 2] = sweep
+        img = Image.fromarray(img_arr, mode='RGB')
+        draw = ImageDraw.Draw(img)
+        font, font_small = load_font(60), load_font(40)
+        labels = ["GRAY (Luma) 256-Level Sweep", "RED Channel 256-Level Sweep", "GREEN Channel 256-Level Sweep", "BLUE Channel 256-Level Sweep"]
+        for i, label in enumerate(labels):
+            y_pos = i * band_h
+            # Background rect for text readability
+            draw.rectangle([10 * s, y_pos + 10 * s, 900 * s, y_pos + 80 * s], fill=(20, 20, 20))
+            draw.text((20 * s, y_pos + 15 * s), label, font=font, fill=(255, 255, 255))
+            # Markers at 25%, 50%, 75%
+            for pct in [0.25, 0.50, 0.75]:
+                mx = int(width * pct)
+                draw.line([(mx, y_pos + band_h - 50 * s), (mx, y_pos + band_h)], fill=(255, 255, 255), width=max(1, round(3 * s)))
+                draw.text((mx - 30 * s, y_pos + band_h - 100 * s), f"{int(pct*100)}%", font=font_small, fill=(255, 255, 255))
+        return img
+
+    if pattern == "grid":
+        # 1px geometry grid with a frame and centre cross; off-by-one scaling shows up as moire
+        img = Image.new("RGB", (width, height), (0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        step = max(8, height // 12)
+        for x in range(0, width, step):
+            draw.line([(x, 0), (x, height - 1)], fill=(96, 96, 96))
+        for y in range(0, height, step):
+            draw.line([(0, y), (width - 1, y)], fill=(96, 96, 96))
+        draw.rectangle([0, 0, width - 1, height - 1], outline=(255, 255, 255))
+        draw.line([(width // 2, 0), (width // 2, height - 1)], fill=(0, 255, 255))
+        draw.line([(0, height // 2), (width - 1, height // 2)], fill=(0, 255, 255))
+        draw.text((20 * s, 20 * s), f"{width} x {height}", font=load_font(40), fill=(255, 255, 255))
+        return img
+
+    if pattern == "uniformity":
+        # Flat 50% field split into a 3x3 zone map for comparing brightness across the panel
+        img = Image.new("RGB", (width, height), (128, 128, 128))
+        draw = ImageDraw.Draw(img)
+        font = load_font(40)
+        for zy in range(3):
+            for zx in range(3):
+                x0, y0 = zx * width // 3, zy * height // 3
+                draw.rectangle([x0, y0, (zx + 1) * width // 3 - 1, (zy + 1) * height // 3 - 1], outline=(112, 112, 112))
+                draw.text((x0 + 15 * s, y0 + 10 * s), str(zy * 3 + zx + 1), font=font, fill=(112, 112, 112))
+        return img
+
+    raise ValueError(f"Unknown calibration pattern: {pattern}")
+
+class CalibrationPatternCache:
+    """Generated calibration patterns keyed by (pattern, width, height); safe to fill from worker threads."""
+
+    def __init__(self, max_entries=8):
+        self.entries = collections.OrderedDict()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get(self, pattern, width, height):
+        key = (pattern, width, height)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        img = render_calibration_pattern(pattern, width, height)
+        with self.lock:
+            self.entries[key] = img
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return img
+
+    def render_many(self, pattern, sizes):
+        """Renders the pattern for every (w, h) in sizes concurrently; returns images in the same order."""
+        from concurrent.futures import ThreadPoolExecutor
+        unique = list(dict.fromkeys(sizes))
+        with ThreadPoolExecutor(max_workers=max(1, min(len(unique), os.cpu_count() or 1))) as pool:
+            images = dict(zip(unique, pool.map(lambda size: self.get(pattern, *size), unique)))
+        return [images[size] for size in sizes]
+
+def open_image_reduced(path, target_size, reducing_gap=2.0, keep_aspect=False):
+    """Opens an image as RGB, decoding no more pixels than a resize to target_size needs.
+
+    JPEGs are decoded in the DCT domain at 1/2, 1/4 or 1/8 scale (Image.draft) and any
+    format is then pre-shrunk with Image.reduce, both only while the result stays at least
+    reducing_gap times the target on each axis, so the final LANCZOS resize keeps full detail.
+    With keep_aspect, target_size is a bounding box for an aspect-preserving resize.
+    Returns (image, stats) where stats reports the decode size and an estimate of the time saved.
+    """
+    from PIL import Image
+    started = time.perf_counter()
+    with unbounded_pixels():
+        img = Image.open(path)
+    src_w, src_h = img.size
+    tw, th = target_size
+    if keep_aspect:
+        s = min(tw / src_w, th / src_h, 1.0)
+        tw, th = src_w * s, src_h * s
+    need = (max(1, int(tw * reducing_gap)), max(1, int(th * reducing_gap)))
+    
+    if img.format == 'JPEG':
+        img.draft(None, need)
+    img = img.convert('RGB')
+    decoded = img.size
+    decode_s = time.perf_counter() - started
+    
+    factor = max(1, min(decoded[0] // need[0], decoded[1] // need[1]))
+    if factor > 1:
+        img = img.reduce(factor)
+        
+    # Not measured: extrapolated from this decode, since DCT scaling skips most of the IDCT and
+    # colour conversion work and pixel count is a fair proxy for it
+    ratio = (src_w * src_h) / (decoded[0] * decoded[1])
+    stats = {"source": (src_w, src_h), "decoded": decoded, "draft_scale": round(src_w / decoded[0]),
+             "reduce_factor": factor, "size": img.size, "decode_s": round(decode_s, 4),
+             "est_saved_s": round(decode_s * (ratio - 1), 4)}
+    return img, stats
+
+def format_decode_stats(stats):
+    """One-line summary of open_image_reduced() stats for the logs."""
+    text = f"Decoded {stats['source'][0]}x{stats['source'][1]}"
+    text += f" at 1/{stats['draft_scale']} scale" if stats["draft_scale"] > 1 else " at full size"
+    if stats["reduce_factor"] > 1:
+        text += f", reduced x{stats['reduce_factor']} to {stats['size'][0]}x{stats['size'][1]}"
+    text += f" in {stats['decode_s']:.2f}s"
+    if stats["est_saved_s"] > 0:
+        text += f", est. ~{stats['est_saved_s']:.2f}s saved vs. full decode"
+    return text
+
+def load_media_proxy(path, max_side=MEDIA_PROXY_MAX_SIDE):
+    """Decodes a small RGB proxy (numpy array) of an image, or of a video's first frame."""
+    from PIL import Image
+    import numpy as np
+    if path.lower().endswith(VIDEO_EXTS):
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-i', path, '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+            capture_output=True, check=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        )
+        img = Image.open(io.BytesIO(result.stdout)).convert('RGB')
+    else:
+        img, stats = open_image_reduced(path, (max_side, max_side), keep_aspect=True)
+        if DEBUG:
+            print(f"[media proxy] {format_decode_stats(stats)}")
+    img.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+    return np.asarray(img)
+
+def detect_display_topology():
+    """Enumerates the connected monitors via screeninfo (can be slow: EDID queries). Thread-safe."""
+    from screeninfo import get_monitors
+    return [{
+        "name": m.name, "x": m.x, "y": m.y, "width": m.width, "height": m.height,
+        "width_mm": m.width_mm, "height_mm": m.height_mm
+    } for m in get_monitors()]
+
+def lookup_current_wallpaper():
+    """Returns the active Windows desktop wallpaper path, or None. Thread-safe."""
+    if os.name != 'nt':
+        return None
+    import ctypes
+    SPI_GETDESKWALLPAPER = 0x0073
+    buffer = ctypes.create_unicode_buffer(512)
+    ctypes.windll.user32.SystemParametersInfoW(SPI_GETDESKWALLPAPER, 512, buffer, 0)
+    wallpaper_path = buffer.value
+    if wallpaper_path and os.path.exists(wallpaper_path):
+        return wallpaper_path
+    return None
+
+def display_signature(root):
+    """Cheap fingerprint of the display setup, used to tell whether re-enumeration is needed.
+
+    Must be called on the Tk thread. On Windows this adds the monitor count and the virtual
+    desktop rectangle from GetSystemMetrics, which change whenever screens are added,
+    removed, resized or rearranged.
+    """
+    sig = [root.winfo_screenwidth(), root.winfo_screenheight(), root.winfo_vrootwidth(), root.winfo_vrootheight()]
+    if os.name == 'nt':
+        try:
+            import ctypes
+            # SM_CXSCREEN, SM_CYSCREEN, SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN, SM_CMONITORS
+            sig += [ctypes.windll.user32.GetSystemMetrics(i) for i in (0, 1, 76, 77, 78, 79, 80)]
+        except Exception:
+            pass
+    return sig
+
+def build_filter_graph(monitors, rate=None, decimate=None, duration=None):
+    """Builds the filter_complex that crops, scales, calibrates and overlays input 0 across the layout.
+
+    rate is the source frame rate (e.g. "30000/1001"). The overlays take their timing from
+    the black background, so without it every render would come out at color's default 25 fps.
+    decimate (an mpdecimate filter, see decimate_filter) drops near-duplicate source frames
+    before the per-monitor chains. The background then comes from the decimated stream
+    itself (a 2x2 corner padded out to the canvas and painted black), so it carries the
+    source's variable frame timing instead of imposing a constant rate. A decimated tail
+    would end the output early, so with duration (the source's, in seconds) the last frame
+    is cloned up to it.
+    """
+    plan = get_layout_plan(monitors)
+    
+    splits = "".join([f"[m{i+1}]" for i in range(len(monitors))])
+    if decimate:
+        filter_str = f"[0:v]{decimate},scale={plan.map_w}:{plan.map_h},split={len(monitors) + 1}{splits}[mbg];"
+        filter_str += (f" [mbg]crop=2:2:0:0,format=yuv420p,pad={plan.enc_w}:{plan.enc_h}:0:0:black,"
+                       f"drawbox=x=0:y=0:w=2:h=2:color=black:t=fill,setsar=1[bg];")
+    else:
+        filter_str = f"[0:v]scale={plan.map_w}:{plan.map_h},split={len(monitors)}{splits};"
+        filter_str += f" color=c=black:s={plan.enc_w}x{plan.enc_h}" + (f":r={rate}" if rate else "") + "[bg];"
+    
+    for i, (mon, mp) in enumerate(zip(monitors, plan.monitors)):
+        crop_x, crop_y, crop_w, crop_h = mp.crop
+        crop = f"crop={crop_w}:{crop_h}:{crop_x}:{crop_y}"
+        scale = f"scale={mon.res_w}:{mon.res_h}"
+        
+        # --- Absolute Color Calibration Math ---
+        m_gray = getattr(mon, 'cal_gray', 1.0)
+        m_r = getattr(mon, 'cal_r', 1.0)
+        m_g = getattr(mon, 'cal_g', 1.0)
+        m_b = getattr(mon, 'cal_b', 1.0)
+        
+        p_gamma = getattr(mon, 'gamma', 1.0)
+        p_bright = getattr(mon, 'brightness', 0.0)
+        p_sat = getattr(mon, 'saturation', 1.0)
+        
+        eq_filter = ""
+        if any(abs(m - 1.0) > 0.02 for m in [p_gamma, p_sat]) or abs(p_bright) > 0.02:
+            eq_filter += f",eq=gamma={p_gamma:.2f}:brightness={p_bright:.2f}:saturation={p_sat:.2f}"
+            
+        if any(abs(m - 1.0) > 0.02 for m in [m_gray, m_r, m_g, m_b]):
+            rr = m_gray * m_r
+            gg = m_gray * m_g
+            bb = m_gray * m_b
+            eq_filter += f",colorchannelmixer=rr={rr:.3f}:gg={gg:.3f}:bb={bb:.3f}"
+        
+        out_v = f"v{i+1}"
+        filter_str += f" [m{i+1}]{crop},{scale}{eq_filter}[{out_v}];"
+    
+    pad_tail = bool(decimate and duration)
+    curr_bg = "bg"
+    for i, mp in enumerate(plan.monitors):
+        out_bg = f"ov{i+1}" if i < len(monitors) - 1 or pad_tail else "outv"
+        paste_x, paste_y = mp.paste
+        # We must specify :shortest=1 so that the infinite black [bg] layer 
+        # stops generating when the finite [v{i+1}] source video ends!
+        filter_str += f" [{curr_bg}][v{i+1}]overlay={paste_x}:{paste_y}:shortest=1[{out_bg}];"
+        curr_bg = out_bg
+    if pad_tail:
+        # mpdecimate keeps a frame at least every DECIMATE_MAX_GAP_S, so that much padding always
+        # reaches the end. tpad's first clone repeats the last frame's timestamp; select drops it.
+        filter_str += (f" [{curr_bg}]tpad=stop_mode=clone:stop_duration={DECIMATE_MAX_GAP_S},"
+                       f"select='not(eq(t\\,prev_selected_t))',trim=end={duration:.3f}[outv];")
+    return filter_str
+
+def probe_video(path):
+    """Returns (duration in seconds, frame rate string) of a video, (0, None) if it can't be probed."""
+    rate = None
+    try:
+        import ffmpeg
+        probe = ffmpeg.probe(path)
+        video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+        duration = float(video_stream['duration']) if video_stream and 'duration' in video_stream else float(probe['format']['duration'])
+        if video_stream:
+            rate = next((r for r in (video_stream.get('avg_frame_rate'), video_stream.get('r_frame_rate')) if r and not r.startswith('0/')), None)
+    except Exception:
+        duration = 0
+    return duration, rate
+
+def build_render_command(monitors, input_args, output_args, include_audio=True, rate=None, decimate=None, duration=None):
+    """Returns the full FFmpeg argv compositing input 0 across the layout.
+
+    input_args opens the source (['-i', path], or a lavfi test source for benchmarks) and
+    output_args holds the codec options and destination. decimate and duration are passed
+    on to build_filter_graph; decimate makes the output variable frame rate.
+    """
+    # Build the raw ffmpeg command list to avoid Python wrapper dictionary map mangling
+    cmd = ['ffmpeg', '-y'] + list(input_args) + ['-filter_complex', build_filter_graph(monitors, rate, decimate, duration)]
+    
+    # Map the combined video output
+    cmd.extend(['-map', '[outv]'])
+    
+    # Map the original audio if requested
+    if include_audio:
+        cmd.extend(['-map', '0:a?'])
+        cmd.extend(['-c:a', 'copy'])
+    if decimate:
+        # Keep the decimated timestamps instead of duplicating frames back to a constant rate
+        cmd.extend(['-fps_mode', 'vfr'])
+    return cmd + list(output_args)
+
+def decimate_filter(fps=None):
+    """mpdecimate filter of the decimation pre-stage; it keeps at least one frame every DECIMATE_MAX_GAP_S."""
+    return f"mpdecimate=max={max(1, round((fps or 25) * DECIMATE_MAX_GAP_S))}"
+
+def rate_to_fps(rate):
+    """Frame rate string ("30000/1001", "24") as a float, None if unknown."""
+    if not rate:
+        return None
+    num, _, den = str(rate).partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def analyze_video_frames(path, governor=None):
+    """Decodes a video once through mpdecimate without a drop limit and counts its frames.
+
+    Returns {"frames": decoded, "unique": kept, "duration": s, "fps": rate} or None if FFmpeg
+    couldn't read it. One unique frame means a static source. Needs no ffprobe: the counts
+    come from FFmpeg's verbose end-of-run statistics.
+    """
+    cmd = ['ffmpeg', '-hide_banner', '-nostats', '-loglevel', 'verbose'] + (governor.ffmpeg_args()[0] if governor else []) + \
+          ['-i', path, '-map', '0:v:0', '-vf', 'mpdecimate=max=0', '-fps_mode', 'vfr', '-f', 'null', '-']
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True,
+                               creationflags=governor.creationflags() if governor else subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    if governor:
+        governor.govern_process(process.pid)
+    log = process.communicate()[1]
+    decoded = re.search(r"Input stream #\d+:\d+ \(video\):.*?(\d+) frames decoded", log)
+    kept = re.search(r"Output stream #\d+:\d+ \(video\): (\d+) frames encoded", log)
+    if process.returncode != 0 or not decoded or not kept:
+        return None
+    fps = re.search(r"Stream #\d+:\d+.*?: Video: .*?, ([\d.]+) fps", log)
+    fps = float(fps.group(1)) if fps else None
+    frames = int(decoded.group(1))
+    duration = re.search(r"Duration: (\d+):(\d+):(\d+\.\d+)", log)
+    if duration:
+        hrs, mins, secs = map(float, duration.groups())
+        duration = hrs * 3600 + mins * 60 + secs
+    else:
+        duration = frames / (fps or 25)
+    return {"frames": frames, "unique": int(kept.group(1)), "duration": duration, "fps": fps}
+
+def prepare_video_render(input_path, output_path, monitors, include_audio=True, rate=None, decimate=False, governor=None, trace=None):
+    """FFmpeg argv rendering a video across the layout, with the optional frame-decimation pre-stage.
+
+    Returns (cmd, info). Without decimate, info is None and cmd is the plain filter graph. With
+    it, the source is analyzed first (analyze_video_frames, whose results info holds); if the
+    analysis fails, info is None as well and every frame is rendered. A static
+    source is composited once by the still compositor and cmd encodes that image as a loop at
+    STATIC_LOOP_FPS; the caller removes info["still"] afterwards. Any other source renders
+    through the graph behind mpdecimate, with variable frame rate output.
+    """
+    global_args, thread_args = governor.ffmpeg_args() if governor else ([], [])
+    info = None
+    if decimate:
+        with trace_span(trace, "ffmpeg.analyze"):
+            info = analyze_video_frames(input_path, governor)
+    if info and info["unique"] <= 1:
+        info["static"] = True
+        root, _ = os.path.splitext(output_path)
+        still = info["still"] = os.path.join(os.path.dirname(root), "." + os.path.basename(root) + ".still.png")
+        frame = os.path.join(os.path.dirname(root), "." + os.path.basename(root) + ".frame.png")
+        with trace_span(trace, "ffmpeg.extract_frame"):
+            subprocess.run(['ffmpeg', '-y', '-v', 'error', '-i', input_path, '-frames:v', '1', frame], check=True,
+                           capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        try:
+            composite_image(frame, still, monitors, profile="PNG Fast", trace=trace)
+        finally:
+            os.remove(frame)
+        plan = get_layout_plan(monitors)
+        cmd = ['ffmpeg', '-y'] + global_args + ['-loop', '1', '-framerate', str(STATIC_LOOP_FPS), '-i', still]
+        if include_audio:
+            cmd.extend(['-i', input_path, '-map', '0:v', '-map', '1:a?'])
+        # Same canvas and pixel format as the filter graph's output
+        cmd.extend(['-t', f"{max(info['duration'], 1 / STATIC_LOOP_FPS):.3f}",
+                    '-vf', f"pad={plan.enc_w}:{plan.enc_h}:0:0:black,format=yuv420p"])
+        return cmd + thread_args + VIDEO_CODEC_ARGS + ['-tune', 'stillimage', output_path], info
+    if info:
+        info["static"] = False
+    graph_decimate = decimate_filter(info["fps"] or rate_to_fps(rate)) if info else None
+    cmd = build_render_command(monitors, global_args + ['-i', input_path], thread_args + VIDEO_CODEC_ARGS + [output_path],
+                               include_audio=include_audio, rate=rate, decimate=graph_decimate,
+                               duration=info["duration"] if info else None)
+    return cmd, info
+
+def decimation_stats(info, frames_out):
+    """What the decimation pre-stage saved: source frames, frames rendered and skipped."""
+    stats = {"static": info["static"], "frames_in": info["frames"], "unique": info["unique"], "frames_out": frames_out}
+    stats["skipped"] = max(0, info["frames"] - frames_out) if frames_out is not None else None
+    return stats
+
+def format_decimation(stats):
+    """Engine Log line for decimation_stats()."""
+    if stats["static"]:
+        return (f"Static source: composited once as a still, {stats['frames_in']} source frames encoded as "
+                f"{stats['frames_out']} looped frames")
+    if stats["skipped"] is None:
+        return f"Frame decimation: {stats['unique']} of {stats['frames_in']} source frames differ"
+    share = stats["skipped"] / stats["frames_in"] * 100 if stats["frames_in"] else 0
+    return f"Frame decimation: {stats['skipped']} of {stats['frames_in']} frames skipped ({share:.0f}%), {stats['frames_out']} rendered"
+
+class RenderTrace:
+    """Named timing spans for one render, aggregated per name and exportable as a Chrome trace.
+
+    Span names are "category.stage" (composite.decode, preview.enhance, ffmpeg.encode...).
+    Spans can be recorded from any thread. Totals cover every span; the individual events
+    behind the flame chart stop being kept after max_events so a long session stays bounded.
+    """
+    def __init__(self, label="session", max_events=RENDER_TRACE_MAX_EVENTS):
+        self.label = label
+        self.t0 = time.perf_counter()
+        self.t1 = None
+        self.max_events = max_events
+        self.events = [] # (name, thread id, start, duration, args)
+        self.dropped = 0
+        self.totals = {} # name -> [calls, total s, max s], in first-seen order
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), **args)
+
+    def record(self, name, start, end, **args):
+        thread = threading.current_thread()
+        took = end - start
+        with self.lock:
+            total = self.totals.setdefault(name, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += took
+            total[2] = max(total[2], took)
+            if len(self.events) < self.max_events:
+                self.threads.setdefault(thread.ident, thread.name)
+                self.events.append((name, thread.ident, start, took, args))
+            else:
+                self.dropped += 1
+
+    def finish(self):
+        self.t1 = time.perf_counter()
+
+    def stage_seconds(self, category):
+        """Total seconds per stage of one category, e.g. {"decode": 0.4, ...} for "composite"."""
+        prefix = category + "."
+        with self.lock:
+            return {name[len(prefix):]: round(total[1], 4) for name, total in self.totals.items() if name.startswith(prefix)}
+
+    def report(self):
+        wall = (self.t1 or time.perf_counter()) - self.t0
+        lines = [f"Timing ({self.label}, {wall:.2f}s wall):",
+                 f"  {'span':<26}{'calls':>7}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'share':>8}"]
+        with self.lock:
+            for name, (calls, total, peak) in self.totals.items():
+                share = total / wall * 100 if wall > 0 else 0.0
+                lines.append(f"  {name:<26}{calls:>7}{total * 1000:>11.1f}{total * 1000 / calls:>10.2f}{peak * 1000:>10.1f}{share:>7.1f}%")
+            if self.dropped:
+                lines.append(f"  ({self.dropped} events past the trace limit are counted but not in the trace file)")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self):
+        """Trace-event JSON (complete "X" events) for chrome://tracing, Perfetto or speedscope."""
+        pid = os.getpid()
+        with self.lock:
+            events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                      for tid, name in self.threads.items()]
+            for name, tid, start, took, args in self.events:
+                events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                               "ts": round((start - self.t0) * 1e6, 1), "dur": round(took * 1e6, 1), "args": args})
+            return {"traceEvents": events, "displayTimeUnit": "ms",
+                    "otherData": {"label": self.label, "dropped_events": self.dropped}}
+
+    def save_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+class ProcessSampler:
+    """Samples a process's CPU time, resident memory and I/O from /proc while it runs.
+
+    A daemon thread reads /proc/<pid>/stat, statm and io every interval and hands each sample
+    to on_sample. I/O counts every byte the process read or wrote (rchar/wchar), page cache and
+    pipes included. Where /proc is missing (Windows, macOS) the sampler does nothing and
+    summary() is None.
+    """
+    def __init__(self, pid, label, interval=RESOURCE_SAMPLE_INTERVAL_S, on_sample=None):
+        self.pid = pid
+        self.label = label
+        self.interval = interval
+        self.on_sample = on_sample
+        self.samples = [] # (wall s since start, cpu s, rss bytes, read bytes, write bytes)
+        self.available = os.path.exists(f"/proc/{pid}/stat")
+        self.stopped = threading.Event()
+        self.thread = None
+        self.t0 = time.perf_counter()
+        self.base = None
+
+    def read(self):
+        """One raw reading as (cpu s, rss bytes, read bytes, write bytes); None once the process is gone.
+
+        An exited child that hasn't been reaped yet (a zombie) counts as gone: its statm reads all zeros.
+        """
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+            if fields[0] in ('Z', 'X'):
+                return None
+            cpu = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+            with open(f"/proc/{self.pid}/statm") as f:
+                rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+            if rss == 0:
+                return None # Exiting: the address space is already torn down
+            io_counts = {}
+            try:
+                with open(f"/proc/{self.pid}/io") as f:
+                    for line in f:
+                        key, _, value = line.partition(":")
+                        io_counts[key] = int(value)
+            except OSError:
+                pass # Not readable without ptrace rights on some kernels
+            return cpu, rss, io_counts.get("rchar", 0), io_counts.get("wchar", 0)
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def start(self):
+        if self.available:
+            self.base = self.read()
+            self.thread = threading.Thread(target=self._run, name=f"sampler-{self.label}", daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            if not self.sample(notify=True):
+                break
+
+    def sample(self, notify=False):
+        """Takes one sample; False once the process is gone."""
+        reading = self.read()
+        if reading is None or self.base is None:
+            return False
+        cpu, rss, rd, wr = reading
+        sample = (time.perf_counter() - self.t0, cpu - self.base[0], rss, rd - self.base[2], wr - self.base[3])
+        prev = self.samples[-1] if self.samples else (0.0, 0.0, 0, 0, 0)
+        self.samples.append(sample)
+        if notify and self.on_sample:
+            dt = max(sample[0] - prev[0], 1e-6)
+            self.on_sample({"label": self.label,
+                            "cpu_pct": round((sample[1] - prev[1]) / dt * 100, 1),
+                            "rss_mb": round(rss / 1048576, 1),
+                            "read_mb_s": round((sample[3] - prev[3]) / dt / 1048576, 2),
+                            "write_mb_s": round((sample[4] - prev[4]) / dt / 1048576, 2)})
+        return True
+
+    def stop(self):
+        """Stops sampling, takes a last sample if the process is still there, and returns summary()."""
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.sample()
+        return self.summary()
+
+    def summary(self):
+        """Peaks and averages over the samples taken, or None if nothing could be sampled."""
+        if not self.samples:
+            return None
+        wall, cpu, _, rd, wr = self.samples[-1]
+        rates = [(b[1] - a[1]) / (b[0] - a[0]) * 100 for a, b in zip([(0.0, 0.0)] + self.samples, self.samples) if b[0] > a[0]]
+        rss = [s[2] for s in self.samples]
+        return {
+            "process": self.label,
+            "samples": len(self.samples),
+            "sampled_s": round(wall, 2),
+            "cpu_s": round(cpu, 2),
+            "cpu_avg_pct": round(cpu / wall * 100, 1) if wall else None,
+            "cpu_peak_pct": round(max(rates), 1) if rates else None,
+            "rss_avg_mb": round(sum(rss) / len(rss) / 1048576, 1),
+            "rss_peak_mb": round(max(rss) / 1048576, 1),
+            "read_mb": round(rd / 1048576, 1),
+            "write_mb": round(wr / 1048576, 1),
+        }
+
+def format_resource_sample(sample):
+    """Short live readout of one ProcessSampler sample for the progress bar."""
+    return (f"{sample['label']}: CPU {sample['cpu_pct']:.0f}%  RSS {sample['rss_mb']:.0f} MB  "
+            f"R {sample['read_mb_s']:.1f} MB/s  W {sample['write_mb_s']:.1f} MB/s")
+
+def format_resource_summary(summary):
+    """One-line Engine Log summary of ProcessSampler.summary()."""
+    return (f"Resources ({summary['process']}, {summary['samples']} samples): CPU {summary['cpu_s']:.1f}s "
+            f"(avg {summary['cpu_avg_pct']:.0f}%, peak {summary['cpu_peak_pct']:.0f}%), "
+            f"RSS avg {summary['rss_avg_mb']:.0f} MB / peak {summary['rss_peak_mb']:.0f} MB, "
+            f"read {summary['read_mb']:.1f} MB, wrote {summary['write_mb']:.1f} MB")
+
+def trace_span(trace, name, **args):
+    """trace.span(name) when a trace is given, otherwise a no-op context."""
+    return trace.span(name, **args) if trace is not None else contextlib.nullcontext()
+
+def apply_color_calibration(img, mon, trace=None):
+    """Applies a monitor's saturation/brightness/channel/gamma calibration to a PIL RGB image."""
+    from PIL import Image
+    
+    # --- Absolute Color Calibration Math (PIL) ---
+    m_gray = getattr(mon, 'cal_gray', 1.0)
+    m_r = getattr(mon, 'cal_r', 1.0)
+    m_g = getattr(mon, 'cal_g', 1.0)
+    m_b = getattr(mon, 'cal_b', 1.0)
+    
+    p_gamma = getattr(mon, 'gamma', 1.0)
+    p_bright = getattr(mon, 'brightness', 0.0)
+    p_sat = getattr(mon, 'saturation', 1.0)
+    
+    if abs(p_sat - 1.0) > 0.02:
+        from PIL import ImageEnhance
+        with trace_span(trace, "composite.enhance"):
+            enhancer = ImageEnhance.Color(img)
+            img = enhancer.enhance(p_sat)
+        
+    if abs(p_bright) > 0.02:
+        from PIL import ImageEnhance
+        # FFmpeg brightness is -1.0 to 1.0. PIL is a multiplier where 1.0 is original.
+        # We map FFmpeg's additive offset into a rough PIL multiplier (1.0 + brightness).
+        with trace_span(trace, "composite.enhance"):
+            enhancer = ImageEnhance.Brightness(img)
+            img = enhancer.enhance(1.0 + p_bright)
+        
+    if any(abs(m - 1.0) > 0.02 for m in [m_gray, m_r, m_g, m_b, p_gamma]):
+        # Apply raw RGB channel math and Gamma on a per-pixel array basis
+        import numpy as np
+        
+        rr = m_gray * m_r
+        gg = m_gray * m_g
+        bb = m_gray * m_b
+        
+        with trace_span(trace, "composite.calibrate"):
+            arr = np.array(img, dtype=np.float32)
+            arr[:, :, 0] *= rr
+            arr[:, :, 1] *= gg
+            arr[:, :, 2] *= bb
+        
+            if abs(p_gamma - 1.0) > 0.02:
+                # Standard simple gamma correction: V_out = V_in ** (1/gamma)
+                arr = 255.0 * np.power((arr / 255.0).clip(0, 1), 1.0 / p_gamma)
+            
+            np.clip(arr, 0, 255, out=arr)
+            img = Image.fromarray(arr.astype(np.uint8))
+    return img
+
+@contextlib.contextmanager
+def unbounded_pixels():
+    """Lifts Pillow's decompression-bomb guard; the compositor enforces its own RAM budget instead.
+
+    Reference counted, so overlapping renders on worker threads restore the limit only once
+    the last of them is done.
+    """
+    from PIL import Image
+    with _unbounded_lock:
+        if _unbounded_state["depth"] == 0:
+            _unbounded_state["limit"] = Image.MAX_IMAGE_PIXELS
+            Image.MAX_IMAGE_PIXELS = None
+        _unbounded_state["depth"] += 1
+    try:
+        yield
+    finally:
+        with _unbounded_lock:
+            _unbounded_state["depth"] -= 1
+            if _unbounded_state["depth"] == 0:
+                Image.MAX_IMAGE_PIXELS = _unbounded_state["limit"]
+
+_unbounded_lock = threading.Lock()
+_unbounded_state = {"depth": 0, "limit": None}
+
+def release_pages(array):
+    """Drops a memmap's resident pages so they stop counting against the process RSS."""
+    import mmap
+    mm = getattr(array, '_mmap', None)
+    if mm is not None and hasattr(mmap, 'MADV_DONTNEED'):
+        mm.flush()
+        mm.madvise(mmap.MADV_DONTNEED)
+
+class RawRowReader:
+    """Reads top-down RGB rows straight out of an uncompressed file (PPM, 24-bit BMP, raw TIFF)."""
+    kind = "raw"
+
+    def __init__(self, path, size, offset, rawmode, stride, orientation):
+        import numpy as np
+        w, h = size
+        stride = stride or w * 3
+        self.base = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(h, stride))
+        rows = self.base[:, :w * 3].reshape(h, w, 3)
+        if orientation < 0:
+            rows = rows[::-1] # Bottom-up BMP
+        if rawmode == 'BGR':
+            rows = rows[..., ::-1]
+        self.rows = rows
+        self.pos = 0
+
+    @classmethod
+    def open(cls, path):
+        """Returns a reader when the file's pixels can be mapped directly, else None."""
+        from PIL import Image
+        with unbounded_pixels(), Image.open(path) as img:
+            if img.mode != 'RGB' or len(img.tile) != 1:
+                return None
+            codec, extents, offset, args = img.tile[0]
+            if isinstance(args, str):
+                args = (args, 0, 1)
+            rawmode = args[0]
+            stride = args[1] if len(args) > 1 else 0
+            orientation = args[2] if len(args) > 2 else 1
+            if codec != 'raw' or rawmode not in ('RGB', 'BGR') or tuple(extents) != (0, 0) + img.size:
+                return None
+            return cls(path, img.size, offset, rawmode, stride, orientation)
+
+    def read(self, n):
+        import numpy as np
+        chunk = np.ascontiguousarray(self.rows[self.pos:self.pos + n])
+        self.pos += len(chunk)
+        release_pages(self.base)
+        return chunk
+
+    def close(self):
+        self.base = self.rows = None
+
+def ffmpeg_can_decode(size):
+    """Whether FFmpeg accepts a picture of this size (see FFMPEG_MAX_PICTURE)."""
+    w, h = size
+    return (w + 128) * (h + 128) < FFMPEG_MAX_PICTURE
+
+class FFmpegRowReader:
+    """Streams decoded RGB rows from FFmpeg's rawvideo output, so our process never holds the whole image.
+
+    If FFmpeg stops early (a source it refuses), its error is logged and the remaining rows
+    come from DecodedRowReader.
+    """
+    kind = "ffmpeg"
+
+    def __init__(self, path, size, budget, scratch_dir=None):
+        import tempfile
+        self.path = path
+        self.width, self.height = size
+        self.budget, self.scratch_dir = budget, scratch_dir
+        self.pos = 0
+        self.fallback = None
+        # A file rather than a pipe, so FFmpeg can't stall on a full stderr while we read stdout
+        self.errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            ['ffmpeg', '-v', 'error', '-noautorotate', '-i', path, '-frames:v', '1',
+             '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'],
+            stdout=subprocess.PIPE, stderr=self.errors,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        )
+
+    def read(self, n):
+        import numpy as np
+        if self.fallback is not None:
+            return self.fallback.read(n)
+        row_bytes = self.width * 3
+        data = self.process.stdout.read(n * row_bytes)
+        if len(data) < n * row_bytes:
+            self._fall_back()
+            return self.fallback.read(n)
+        self.pos += n
+        return np.frombuffer(data, dtype=np.uint8).reshape(n, self.width, 3)
+
+    def _fall_back(self):
+        self._stop()
+        self.errors.seek(0)
+        error = self.errors.read().decode(errors="replace").strip().splitlines()
+        print(f"FFmpeg stopped after {self.pos} of {self.height} rows "
+              f"({error[-1] if error else f'exit status {self.process.returncode}'}); decoding the rest with Pillow")
+        self.fallback = DecodedRowReader(self.path, self.budget, start=self.pos, scratch_dir=self.scratch_dir)
+        self.kind = "ffmpeg+pil"
+
+    def _stop(self):
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+    def close(self):
+        if self.fallback is not None:
+            self.fallback.close()
+        else:
+            self._stop()
+        self.errors.close()
+
+class DecodedRowReader:
+    """Last resort for sources FFmpeg can't decode: Pillow decodes the image into a memory-mapped
+    scratch file, and rows are read back from it band by band.
+
+    Decoders that take their data in pushed chunks (PNG, JPEG, BMP, strip TIFF) write straight
+    into the mapped file and its pages are dropped as it fills, so RSS stays flat whatever the
+    image size. Others (WebP, libtiff-compressed TIFF, unusual modes) decode in one piece in
+    RAM; that is refused with a MemoryError when it would exceed budget bytes.
+    """
+    kind = "pil"
+    FEED_BYTES = 65536 # Compressed bytes handed to the decoder between page drops
+    PUSH_CODECS = ('raw', 'zip', 'jpeg', 'packbits', 'bmp_rle') # Pillow tile codecs fed through decode()
+
+    def __init__(self, path, budget, start=0, scratch_dir=None):
+        import tempfile
+        import numpy as np
+        from PIL import Image
+        self.img = self.scratch = self.pixels = None
+        with unbounded_pixels():
+            img = Image.open(path)
+        try:
+            w, h = img.size
+            # Pillow keeps RGB as 4 bytes a pixel, which maps as RGBX
+            self.mode = {'RGB': 'RGBX'}.get(img.mode, img.mode)
+            self.palette = img.palette.getdata() if img.mode == 'P' and img.palette else None # (rawmode, bytes)
+            pixel_bytes = len(self.mode) if self.mode in ('RGBX', 'RGBA', 'CMYK') else 1
+            if self.mode in ('L', 'P', 'RGBX', 'RGBA', 'CMYK') and img.tile and all(t[0] in self.PUSH_CODECS for t in img.tile):
+                self.scratch = tempfile.TemporaryFile(dir=scratch_dir, suffix=".decode")
+                self.scratch.truncate(w * h * pixel_bytes)
+                self.pixels = np.memmap(self.scratch, dtype=np.uint8, mode='r+', shape=(h, w * pixel_bytes))
+                self._decode_mapped(img)
+            else:
+                need = w * h * 4
+                if need > budget:
+                    raise MemoryError(f"Decoding {os.path.basename(path)} ({w}x{h} {img.mode}) needs about "
+                                      f"{need / 1048576:.0f} MB, over the {budget / 1048576:.0f} MB RAM budget. "
+                                      "Raise the budget, or convert it to PNG or uncompressed TIFF/BMP.")
+                with unbounded_pixels():
+                    img.load()
+                self.img, img = img, None
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            if img is not None:
+                img.close()
+        self.width, self.height = w, h
+        self.pos = start
+
+    def _decode_mapped(self, img):
+        """Runs Pillow's decoders by hand (as ImageFile.load does) so written pages can be dropped between chunks."""
+        from PIL import Image
+        h, row_bytes = self.pixels.shape
+        target = Image.core.map_buffer(self.pixels, img.size, 'raw', 0, (self.mode, row_bytes, 1))
+        img.im = target # load_prepare() then keeps it; it also sets up PNG's load_read() and interlacing
+        img.load_prepare()
+        read = getattr(img, 'load_read', img.fp.read)
+        for codec, extents, offset, args in sorted(img.tile, key=lambda t: t[2]):
+            decoder = Image._getdecoder(self.mode, codec, args, img.decoderconfig)
+            try:
+                img.fp.seek(offset)
+                decoder.setimage(target, extents)
+                data = b""
+                while True:
+                    chunk = read(self.FEED_BYTES)
+                    if not chunk:
+                        raise OSError(f"{os.path.basename(img.filename)} is truncated")
+                    consumed, error = decoder.decode(data + chunk)
+                    release_pages(self.pixels)
+                    if consumed < 0:
+                        break
+                    data = (data + chunk)[consumed:]
+                if error < 0:
+                    raise OSError(f"Pillow could not decode {os.path.basename(img.filename)} (decoder error {error})")
+            finally:
+                decoder.cleanup()
+
+    def read(self, n):
+        import numpy as np
+        from PIL import Image
+        y1 = min(self.height, self.pos + n)
+        if self.pixels is None:
+            with unbounded_pixels():
+                band = self.img.crop((0, self.pos, self.width, y1))
+            rows = np.asarray(band if band.mode == 'RGB' else band.convert('RGB'))
+        elif self.mode == 'RGBX':
+            rows = np.array(self.pixels[self.pos:y1].reshape(-1, self.width, 4)[..., :3])
+        else:
+            band = Image.frombuffer(self.mode, (self.width, y1 - self.pos), self.pixels[self.pos:y1].tobytes(), 'raw', self.mode, 0, 1)
+            if self.mode == 'P':
+                band.putpalette(self.palette[1], self.palette[0])
+            rows = np.asarray(band.convert('RGB'))
+        if self.pixels is not None:
+            release_pages(self.pixels)
+        self.pos = y1
+        return rows
+
+    def close(self):
+        if self.img is not None:
+            self.img.close()
+            self.img = None
+        self.pixels = None
+        if self.scratch is not None:
+            self.scratch.close()
+            self.scratch = None
+
+def open_row_reader(path, size, budget, scratch_dir=None):
+    """Picks the cheapest sequential row source for an image: mapped raw pixels, FFmpeg or Pillow.
+
+    Sources past FFmpeg's picture size limit go straight to Pillow. budget (bytes) and
+    scratch_dir are passed on to DecodedRowReader.
+    """
+    import shutil
+    try:
+        reader = RawRowReader.open(path)
+        if reader is not None:
+            return reader
+    except Exception as e:
+        print(f"Raw row reader unavailable: {e}")
+    if shutil.which('ffmpeg') and ffmpeg_can_decode(size):
+        return FFmpegRowReader(path, size, budget, scratch_dir)
+    return DecodedRowReader(path, budget, scratch_dir=scratch_dir)
+
+def adler32_combine(adler1, adler2, len2):
+    """Adler-32 of A+B from adler32(A), adler32(B) and len(B) (port of zlib's adler32_combine)."""
+    BASE = 65521
+    rem = len2 % BASE
+    sum1 = adler1 & 0xffff
+    sum2 = (rem * sum1) % BASE
+    sum1 += (adler2 & 0xffff) + BASE - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + BASE - rem
+    if sum1 >= BASE: sum1 -= BASE
+    if sum1 >= BASE: sum1 -= BASE
+    if sum2 >= (BASE << 1): sum2 -= (BASE << 1)
+    if sum2 >= BASE: sum2 -= BASE
+    return sum1 | (sum2 << 16)
+
+def write_png(path, pixels, compress_level=6, band_rows=128, workers=None):
+    """Writes an (H, W, 3) uint8 array-like (array or memmap) as PNG, deflating row bands in parallel.
+
+    Each band is filtered and raw-deflated on its own worker thread (zlib releases the GIL)
+    and ended with Z_FULL_FLUSH, which byte-aligns it and resets the window, so the bands
+    concatenate into one valid deflate stream. The zlib header and the Adler-32 of the
+    whole stream are stitched around them. Only a few bands are in flight at a time, so
+    memory stays bounded for memory-mapped canvases.
+    """
+    import zlib
+    import struct
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+    h, w = pixels.shape[:2]
+    # The calling thread's affinity, so a governed compositor encodes on its own cores only
+    workers = workers or (len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+    
+    def chunk(f, tag, data):
+        f.write(struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff))
+        
+    def encode_band(y):
+        rows = np.asarray(pixels[y:y + band_rows]).reshape(-1, w * 3)
+        # PNG "Sub" filter: each byte minus the byte one pixel to the left (wrapping uint8 math)
+        filtered = np.empty((len(rows), w * 3 + 1), dtype=np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:4] = rows[:, :3]
+        np.subtract(rows[:, 3:], rows[:, :-3], out=filtered[:, 4:])
+        raw = filtered.data
+        compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+        last = y + band_rows >= h
+        data = compressor.compress(raw) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_FULL_FLUSH)
+        return data, zlib.adler32(raw), raw.nbytes # len() of the 2-D view would count rows
+    
+    # zlib stream header: CMF 0x78 (deflate, 32K window) + FLG carrying the level hint
+    level_flag = 0 if compress_level < 2 else 1 if compress_level < 6 else 2 if compress_level == 6 else 3
+    cmf_flg = 0x7800 | (level_flag << 6)
+    cmf_flg += 31 - cmf_flg % 31
+    
+    adler = 1
+    # Pool threads carry the caller's name, so a RenderGovernor of the caller governs them too
+    with open(path, 'wb') as f, ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{threading.current_thread().name}-png") as pool:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        chunk(f, b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+        chunk(f, b"IDAT", struct.pack(">H", cmf_flg))
+        pending = collections.deque()
+        for y in range(0, h, band_rows):
+            pending.append(pool.submit(encode_band, y))
+            if len(pending) >= workers * 2:
+                data, band_adler, length = pending.popleft().result()
+                adler = adler32_combine(adler, band_adler, length)
+                chunk(f, b"IDAT", data)
+                release_pages(pixels)
+        while pending:
+            data, band_adler, length = pending.popleft().result()
+            adler = adler32_combine(adler, band_adler, length)
+            chunk(f, b"IDAT", data)
+        chunk(f, b"IDAT", struct.pack(">I", adler))
+        chunk(f, b"IEND", b"")
+
+def encode_profile_for(output_path, profile=None):
+    """Returns (name, settings) of the encode profile to use for output_path's extension."""
+    ext = os.path.splitext(output_path)[1].lower()
+    ext = {'.jpeg': '.jpg', '.tif': '.tiff'}.get(ext, ext)
+    for name in (profile, DEFAULT_ENCODE_PROFILE):
+        if name in ENCODE_PROFILES and ENCODE_PROFILES[name]["ext"] == ext:
+            return name, ENCODE_PROFILES[name]
+    for name, settings in ENCODE_PROFILES.items():
+        if settings["ext"] == ext:
+            return name, settings
+    return "Default", {"ext": ext}
+
+def save_composite(pixels, output_path, profile=None):
+    """Encodes an (H, W, 3) uint8 array (or memmap) to output_path using an encode profile.
+
+    PNG profiles go through the parallel band writer; everything else is handed to Pillow
+    as a zero-copy view. Returns the profile name, encode time and file size.
+    """
+    from PIL import Image
+    started = time.perf_counter()
+    name, settings = encode_profile_for(output_path, profile)
+    options = {k: v for k, v in settings.items() if k != "ext"}
+    if settings["ext"] == ".png":
+        write_png(output_path, pixels, compress_level=options.get("compress_level", 6))
+    else:
+        h, w = pixels.shape[:2]
+        Image.frombuffer('RGB', (w, h), pixels, 'raw', 'RGB', 0, 1).save(output_path, **options)
+    return {"profile": name, "encode_s": round(time.perf_counter() - started, 3), "bytes": os.path.getsize(output_path)}
+
+def composite_image(input_path, output_path, monitors, ram_budget_mb=DEFAULT_RAM_BUDGET_MB, progress=None, profile=None, trace=None):
+    """Composites a still image across the monitor layout and writes it to output_path.
+
+    Sources whose decode fits inside ram_budget_mb take the in-memory path. Bigger ones
+    (gigapixel panoramas) are read as horizontal bands and composited into a memory-mapped
+    canvas on disk, so peak RSS stays near the budget whatever the image size.
+    profile names an ENCODE_PROFILES entry (ignored if it doesn't match the output extension).
+    progress, if given, is called with a 0..1 fraction. Stages are timed as composite.* spans
+    on trace (a RenderTrace, or a private one). Returns a dict of render stats.
+    """
+    from PIL import Image
+    started = time.perf_counter()
+    trace = trace if trace is not None else RenderTrace("composite")
+    plan = get_layout_plan(monitors)
+    with trace.span("composite.probe"), unbounded_pixels(), Image.open(input_path) as probe:
+        src_size = probe.size
+        if probe.format == 'JPEG':
+            # Size a reduced DCT decode would produce (draft only rewrites the header here)
+            probe.draft(None, (plan.map_w * RENDER_REDUCING_GAP, plan.map_h * RENDER_REDUCING_GAP))
+        dec_w, dec_h = probe.size
+    
+    max_res = max(mp.res[0] * mp.res[1] for mp in plan.monitors)
+    estimate = dec_w * dec_h * 7 + plan.map_w * plan.map_h * 3 + plan.out_w * plan.out_h * 3 + max_res * 24
+    budget = ram_budget_mb * 1024 * 1024
+    
+    if estimate <= budget:
+        stats = _composite_in_memory(input_path, output_path, monitors, plan, profile, trace)
+    else:
+        stats = _composite_out_of_core(input_path, output_path, monitors, plan, src_size, budget, progress, profile, trace)
+    stats["stages"] = trace.stage_seconds("composite")
+    stats.update(source=src_size, output=(plan.out_w, plan.out_h), estimate_mb=round(estimate / 1048576, 1),
+                 seconds=round(time.perf_counter() - started, 3))
+    return stats
+
+def paste_into(canvas, seg, pos):
+    """Copies an (h, w, 3) array into canvas at pos, clipped to the canvas like Image.paste."""
+    x, y = pos
+    h, w = seg.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(canvas.shape[1], x + w), min(canvas.shape[0], y + h)
+    if x1 > x0 and y1 > y0:
+        canvas[y0:y1, x0:x1] = seg[y0 - y:y1 - y, x0 - x:x1 - x]
+
+def _composite_in_memory(input_path, output_path, monitors, plan, profile, trace):
+    from PIL import Image
+    import numpy as np
+    # Everything is resampled to the physical map first, so that is all the detail we need
+    with trace.span("composite.decode"):
+        img, decode = open_image_reduced(input_path, (plan.map_w, plan.map_h), reducing_gap=RENDER_REDUCING_GAP)
+    
+    with trace.span("composite.map_resize"):
+        mapped_img = img.resize((plan.map_w, plan.map_h), Image.Resampling.LANCZOS)
+        # A plain array canvas lets the encoders read it without another full-size copy
+        master_canvas = np.zeros((plan.out_h, plan.out_w, 3), dtype=np.uint8)
+    
+    for idx, (mon, mp) in enumerate(zip(monitors, plan.monitors)):
+        with trace.span("composite.monitor_resize", monitor=idx):
+            crop_x, crop_y, crop_w, crop_h = mp.crop
+            seg = mapped_img.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
+            seg_native = seg.resize(mp.res, Image.Resampling.LANCZOS)
+        seg_native = apply_color_calibration(seg_native, mon, trace)
+        with trace.span("composite.paste", monitor=idx):
+            paste_into(master_canvas, np.asarray(seg_native), mp.paste)
+    
+    with trace.span("composite.encode"):
+        encode = save_composite(master_canvas, output_path, profile)
+    return {"mode": "in-memory", "reader": "pil", "bands": len(monitors), "decode": decode, "encode": encode}
+
+def _composite_out_of_core(input_path, output_path, monitors, plan, src_size, budget, progress, profile, trace):
+    import tempfile
+    import numpy as np
+    from PIL import Image
+    
+    src_w, src_h = src_size
+    sx, sy = src_w / plan.map_w, src_h / plan.map_h
+    
+    # Each monitor samples its crop box straight from the source in one resample
+    # (resize with box=), split into output bands whose source rows fit the budget.
+    jobs = []
+    for idx, mp in enumerate(plan.monitors):
+        crop_x, crop_y, crop_w, crop_h = mp.crop
+        res_w, res_h = mp.res
+        bx0, bx1 = crop_x * sx, (crop_x + crop_w) * sx
+        by0 = crop_y * sy
+        fx, fy = (bx1 - bx0) / res_w, crop_h * sy / res_h
+        # LANCZOS reaches 3 source pixels (times the downscale factor) past each edge
+        mx, my = math.ceil(3 * max(fx, 1.0)) + 1, math.ceil(3 * max(fy, 1.0)) + 1
+        xa, xb = max(0, int(bx0) - mx), min(src_w, math.ceil(bx1) + mx)
+        
+        row_cost = fy * src_w * 3 * 2 + res_w * 3 * 12
+        band = int((budget / 2 - 2 * my * src_w * 3 * 2) // row_cost)
+        band = max(16, min(res_h, band))
+        for r0 in range(0, res_h, band):
+            r1 = min(res_h, r0 + band)
+            ya = max(0, int(by0 + r0 * fy) - my)
+            yb = min(src_h, math.ceil(by0 + r1 * fy) + my)
+            # Clamp against float drift at the image edges (Pillow rejects boxes outside the image)
+            box = (max(0.0, bx0 - xa), max(0.0, by0 + r0 * fy - ya), min(xb - xa, bx1 - xa), min(yb - ya, by0 + r1 * fy - ya))
+            jobs.append((ya, yb, idx, r0, r1, xa, xb, box))
+    jobs.sort(key=lambda j: (j[0], j[1]))
+    
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    reader = open_row_reader(input_path, src_size, budget, out_dir)
+    with tempfile.TemporaryFile(dir=out_dir, suffix=".canvas") as canvas_file:
+        canvas = np.memmap(canvas_file, dtype=np.uint8, mode='w+', shape=(plan.out_h, plan.out_w, 3))
+        try:
+            # Sliding window of source rows: jobs are sorted by their first row, so rows
+            # above the current job are never needed again and the source is read once.
+            window = np.empty((0, src_w, 3), dtype=np.uint8)
+            win_y0 = 0
+            peak_window = 0
+            for n, (ya, yb, idx, r0, r1, xa, xb, box) in enumerate(jobs):
+                with trace.span("composite.read"):
+                    win_y1 = win_y0 + len(window)
+                    if ya > win_y0:
+                        window = window[min(ya, win_y1) - win_y0:]
+                        win_y0 = min(ya, win_y1)
+                    if yb > win_y1:
+                        if ya > win_y1:
+                            for skip in range(win_y1, ya, 256):
+                                reader.read(min(256, ya - skip)) # Rows no monitor looks at
+                            win_y0 = win_y1 = ya
+                        window = np.concatenate([window, reader.read(yb - win_y1)])
+                    peak_window = max(peak_window, window.nbytes)
+                
+                mp = plan.monitors[idx]
+                with trace.span("composite.resample", monitor=idx, rows=r1 - r0):
+                    band_src = Image.fromarray(np.ascontiguousarray(window[ya - win_y0:yb - win_y0, xa:xb]))
+                    seg = band_src.resize((mp.res[0], r1 - r0), Image.Resampling.LANCZOS, box=box)
+                seg = np.asarray(apply_color_calibration(seg, monitors[idx], trace))
+                
+                with trace.span("composite.paste", monitor=idx):
+                    paste_into(canvas, seg, (mp.paste[0], mp.paste[1] + r0))
+                    release_pages(canvas)
+                if progress:
+                    progress(0.9 * (n + 1) / len(jobs))
+            window = None
+            
+            # The encoders read the mapped canvas band by band (or as a zero-copy view)
+            with trace.span("composite.encode"):
+                encode = save_composite(canvas, output_path, profile)
+            if progress:
+                progress(1.0)
+        finally:
+            reader.close()
+            del canvas
+    return {"mode": "out-of-core", "reader": reader.kind, "bands": len(jobs), "peak_window_mb": round(peak_window / 1048576, 1), "encode": encode}
+
+class StartupProfiler:
+    """Timed breakdown of application startup, enabled with --profile-startup.
+
+    Stages are (name, offset from process start, duration) in seconds. When disabled the
+    stage() context manager still runs its body but records nothing.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = []
+        self.interactive_at = None
+        self.on_finished = [] # Called once the first frame and deferred assets are done
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name, start, end):
+        if self.enabled:
+            self.stages.append((name, start - _MODULE_T0, end - start))
+
+    def mark_interactive(self):
+        self.interactive_at = time.perf_counter() - _MODULE_T0
+
+    def report(self):
+        lines = ["Startup profile:", f"  {'stage':<28}{'start ms':>10}{'took ms':>10}"]
+        for name, offset, took in self.stages:
+            lines.append(f"  {name:<28}{offset * 1000:>10.1f}{took * 1000:>10.1f}")
+        if self.interactive_at is not None:
+            lines.append(f"  {'time to interactive':<28}{self.interactive_at * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "stages": [{"name": n, "start_ms": round(o * 1000, 2), "took_ms": round(t * 1000, 2)} for n, o, t in self.stages],
+            "time_to_interactive_ms": None if self.interactive_at is None else round(self.interactive_at * 1000, 2)
+        }
+
+class AnimationScheduler:
+    """Single owner of every cosmetic animation timer (button glow, logo/title shimmer).
+
+    Animations are paused while the main window is unmapped (minimized), the app does not
+    have keyboard focus, a render job is running, or animations are switched off. A paused
+    animation simply stops re-arming its timer; its on_pause hook restores the resting
+    visuals and its resume hook restarts it once the app is visible and idle again.
+    """
+    def __init__(self, root, enabled=True):
+        self.root = root
+        self.enabled = enabled
+        self.mapped = True
+        self.focused = True
+        self.render_active = False
+        self.animations = {} # name -> {'resume', 'on_pause', 'after_id'}
+        self.wakeups = collections.deque() # perf_counter() of every animation timer that fired
+        self.started_at = time.perf_counter()
+        self._paused = self.is_paused()
+        
+        root.bind("<Map>", self._on_map_change, add="+")
+        root.bind("<Unmap>", self._on_map_change, add="+")
+        root.bind("<FocusIn>", self._on_focus_change, add="+")
+        root.bind("<FocusOut>", self._on_focus_change, add="+")
+
+    def register(self, name, resume, on_pause=None):
+        self.animations[name] = {'resume': resume, 'on_pause': on_pause, 'after_id': None}
+
+    def after(self, name, delay_ms, callback):
+        """Arms the next step of an animation; a no-op while animations are paused."""
+        anim = self.animations[name]
+        if anim['after_id'] is not None:
+            self.root.after_cancel(anim['after_id'])
+            anim['after_id'] = None
+        if self._paused:
+            return
+        def fire():
+            anim['after_id'] = None
+            self.wakeups.append(time.perf_counter())
+            callback()
+        anim['after_id'] = self.root.after(delay_ms, fire)
+
+    def is_paused(self):
+        return not (self.enabled and self.mapped and self.focused) or self.render_active
+
+    def pause_reason(self):
+        if not self.enabled: return "disabled"
+        if self.render_active: return "rendering"
+        if not self.mapped: return "minimized"
+        if not self.focused: return "unfocused"
+        return None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._update_state()
+
+    def set_render_active(self, active):
+        self.render_active = active
+        self._update_state()
+
+    def wakeups_per_second(self, window_s=10.0):
+        now = time.perf_counter()
+        while self.wakeups and now - self.wakeups[0] > window_s:
+            self.wakeups.popleft()
+        return len(self.wakeups) / max(0.001, min(window_s, now - self.started_at))
+
+    def _on_map_change(self, event):
+        if event.widget is self.root:
+            self.mapped = event.type == tk.EventType.Map
+            self._update_state()
+
+    def _on_focus_change(self, event):
+        # Focus moving between our own widgets/toplevels also fires these; check where it ended up
+        self.root.after_idle(self._check_focus)
+
+    def _check_focus(self):
+        try:
+            self.focused = self.root.focus_get() is not None
+        except KeyError: # focus_get() fails on some popup widgets, which are ours
+            self.focused = True
+        self._update_state()
+
+    def _update_state(self):
+        paused = self.is_paused()
+        if paused == self._paused:
+            return
+        self._paused = paused
+        for anim in self.animations.values():
+            if paused:
+                if anim['after_id'] is not None:
+                    self.root.after_cancel(anim['after_id'])
+                    anim['after_id'] = None
+                if anim['on_pause']:
+                    anim['on_pause']()
+            else:
+                anim['resume']()
+
+class StallWatchdog:
+    """Detects Tk event-loop stalls, enabled with --watch-stalls.
+
+    A heartbeat re-arms itself with root.after(); a beat that fires late means the main loop
+    was busy for that long. While a beat is overdue past the threshold, a helper thread samples
+    the Tk thread's stack, so each stall names the handler that was actually running (and where
+    it spent its time) rather than whatever ran after it. Must be created on the Tk thread.
+    """
+    def __init__(self, root, threshold_ms=STALL_THRESHOLD_MS, heartbeat_ms=STALL_HEARTBEAT_MS, on_stall=None):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+        self.on_stall = on_stall
+        self.tk_ident = threading.get_ident()
+        self.app_file = os.path.abspath(__file__)
+        self.lock = threading.Lock()
+        self.expected = None # perf_counter() the next beat is due
+        self.samples = [] # Stacks sampled during the current stall
+        self.stopped = threading.Event()
+        self.after_id = None
+        self.started = None
+        self.beats = 0
+        self.stall_count = 0
+        self.stalled_s = 0.0
+        self.worst = [] # The STALL_WORST_KEPT longest stalls
+        self.by_handler = {} # handler -> [stalls, total s, max s]
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.expected = self.started + self.heartbeat_ms / 1000
+        self.after_id = self.root.after(self.heartbeat_ms, self._beat)
+        threading.Thread(target=self._watch, name="stall-watchdog", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except tk.TclError:
+                pass # Root already destroyed
+            self.after_id = None
+
+    def _beat(self):
+        now = time.perf_counter()
+        with self.lock:
+            late = now - self.expected
+            samples, self.samples = self.samples, []
+            self.expected = now + self.heartbeat_ms / 1000
+        self.beats += 1
+        if late >= self.threshold:
+            self._record(now, late, samples)
+        if not self.stopped.is_set():
+            self.after_id = self.root.after(self.heartbeat_ms, self._beat)
+
+    def _watch(self):
+        while not self.stopped.wait(self.threshold / 2):
+            with self.lock:
+                expected = self.expected
+                full = len(self.samples) >= STALL_MAX_SAMPLES
+            if full or time.perf_counter() - expected < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.tk_ident)
+            if frame is None:
+                continue
+            stack = traceback.StackSummary.extract(traceback.walk_stack(frame), lookup_lines=False)
+            stack.reverse() # Outermost first
+            with self.lock:
+                if self.expected == expected: # Still the same stall
+                    self.samples.append(stack)
+
+    def describe(self, stack):
+        """(handler, hot spot) of a sampled stack: the app callback Tk dispatched, and where it was."""
+        handler = None
+        for outer, frame in zip(stack, stack[1:]):
+            if frame.filename == self.app_file and outer.filename != self.app_file:
+                handler = frame # First app frame called back from tkinter
+                break
+        handler = handler or stack[-1]
+        inner = stack[-1]
+        app_frames = [f for f in stack if f.filename == self.app_file]
+        parts = [f"{app_frames[-1].name}:{app_frames[-1].lineno}"] if app_frames else []
+        if inner.filename != self.app_file:
+            parts.append(f"{os.path.basename(inner.filename)}:{inner.lineno} {inner.name}") # Inside a library
+        return handler.name, " -> ".join(parts)
+
+    def _record(self, now, late, samples):
+        if samples:
+            # The hot spot seen most often during the stall, and the handler of that sample
+            described = [self.describe(stack) for stack in samples]
+            handler, where = collections.Counter(described).most_common(1)[0][0]
+            last = samples[-1]
+            stack = [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in last if f.filename == self.app_file or f is last[-1]]
+        else:
+            handler, where, stack = "(not sampled)", "", []
+        stall = {"at_s": round(now - _MODULE_T0, 2), "ms": round(late * 1000, 1), "handler": handler,
+                 "where": where, "samples": len(samples), "stack": stack}
+        self.stall_count += 1
+        self.stalled_s += late
+        entry = self.by_handler.setdefault(handler, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += late
+        entry[2] = max(entry[2], late)
+        self.worst.append(stall)
+        self.worst.sort(key=lambda s: -s["ms"])
+        del self.worst[STALL_WORST_KEPT:]
+        if self.on_stall:
+            self.on_stall(stall)
+
+    def report(self):
+        elapsed = time.perf_counter() - (self.started or time.perf_counter())
+        lines = [f"UI stalls over {self.threshold * 1000:.0f} ms: {self.stall_count} in {elapsed:.0f}s, "
+                 f"{self.stalled_s * 1000:.0f} ms blocked in total"]
+        if self.by_handler:
+            lines.append(f"  {'handler':<32}{'stalls':>7}{'total ms':>10}{'max ms':>9}")
+            for handler, (count, total, peak) in sorted(self.by_handler.items(), key=lambda kv: -kv[1][1]):
+                lines.append(f"  {handler:<32}{count:>7}{total * 1000:>10.0f}{peak * 1000:>9.0f}")
+            lines.append("  Worst stalls:")
+            for stall in self.worst:
+                lines.append(f"  {stall['ms']:>8.0f} ms at {stall['at_s']:>7.2f}s  {stall['handler']}  {stall['where']}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"threshold_ms": self.threshold * 1000, "beats": self.beats, "stalls": self.stall_count,
+                "stalled_ms": round(self.stalled_s * 1000, 1), "worst": self.worst,
+                "by_handler": {h: {"stalls": c, "total_ms": round(t * 1000, 1), "max_ms": round(m * 1000, 1)}
+                               for h, (c, t, m) in self.by_handler.items()}}
+
+def format_stall(stall):
+    """One-line log entry for a stall recorded by StallWatchdog."""
+    where = f" at {stall['where']}" if stall["where"] else ""
+    return f"[UI Stall] {stall['ms']:.0f} ms in {stall['handler']}{where}"
+
+class RenderGovernor:
+    """Keeps a render's processes and threads off the desktop's way ("background") or lets them use the whole machine ("turbo").
+
+    At launch the FFmpeg encoder and filter threads are sized to the policy's cores. While the
+    render runs, apply() sets niceness, I/O priority and CPU affinity on every thread of the
+    governed processes and thread groups, so set_policy() takes effect mid-render. Threads
+    started later inherit the settings from the thread that creates them. These levers need
+    Linux; elsewhere only the thread counts apply, plus a lower priority class at launch on
+    Windows. An unprivileged process may lower but not raise niceness, so going back to turbo
+    keeps the background niceness unless the app has CAP_SYS_NICE; notes records such cases.
+    """
+    IOPRIO_SET = {"x86_64": 251, "amd64": 251, "aarch64": 30, "arm64": 30, "i386": 289, "i686": 289} # syscall numbers
+
+    def __init__(self, policy="background", core_budget=None):
+        if policy not in RENDER_POLICIES:
+            raise ValueError(f"Unknown render policy: {policy}")
+        self.policy = policy
+        if hasattr(os, "sched_getaffinity"):
+            self.all_cores = sorted(os.sched_getaffinity(0))
+        else:
+            self.all_cores = list(range(os.cpu_count() or 1))
+        budget = core_budget or len(self.all_cores) - RENDER_RESERVED_CORES
+        self.core_budget = max(1, min(len(self.all_cores), budget))
+        self.processes = set()
+        self.thread_groups = set()
+        self.notes = []
+        self.lock = threading.Lock()
+        self.libc = None
+
+    def cores(self, policy=None):
+        """Cores the policy may use: background keeps the budget on the highest-numbered cores."""
+        if RENDER_POLICIES[policy or self.policy]["budgeted"]:
+            return self.all_cores[-self.core_budget:]
+        return list(self.all_cores)
+
+    def thread_count(self):
+        return len(self.cores())
+
+    def ffmpeg_args(self):
+        """(global args, output args) sizing FFmpeg's filter and encoder threads to the policy."""
+        n = str(self.thread_count())
+        return ['-filter_threads', n, '-filter_complex_threads', n], ['-threads', n]
+
+    def creationflags(self):
+        if os.name != 'nt':
+            return 0
+        flags = subprocess.CREATE_NO_WINDOW
+        if RENDER_POLICIES[self.policy]["nice"] > 0:
+            flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        return flags
+
+    def govern_process(self, pid):
+        with self.lock:
+            self.processes.add(pid)
+        self.apply()
+
+    def govern_threads(self, name):
+        """Governs the named threads of this process, plus the "<name>-..." pools they start."""
+        with self.lock:
+            self.thread_groups.add(name)
+        self.apply()
+
+    def release(self):
+        with self.lock:
+            self.processes.clear()
+            self.thread_groups.clear()
+
+    def set_policy(self, policy):
+        """Switches policy and re-applies it to the governed threads. Returns the new notes."""
+        if policy not in RENDER_POLICIES:
+            raise ValueError(f"Unknown render policy: {policy}")
+        self.policy = policy
+        return self.apply()
+
+    def describe(self):
+        cores = self.cores()
+        span = f"core {cores[0]}" if len(cores) == 1 else f"{len(cores)} cores ({cores[0]}-{cores[-1]})"
+        threads = self.thread_count()
+        return f"{self.policy}: {span}, nice {RENDER_POLICIES[self.policy]['nice']}, {threads} thread{'s' if threads != 1 else ''}"
+
+    def _threads(self):
+        """Native thread ids of everything governed (the tasks of each process, the named local threads)."""
+        tids = []
+        for pid in self.processes:
+            try:
+                tids.extend(int(t) for t in os.listdir(f"/proc/{pid}/task"))
+            except OSError:
+                pass # Exited, or no /proc
+        for thread in threading.enumerate():
+            if thread.native_id and any(thread.name == n or thread.name.startswith(n + "-") for n in self.thread_groups):
+                tids.append(thread.native_id)
+        return tids
+
+    def apply(self):
+        """Applies the current policy to every governed thread. Returns the new notes."""
+        if not sys.platform.startswith("linux"):
+            return []
+        settings = RENDER_POLICIES[self.policy]
+        cores = self.cores()
+        notes = set()
+        with self.lock:
+            for tid in self._threads():
+                try:
+                    # On Linux niceness, affinity and I/O priority are per thread
+                    current = os.getpriority(os.PRIO_PROCESS, tid)
+                    if current != settings["nice"]:
+                        os.setpriority(os.PRIO_PROCESS, tid, settings["nice"])
+                except PermissionError:
+                    notes.add(f"Niceness stays at {current}: raising it needs CAP_SYS_NICE")
+                except OSError:
+                    continue # Thread ended meanwhile
+                with contextlib.suppress(OSError):
+                    os.sched_setaffinity(tid, cores)
+                if not self._set_io_priority(tid, settings["io_level"]):
+                    notes.add("I/O priority unchanged (ioprio_set unavailable)")
+            new = sorted(notes - set(self.notes))
+            self.notes.extend(new)
+        return new
+
+    def _set_io_priority(self, tid, level):
+        import ctypes
+        import platform
+        number = self.IOPRIO_SET.get(platform.machine().lower())
+        if number is None:
+            return False
+        if self.libc is None:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+        # IOPRIO_WHO_PROCESS (1) on a thread id; best-effort class (2) at the given level
+        return self.libc.syscall(number, 1, tid, (2 << 13) | level) == 0
+
+class UILatencyProbe:
+    """Measures how late the Tk loop runs during a render, per governor policy.
+
+    A heartbeat re-arms itself with root.after(); how late each beat fires is the delay a
+    click or a preview redraw would have seen at that moment. Beats are filed under the
+    current label, so switching policies mid-render compares them on the same render.
+    """
+    def __init__(self, root, label, interval_ms=STALL_HEARTBEAT_MS):
+        self.root = root
+        self.label = label
+        self.interval_ms = interval_ms
+        self.lateness = collections.defaultdict(list) # label -> [s late]
+        self.expected = None
+        self.after_id = None
+
+    def start(self):
+        self.expected = time.perf_counter() + self.interval_ms / 1000
+        self.after_id = self.root.after(self.interval_ms, self._beat)
+        return self
+
+    def set_label(self, label):
+        self.label = label
+
+    def _beat(self):
+        now = time.perf_counter()
+        self.lateness[self.label].append(max(0.0, now - self.expected))
+        self.expected = now + self.interval_ms / 1000
+        self.after_id = self.root.after(self.interval_ms, self._beat)
+
+    def stop(self):
+        """Stops the heartbeat and returns summary()."""
+        if self.after_id is not None:
+            with contextlib.suppress(tk.TclError):
+                self.root.after_cancel(self.after_id)
+            self.after_id = None
+        return self.summary()
+
+    def summary(self):
+        """Mean, 95th percentile and worst lateness (ms) per label."""
+        out = {}
+        for label, late in self.lateness.items():
+            ordered = sorted(late)
+            out[label] = {"beats": len(late), "mean_ms": round(sum(late) / len(late) * 1000, 1),
+                          "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1),
+                          "max_ms": round(ordered[-1] * 1000, 1)}
+        return out
+
+def format_ui_latency(summary):
+    """Engine Log line for a UILatencyProbe summary."""
+    return "UI latency during render: " + "; ".join(
+        f"{label} mean {s['mean_ms']:.1f} ms, p95 {s['p95_ms']:.1f} ms, max {s['max_ms']:.0f} ms ({s['beats']} beats)"
+        for label, s in summary.items())
+
+class InotifyWatcher:
+    """Reports files closed after writing or moved into the watched folders (Linux inotify via ctypes).
+
+    Only completed writes are reported (IN_CLOSE_WRITE / IN_MOVED_TO), so a file still being
+    copied onto the share is never picked up half-written. Raises OSError where inotify is
+    unavailable; the daemon then falls back to PollingWatcher.
+    """
+    IN_CLOSE_WRITE = 0x08
+    IN_MOVED_TO = 0x80
+    IN_Q_OVERFLOW = 0x4000
+
+    def __init__(self, folders):
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = {}
+        for folder in folders:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(err, f"inotify_add_watch failed for {folder}")
+            self.folders[wd] = folder
+
+    def poll(self, timeout):
+        """Paths that finished changing, waiting up to timeout seconds for the first one."""
+        import select
+        import struct
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + 16 <= len(data):
+            wd, mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+            offset += 16 + length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were lost: report everything and let the manifest sort it out
+                return [os.path.join(d, f) for d in self.folders.values() for f in os.listdir(d)]
+            if wd in self.folders and name:
+                paths.append(os.path.join(self.folders[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Polling fallback for InotifyWatcher: a file is reported once its size and mtime held still for one interval."""
+    def __init__(self, folders):
+        self.folders = list(folders)
+        self.seen = {path: sig for path, sig in self._scan()} # Existing files are the daemon's initial scan
+        self.settling = set()
+
+    def _scan(self):
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    yield entry.path, (st.st_size, st.st_mtime_ns)
+
+    def poll(self, timeout):
+        time.sleep(timeout)
+        ready = []
+        for path, sig in self._scan():
+            if self.seen.get(path) != sig:
+                self.seen[path] = sig
+                self.settling.add(path) # Changed since the last scan; wait until it holds still
+            elif path in self.settling:
+                self.settling.discard(path)
+                ready.append(path)
+        return ready
+
+    def close(self):
+        pass
+
+def render_media(input_path, output_path, monitors, profile=None, ram_budget_mb=DEFAULT_RAM_BUDGET_MB,
+                 include_audio=True, progress=None, cancelled=None, on_log=None, on_spawn=None, governor=None,
+                 decimate=False):
+    """Renders one still or video through the layout without the GUI (watch daemon, render workers).
+
+    The output is written next to its final name and swapped in when complete, so a half-written
+    file never looks done. The partial file's name is unique to this call, so concurrent renders
+    of one output (a re-leased server job, a re-triggered watch job) never share it. progress gets the finished fraction (0..1); cancelled() is polled while
+    rendering and aborts the render with InterruptedError. on_log gets FFmpeg's output lines and
+    on_spawn its process. A RenderGovernor, if given, governs the FFmpeg child or the calling
+    thread for stills. decimate enables the frame-decimation pre-stage of prepare_video_render.
+    Returns a small stats dict.
+    """
+    profile = profile or DEFAULT_ENCODE_PROFILE
+    is_img = input_path.lower().endswith(IMAGE_EXTS)
+    if is_img and not output_path.lower().endswith(IMAGE_EXTS):
+        output_path += ENCODE_PROFILES[profile]["ext"]
+    root, ext = os.path.splitext(output_path)
+    partial = os.path.join(os.path.dirname(root), f".{os.path.basename(root)}.{os.urandom(4).hex()}.partial{ext}")
+    started = time.perf_counter()
+    info = None
+    try:
+        if is_img:
+            def on_progress(fraction):
+                if cancelled and cancelled():
+                    raise InterruptedError("Render cancelled")
+                if progress:
+                    progress(fraction)
+            if governor:
+                governor.govern_threads(threading.current_thread().name)
+            stats = composite_image(input_path, partial, monitors, ram_budget_mb=ram_budget_mb, progress=on_progress, profile=profile)
+            result = {"kind": "image", "mode": stats["mode"], "output_size": list(stats["output"])}
+        else:
+            duration, rate = probe_video(input_path)
+            cmd, info = prepare_video_render(input_path, partial, monitors, include_audio=include_audio, rate=rate,
+                                             decimate=decimate, governor=governor)
+            if decimate and info is None and on_log:
+                on_log("Frame analysis failed; rendering every frame.\n")
+            duration = duration or (info["duration"] if info else 0)
+            creationflags = governor.creationflags() if governor else subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True,
+                                       creationflags=creationflags)
+            if governor:
+                governor.govern_process(process.pid)
+            if on_spawn:
+                on_spawn(process)
+            time_pattern = re.compile(r"time=(\d+):(\d+):(\d+\.\d+)")
+            frame_pattern = re.compile(r"frame=\s*(\d+)")
+            tail = collections.deque(maxlen=5)
+            first_frame = True
+            frames_out = None
+            for line in process.stderr:
+                tail.append(line.strip())
+                frame = frame_pattern.search(line)
+                if frame:
+                    frames_out = int(frame.group(1))
+                if on_log:
+                    on_log(line)
+                if cancelled and cancelled():
+                    process.kill()
+                    process.wait()
+                    raise InterruptedError("Render cancelled")
+                match = time_pattern.search(line)
+                if match and first_frame and governor:
+                    governor.apply() # Threads FFmpeg started before it was governed
+                first_frame = first_frame and not match
+                if match and duration > 0 and progress:
+                    hrs, mins, secs = map(float, match.groups())
+                    progress(min(1.0, (hrs * 3600 + mins * 60 + secs) / duration))
+            if process.wait() != 0:
+                lines = [l for l in tail if l]
+                raise RuntimeError(lines[-1] if lines else f"FFmpeg exited with {process.returncode}")
+            result = {"kind": "video"}
+            if info:
+                result["decimation"] = decimation_stats(info, frames_out)
+        os.replace(partial, output_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+        raise
+    finally:
+        if governor:
+            governor.release()
+        if info and info.get("still"):
+            with contextlib.suppress(OSError):
+                os.remove(info["still"])
+    result.update(output=output_path, bytes=os.path.getsize(output_path), seconds=round(time.perf_counter() - started, 2))
+    return result
+
+class WatchFolderDaemon:
+    """Renders every new or changed media file in the watched folders through one preset (--watch mode).
+
+    Jobs run on a bounded thread pool; the RAM budget is split between the workers. A manifest
+    in the output folder records what was rendered from which source state and settings, so
+    files whose output is already up to date are skipped across restarts.
+    """
+    def __init__(self, folders, output_dir, monitors, preset_name, profile=None, workers=WATCH_DEFAULT_WORKERS,
+                 ram_budget_mb=DEFAULT_RAM_BUDGET_MB, include_audio=True, polling=False, policy=None, core_budget=None,
+                 decimate=False):
+        import concurrent.futures
+        self.folders = list(dict.fromkeys(os.path.abspath(f) for f in folders))
+        self.output_dir = os.path.abspath(output_dir)
+        # With several watched folders each gets an output subfolder; same-named ones are told apart by a path hash
+        self.subfolders = {}
+        if len(self.folders) > 1:
+            names = collections.Counter(os.path.basename(f) for f in self.folders)
+            for folder in self.folders:
+                name = os.path.basename(folder)
+                self.subfolders[folder] = name if names[name] == 1 else f"{name}-{hashlib.sha1(folder.encode()).hexdigest()[:8]}"
+        self.monitors = monitors
+        self.profile = profile or DEFAULT_ENCODE_PROFILE
+        self.workers = max(1, workers)
+        self.ram_budget_mb = max(64, ram_budget_mb // self.workers)
+        self.include_audio = include_audio
+        self.polling = polling
+        self.policy = policy # RenderGovernor policy of every job (None: ungoverned)
+        self.core_budget = core_budget
+        self.decimate = decimate
+        settings = {"monitors": [m.to_dict() for m in monitors], "profile": self.profile, "audio": include_audio}
+        if decimate:
+            settings["decimate"] = True # Only when set, so existing manifests stay valid
+        # Changing the layout, calibration or encode settings invalidates every earlier output
+        self.signature = hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+        self.manifest_path = os.path.join(self.output_dir, WATCH_MANIFEST_NAME)
+        self.manifest = {"preset": preset_name, "profile": self.profile, "signature": self.signature, "files": {}}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path) as f:
+                    self.manifest["files"] = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"[Watch] Ignoring unreadable manifest: {e}")
+        self.lock = threading.Lock()
+        self.queued = set()
+        self.running = set()
+        self.rerun = set() # Running paths that changed again; rendered once more when their job ends
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="watch-render")
+        self.counts = collections.Counter()
+
+    def is_media(self, path):
+        name = os.path.basename(path)
+        if name.startswith('.') or os.path.dirname(os.path.abspath(path)) == self.output_dir:
+            return False # Hidden/partial files and our own outputs
+        return name.lower().endswith(IMAGE_EXTS + VIDEO_EXTS)
+
+    def output_path_for(self, path):
+        name = os.path.basename(path)
+        ext = ENCODE_PROFILES[self.profile]["ext"] if name.lower().endswith(IMAGE_EXTS) else ".mp4"
+        # The whole source name is kept, so a.jpg and a.png don't render to the same file
+        folder = self.subfolders.get(os.path.dirname(os.path.abspath(path)), "")
+        return os.path.join(self.output_dir, folder, name + WATCH_OUTPUT_SUFFIX + ext)
+
+    def is_up_to_date(self, path, st):
+        entry = self.manifest["files"].get(os.path.abspath(path))
+        if not entry or entry["signature"] != self.signature or entry["output"] != self.output_path_for(path):
+            return False
+        if (entry["source_size"], entry["source_mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+            return False
+        # A failed source is retried once it changes, not on every event
+        return entry["status"] == "failed" or os.path.exists(entry["output"])
+
+    def submit(self, path):
+        path = os.path.abspath(path)
+        if not self.is_media(path):
+            return
+        with self.lock:
+            if path in self.running:
+                self.rerun.add(path) # Never two renders of one file at once
+                return
+            if path in self.queued:
+                return # Already waiting; the job looks at the file's latest state when it runs
+            self.queued.add(path)
+        try:
+            self.pool.submit(self._job, path)
+        except RuntimeError: # Shutting down
+            with self.lock:
+                self.queued.discard(path)
+
+    def _job(self, path):
+        with self.lock:
+            self.queued.discard(path)
+            self.running.add(path)
+        try:
+            self._render(path)
+        finally:
+            with self.lock:
+                self.running.discard(path)
+                again = path in self.rerun
+                self.rerun.discard(path)
+            if again:
+                self.submit(path)
+
+    def _render(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return # Gone again before we got to it
+        if self.is_up_to_date(path, st):
+            self._count("skipped")
+            return
+        output_path = self.output_path_for(path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        entry = {"output": output_path, "source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns,
+                 "signature": self.signature, "rendered_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        started = time.perf_counter()
+        try:
+            governor = RenderGovernor(self.policy, self.core_budget) if self.policy else None
+            stats = render_media(path, output_path, self.monitors, profile=self.profile, ram_budget_mb=self.ram_budget_mb,
+                                 include_audio=self.include_audio, governor=governor, decimate=self.decimate)
+            entry.update({k: stats[k] for k in ("kind", "mode", "output_size", "bytes", "decimation") if k in stats}, status="rendered")
+            self._count("rendered")
+            print(f"[Watch] {os.path.basename(path)} -> {output_path} ({time.perf_counter() - started:.1f}s)")
+            if "decimation" in stats:
+                print(f"[Watch]   {format_decimation(stats['decimation'])}")
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+            self._count("failed")
+            print(f"[Watch] Failed to render {path}: {e}")
+        entry["seconds"] = round(time.perf_counter() - started, 2)
+        with self.lock:
+            self.manifest["files"][path] = entry
+            self._write_manifest()
+
+    def _count(self, outcome):
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def _write_manifest(self):
+        self.manifest["updated"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def scan(self):
+        """Queues every media file already in the watched folders (the manifest skips finished ones)."""
+        for folder in self.folders:
+            for name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, name)
+                if os.path.isfile(path):
+                    self.submit(path)
+
+    def run(self, once=False, poll_interval=WATCH_POLL_INTERVAL_S):
+        os.makedirs(self.output_dir, exist_ok=True)
+        watcher = None
+        if not once:
+            # Start watching before the initial scan so nothing dropped in between is missed
+            try:
+                if self.polling:
+                    raise OSError("polling requested")
+                watcher = InotifyWatcher(self.folders)
+                kind = "inotify"
+            except (OSError, AttributeError):
+                watcher = PollingWatcher(self.folders)
+                kind = f"polling every {poll_interval:g}s"
+            print(f"[Watch] Watching {', '.join(self.folders)} ({kind}), {self.workers} workers, output {self.output_dir}")
+        self.scan()
+        interrupted = False
+        try:
+            while watcher is not None:
+                for path in watcher.poll(poll_interval):
+                    if os.path.isfile(path):
+                        self.submit(path)
+            self.pool.shutdown(wait=True) # --once: finish the queue
+        except KeyboardInterrupt:
+            interrupted = True
+            print("[Watch] Stopping after the running jobs...")
+        finally:
+            if watcher is not None:
+                watcher.close()
+            self.pool.shutdown(wait=True, cancel_futures=interrupted)
+        print(f"[Watch] {self.counts['rendered']} rendered, {self.counts['skipped']} up to date, {self.counts['failed']} failed")
+        return 1 if once and self.counts["failed"] else 0
+
+def run_watch_daemon(args, settings_file="bezel_settings.json"):
+    """Entry point of --watch: loads the preset and render settings, then runs the daemon."""
+    settings = {}
+    if os.path.exists(settings_file):
+        try:
+            with open(settings_file) as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            pass
+    preset = args.preset or settings.get("last_preset_file")
+    if not preset or not os.path.exists(preset):
+        print("No preset: pass --preset, or save/load one in the app first.")
+        return 2
+    with open(preset) as f:
+        monitors = [MonitorConfig.from_dict(d) for d in json.load(f)]
+    missing = [f for f in args.watch if not os.path.isdir(f)]
+    if missing:
+        print(f"Not a folder: {', '.join(missing)}")
+        return 2
+    daemon = WatchFolderDaemon(args.watch, args.output, monitors, preset_name=os.path.abspath(preset),
+                               profile=args.encode_profile or settings.get("encode_profile"), workers=args.workers,
+                               ram_budget_mb=settings.get("ram_budget_mb", DEFAULT_RAM_BUDGET_MB),
+                               include_audio=not args.no_audio, polling=args.polling,
+                               policy=args.render_policy, core_budget=args.render_cores, decimate=args.decimate)
+    return daemon.run(once=args.once, poll_interval=args.poll_interval)
+
+class RenderJobQueue:
+    """Jobs of the render server (--serve). Thread-safe; HTTP handler threads submit, claim and update jobs.
+
+    A running job is leased to its worker and every progress report renews the lease. If the
+    worker goes silent for lease_s (crashed, unplugged), the job goes back to the queue, up to
+    RENDER_JOB_MAX_ATTEMPTS tries in all.
+    """
+    STATES = ("queued", "running", "done", "failed", "cancelled")
+
+    def __init__(self, lease_s=RENDER_JOB_LEASE_S):
+        self.lease_s = lease_s
+        self.jobs = collections.OrderedDict()
+        self.workers = {}
+        self.ids = itertools.count(1)
+        self.cond = threading.Condition()
+
+    @staticmethod
+    def validate(spec):
+        """Normalized copy of a submitted job; raises ValueError with a message for the client."""
+        if not isinstance(spec, dict):
+            raise ValueError("A job must be a JSON object")
+        for key in ("input", "output"):
+            if not isinstance(spec.get(key), str) or not spec[key]:
+                raise ValueError(f"Missing '{key}' path")
+        if not spec["input"].lower().endswith(IMAGE_EXTS + VIDEO_EXTS):
+            raise ValueError(f"Not a supported media file: {spec['input']}")
+        preset = spec.get("preset")
+        if not isinstance(preset, list) or not preset:
+            raise ValueError("'preset' must be a non-empty list of monitors (the preset file's JSON)")
+        try:
+            # Keep per-monitor channel calibration: the app sends its live, calibrated monitors
+            monitors = [MonitorConfig.from_dict(dict(d), keep_calibration=True).to_dict() for d in preset]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid preset: {e}")
+        profile = spec.get("profile") or DEFAULT_ENCODE_PROFILE
+        if profile not in ENCODE_PROFILES:
+            raise ValueError(f"Unknown encode profile: {profile}")
+        return {"input": spec["input"], "output": spec["output"], "preset": monitors, "profile": profile,
+                "include_audio": bool(spec.get("include_audio", True)), "decimate": bool(spec.get("decimate", False)),
+                "ram_budget_mb": int(spec.get("ram_budget_mb") or DEFAULT_RAM_BUDGET_MB)}
+
+    def view(self, job, full=True):
+        """JSON-ready copy of a job (full adds the spec and log)."""
+        out = {k: job[k] for k in ("id", "state", "input", "output", "kind", "progress", "worker", "attempts",
+                                   "submitted", "started", "finished", "result", "error", "resources")}
+        if full:
+            # log holds the most recent lines; log_total counts every line, so pollers can tell which are new
+            out.update(spec=job["spec"], log=list(job["log"]), log_total=job["log_total"])
+        return out
+
+    def submit(self, spec):
+        spec = self.validate(spec)
+        with self.cond:
+            job_id = str(next(self.ids))
+            job = self.jobs[job_id] = {
+                "id": job_id, "state": "queued", "spec": spec, "input": spec["input"], "output": spec["output"],
+                "kind": "image" if spec["input"].lower().endswith(IMAGE_EXTS) else "video",
+                "progress": 0.0, "worker": None, "attempts": 0, "submitted": time.time(), "started": None,
+                "finished": None, "result": None, "error": None, "resources": None,
+                "log": collections.deque(maxlen=50), "log_total": 0, "lease": None, "cancel": False}
+            self.cond.notify_all()
+            return self.view(job)
+
+    def get(self, job_id):
+        with self.cond:
+            self._expire_leases()
+            return self.view(self.jobs[job_id])
+
+    def list(self):
+        with self.cond:
+            self._expire_leases()
+            return [self.view(job, full=False) for job in self.jobs.values()]
+
+    def status(self):
+        with self.cond:
+            self._expire_leases()
+            counts = collections.Counter(job["state"] for job in self.jobs.values())
+            return {"jobs": {state: counts[state] for state in self.STATES},
+                    "workers": {name: dict(w, idle_s=round(time.time() - w["last_seen"], 1)) for name, w in self.workers.items()}}
+
+    def _seen(self, worker, job_id=None):
+        if not worker:
+            raise ValueError("Missing 'worker'")
+        self.workers[worker] = {"last_seen": time.time(), "job": job_id}
+
+    def claim(self, worker, wait_s=0.0):
+        """Leases the oldest queued job to worker, waiting up to wait_s for one. None if there was none."""
+        deadline = time.monotonic() + wait_s
+        with self.cond:
+            self._seen(worker)
+            while True:
+                self._expire_leases()
+                job = next((j for j in self.jobs.values() if j["state"] == "queued"), None)
+                if job:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(min(remaining, 1.0)) # Wake up now and then to expire leases
+            job.update(state="running", worker=worker, started=time.time(), progress=0.0,
+                       attempts=job["attempts"] + 1, lease=time.monotonic() + self.lease_s)
+            self._seen(worker, job["id"])
+            return self.view(job)
+
+    def _owned(self, job_id, worker):
+        """The job if it is still running on this worker (it may have been re-leased or cancelled meanwhile)."""
+        job = self.jobs[job_id]
+        self._seen(worker, job_id)
+        return job if job["state"] == "running" and job["worker"] == worker else None
+
+    def report(self, job_id, worker, progress=None, log=(), resources=None):
+        """Progress from a job's worker; renews its lease. Returns True if the worker should stop the job."""
+        with self.cond:
+            job = self._owned(job_id, worker)
+            if job is None:
+                return True
+            job["lease"] = time.monotonic() + self.lease_s
+            if progress is not None:
+                job["progress"] = round(min(1.0, max(0.0, float(progress))), 4)
+            self._log(job, log)
+            if resources:
+                job["resources"] = resources
+            return job["cancel"]
+
+    def finish(self, job_id, worker, state, result=None, error=None, log=()):
+        if state not in ("done", "failed", "cancelled"):
+            raise ValueError(f"Not a final state: {state}")
+        with self.cond:
+            job = self._owned(job_id, worker)
+            if job is None:
+                return False # Too late: the job was re-leased to another worker or cancelled
+            job.update(state=state, finished=time.time(), result=result, error=error, lease=None)
+            self._log(job, log)
+            if state == "done":
+                job["progress"] = 1.0
+            self.workers[worker]["job"] = None
+            return True
+
+    def cancel(self, job_id):
+        """Cancels a queued job at once; a running one stops at its worker's next progress report."""
+        with self.cond:
+            job = self.jobs[job_id]
+            if job["state"] == "queued":
+                job.update(state="cancelled", finished=time.time())
+            elif job["state"] == "running":
+                job["cancel"] = True
+            return self.view(job)
+
+    @staticmethod
+    def _log(job, lines):
+        lines = [str(line) for line in lines]
+        job["log"].extend(lines)
+        job["log_total"] += len(lines)
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for job in self.jobs.values():
+            if job["state"] != "running" or job["lease"] > now:
+                continue
+            note = f"Worker {job['worker']} stopped responding"
+            if job["attempts"] >= RENDER_JOB_MAX_ATTEMPTS or job["cancel"]:
+                job.update(state="failed" if not job["cancel"] else "cancelled", finished=time.time(), error=note, lease=None)
+            else:
+                job.update(state="queued", worker=None, lease=None)
+                self._log(job, [note + "; job requeued\n"])
+                self.cond.notify_all()
+
+def is_loopback_host(host):
+    """Whether every address host resolves to is a loopback one (unresolvable names count as not)."""
+    import ipaddress
+    import socket
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host or None, None, proto=socket.IPPROTO_TCP, flags=socket.AI_PASSIVE)}
+        return bool(addresses) and all(ipaddress.ip_address(a.split("%")[0]).is_loopback for a in addresses)
+    except (OSError, ValueError):
+        return False
+
+def serve_render_jobs(jobs, host="127.0.0.1", port=RENDER_SERVER_PORT, token=None):
+    """HTTP/JSON server over a RenderJobQueue. Returns the (not yet serving) ThreadingHTTPServer.
+
+        GET  /                      job counts per state and the workers seen
+        GET  /jobs                  every job (without spec and log)
+        POST /jobs                  submit {input, output, preset, profile, include_audio, decimate, ram_budget_mb}
+        GET  /jobs/<id>             one job, with its spec and recent log lines
+        POST /jobs/<id>/cancel      cancel a job
+        POST /claim                 workers: {worker, wait} -> {job} (long-polls up to wait seconds)
+        POST /jobs/<id>/progress    workers: {worker, progress, log, resources} -> {cancel}
+        POST /jobs/<id>/finish      workers: {worker, state, result, error, log}
+
+    With a token every request must carry it in the X-Forge-Token header. Jobs name arbitrary
+    paths that workers read and write, so binding beyond loopback without a token raises ValueError.
+    """
+    # http.server is imported here rather than at the top so the GUI doesn't pay for it at startup
+    import hmac
+    import http.server
+
+    if not token and not is_loopback_host(host):
+        raise ValueError(f"{host} is reachable from the network; pass --token so only your workers and apps can submit jobs")
+
+    job_path = re.compile(r"^/jobs/(\w+)(?:/(progress|finish|cancel))?$")
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        server_version = "OmniScreenForge"
+
+        def log_message(self, format, *args):
+            if DEBUG:
+                super().log_message(format, *args)
+
+        def send_json(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.handle_api("GET")
+
+        def do_POST(self):
+            self.handle_api("POST")
+
+        def handle_api(self, method):
+            if token and not hmac.compare_digest(self.headers.get("X-Forge-Token", ""), token):
+                self.send_json(401, {"error": "Missing or wrong X-Forge-Token"})
+                return
+            path = self.path.split("?", 1)[0].rstrip("/") or "/"
+            match = job_path.match(path)
+            try:
+                body = {}
+                if method == "POST":
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                    if not isinstance(body, dict):
+                        raise ValueError("Request body must be a JSON object")
+                worker = str(body.get("worker") or "")
+                if (method, path) == ("GET", "/"):
+                    self.send_json(200, dict(jobs.status(), server="OmniScreen Forge render server"))
+                elif (method, path) == ("GET", "/jobs"):
+                    self.send_json(200, {"jobs": jobs.list()})
+                elif (method, path) == ("POST", "/jobs"):
+                    self.send_json(201, jobs.submit(body))
+                elif (method, path) == ("POST", "/claim"):
+                    wait = min(max(0.0, float(body.get("wait", 0))), RENDER_CLAIM_WAIT_S)
+                    self.send_json(200, {"job": jobs.claim(worker, wait)})
+                elif match and method == "GET" and not match.group(2):
+                    self.send_json(200, jobs.get(match.group(1)))
+                elif match and method == "POST" and match.group(2) == "progress":
+                    cancel = jobs.report(match.group(1), worker, body.get("progress"), body.get("log") or (), body.get("resources"))
+                    self.send_json(200, {"cancel": cancel})
+                elif match and method == "POST" and match.group(2) == "finish":
+                    accepted = jobs.finish(match.group(1), worker, body.get("state"), body.get("result"), body.get("error"),
+                                           body.get("log") or ())
+                    self.send_json(200, {"accepted": accepted})
+                elif match and method == "POST" and match.group(2) == "cancel":
+                    self.send_json(200, jobs.cancel(match.group(1)))
+                else:
+                    self.send_json(404, {"error": f"No such endpoint: {method} {path}"})
+            except KeyError:
+                self.send_json(404, {"error": f"No such job: {match.group(1) if match else path}"})
+            except (TypeError, ValueError) as e:
+                self.send_json(400, {"error": str(e)})
+
+    return http.server.ThreadingHTTPServer((host, port), Handler)
+
+class RenderServerClient:
+    """JSON client of the render server, used by render workers and by the app's "Render on Server"."""
+    def __init__(self, url, token=None, timeout=10.0):
+        self.url = url.rstrip("/")
+        if "://" not in self.url:
+            self.url = "http://" + self.url
+        self.token = token
+        self.timeout = timeout
+
+    def request(self, method, path, payload=None, timeout=None):
+        """Sends one request; raises ConnectionError if the server is unreachable, RuntimeError on API errors."""
+        import urllib.error
+        import urllib.request
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method=method, headers={"Content-Type": "application/json"})
+        if self.token:
+            req.add_header("X-Forge-Token", self.token)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout or self.timeout) as resp:
+                return json.loads(resp.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise RuntimeError(f"Render server: {message}")
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"Render server {self.url} unreachable: {getattr(e, 'reason', e)}")
+
+    def status(self):
+        return self.request("GET", "/")
+
+    def submit(self, spec):
+        return self.request("POST", "/jobs", spec)
+
+    def job(self, job_id):
+        return self.request("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        return self.request("POST", f"/jobs/{job_id}/cancel", {})
+
+    def claim(self, worker, wait=RENDER_CLAIM_WAIT_S):
+        return self.request("POST", "/claim", {"worker": worker, "wait": wait}, timeout=wait + self.timeout)["job"]
+
+    def report(self, job_id, worker, progress, log=(), resources=None):
+        return self.request("POST", f"/jobs/{job_id}/progress",
+                            {"worker": worker, "progress": progress, "log": list(log), "resources": resources})["cancel"]
+
+    def finish(self, job_id, worker, state, result=None, error=None, log=()):
+        return self.request("POST", f"/jobs/{job_id}/finish",
+                            {"worker": worker, "state": state, "result": result, "error": error, "log": list(log)})
+
+class RenderWorker:
+    """Pulls jobs from a render server and renders them (--worker mode).
+
+    Paths in jobs are used as given, so every worker must see the inputs and outputs under the
+    same paths as the submitting machine (shared storage mounted alike). While a job renders, a
+    heartbeat thread reports progress, log lines and resource usage every RENDER_HEARTBEAT_S,
+    which also keeps the job's lease and carries cancellation back.
+    """
+    def __init__(self, client, name=None, policy=None, core_budget=None):
+        import socket
+        self.client = client
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.policy = policy
+        self.core_budget = core_budget
+
+    def run(self, once=False):
+        print(f"[Worker {self.name}] Pulling jobs from {self.client.url}")
+        rendered = failed = 0
+        while True:
+            try:
+                job = self.client.claim(self.name, wait=1.0 if once else RENDER_CLAIM_WAIT_S)
+            except ConnectionError as e:
+                if once:
+                    print(f"[Worker {self.name}] {e}")
+                    return 1
+                print(f"[Worker {self.name}] {e}; retrying in {RENDER_HEARTBEAT_S * 5:g}s")
+                time.sleep(RENDER_HEARTBEAT_S * 5)
+                continue
+            except KeyboardInterrupt:
+                break
+            if job is None:
+                if once:
+                    break
+                continue
+            try:
+                if self.process(job):
+                    rendered += 1
+                else:
+                    failed += 1
+            except KeyboardInterrupt:
+                # The running job's lease expires on the server, which hands it to another worker
+                break
+        print(f"[Worker {self.name}] {rendered} rendered, {failed} failed or cancelled")
+        return 1 if once and failed else 0
+
+    def process(self, job):
+        """Renders one claimed job and reports the outcome. Returns True if it was rendered."""
+        spec = job["spec"]
+        print(f"[Worker {self.name}] Job {job['id']}: {spec['input']} -> {spec['output']}")
+        state = {"progress": 0.0, "log": collections.deque(maxlen=200), "cancel": False, "resources": None}
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(RENDER_HEARTBEAT_S):
+                lines = [state["log"].popleft() for _ in range(len(state["log"]))]
+                try:
+                    state["cancel"] = self.client.report(job["id"], self.name, state["progress"], lines, state["resources"]) or state["cancel"]
+                except (ConnectionError, RuntimeError) as e:
+                    print(f"[Worker {self.name}] Progress report failed: {e}")
+
+        def on_sample(sample):
+            state["resources"] = sample
+        def on_spawn(process):
+            state["sampler"] = ProcessSampler(process.pid, "ffmpeg", on_sample=on_sample).start()
+        # Like the app: stills are composited in this process, videos by the FFmpeg child
+        state["sampler"] = ProcessSampler(os.getpid(), "compositor", on_sample=on_sample).start() if job["kind"] == "image" else None
+        beat = threading.Thread(target=heartbeat, name="worker-heartbeat", daemon=True)
+        beat.start()
+        outcome, result, error = "failed", None, None
+        try:
+            output_dir = os.path.dirname(os.path.abspath(spec["output"]))
+            os.makedirs(output_dir, exist_ok=True)
+            result = render_media(spec["input"], spec["output"], [MonitorConfig.from_dict(dict(d), keep_calibration=True) for d in spec["preset"]],
+                                  profile=spec["profile"], ram_budget_mb=spec["ram_budget_mb"], include_audio=spec["include_audio"],
+                                  decimate=spec.get("decimate", False),
+                                  progress=lambda f: state.update(progress=f), cancelled=lambda: state["cancel"],
+                                  on_log=state["log"].append, on_spawn=on_spawn,
+                                  governor=RenderGovernor(self.policy, self.core_budget) if self.policy else None)
+            outcome = "done"
+        except InterruptedError:
+            outcome, error = "cancelled", "Cancelled"
+        except Exception as e:
+            error = str(e)
+        finally:
+            done.set()
+            beat.join()
+            usage = state["sampler"].stop() if state["sampler"] else None
+        if result is not None:
+            result["usage"] = usage
+        try:
+            self.client.finish(job["id"], self.name, outcome, result=result, error=error, log=list(state["log"]))
+        except (ConnectionError, RuntimeError) as e:
+            print(f"[Worker {self.name}] Could not report job {job['id']}: {e}")
+        print(f"[Worker {self.name}] Job {job['id']} {outcome}" + (f": {error}" if error else f" in {result['seconds']:.1f}s"))
+        return outcome == "done"
+
+def run_render_server(args):
+    """Entry point of --serve: runs the job server, plus --local-workers worker processes on this machine."""
+    host, _, port = args.serve.rpartition(":")
+    host = host or "127.0.0.1"
+    jobs = RenderJobQueue()
+    try:
+        httpd = serve_render_jobs(jobs, host, int(port), token=args.token)
+    except (OSError, ValueError) as e:
+        print(f"Cannot serve on {args.serve}: {e}")
+        return 2
+    url = f"http://{'127.0.0.1' if host in ('0.0.0.0', '') else host}:{httpd.server_address[1]}"
+    print(f"[Server] Render server on {url}" + (" (token required)" if args.token else ""))
+    threading.Thread(target=httpd.serve_forever, name="render-server", daemon=True).start()
+    workers = []
+    for _ in range(args.local_workers):
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", url] + (["--token", args.token] if args.token else [])
+        if args.render_policy:
+            cmd += ["--render-policy", args.render_policy] + (["--render-cores", str(args.render_cores)] if args.render_cores else [])
+        workers.append(subprocess.Popen(cmd))
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("[Server] Shutting down")
+    finally:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.wait()
+        httpd.shutdown()
+        httpd.server_close()
+    return 0
+
+def run_render_worker(args):
+    """Entry point of --worker: renders jobs from the server at args.worker until interrupted."""
+    worker = RenderWorker(RenderServerClient(args.worker, token=args.token), name=args.worker_name,
+                          policy=args.render_policy, core_budget=args.render_cores)
+    return worker.run(once=args.once)
+
 # --- GUI Application ---
 
 class RoundedButton(tk.Canvas):
@@ -173,30 +3135,148 @@ class RoundedButton(tk.Canvas):
         if self.command:
             self.command()
 
+class MonitorRow:
+    """One pooled row of the monitor sidebar.
+
+    Rows are created once and re-bound to whichever monitor index scrolls into view,
+    so adding, removing or scrolling monitors never rebuilds the row widgets.
+    """
+    def __init__(self, app, parent):
+        self.app = app
+        self.idx = None
+        self.window = None # Canvas window item id, assigned by the sidebar
+        
+        f = ttk.Frame(parent, padding="8", relief=tk.RAISED)
+        self.frame = f
+        
+        row1 = ttk.Frame(f)
+        row1.pack(fill=tk.X, pady=(0, 5))
+        self.title_lbl = ttk.Label(row1, text="Screen", font=("Segoe UI", 11, "bold"))
+        self.title_lbl.pack(side=tk.LEFT, padx=2)
+        app.create_bordered_button(row1, text="X Remove", command=lambda: self.idx is not None and app.remove_monitor(self.idx), fg="#FF00FF").pack(side=tk.RIGHT, padx=2)
+        
+        self.vars = {
+            'diag': tk.StringVar(), 'resw': tk.StringVar(), 'resh': tk.StringVar(),
+            'osx': tk.StringVar(), 'osy': tk.StringVar(), 'x': tk.StringVar(), 'y': tk.StringVar()
+        }
+        
+        row2 = ttk.Frame(f)
+        row2.pack(fill=tk.X, pady=2)
+        ttk.Label(row2, text="Diag (\"):").pack(side=tk.LEFT, padx=(0, 5))
+        e1 = ttk.Entry(row2, textvariable=self.vars['diag'], width=6)
+        e1.pack(side=tk.LEFT, padx=(0, 15))
+        
+        ttk.Label(row2, text="Native Res:").pack(side=tk.LEFT, padx=(0, 5))
+        e2 = ttk.Entry(row2, textvariable=self.vars['resw'], width=5)
+        e2.pack(side=tk.LEFT, padx=1)
+        ttk.Label(row2, text="x").pack(side=tk.LEFT)
+        e3 = ttk.Entry(row2, textvariable=self.vars['resh'], width=5)
+        e3.pack(side=tk.LEFT)
+
+        row3 = ttk.Frame(f)
+        row3.pack(fill=tk.X, pady=2)
+        ttk.Label(row3, text="OS Virtual X,Y:").pack(side=tk.LEFT, padx=(0, 5))
+        e4 = ttk.Entry(row3, textvariable=self.vars['osx'], width=6)
+        e4.pack(side=tk.LEFT, padx=1)
+        e5 = ttk.Entry(row3, textvariable=self.vars['osy'], width=6)
+        e5.pack(side=tk.LEFT)
+
+        row4 = ttk.Frame(f)
+        row4.pack(fill=tk.X, pady=2)
+        ttk.Label(row4, text="Physical X,Y:").pack(side=tk.LEFT, padx=(0, 5))
+        e6 = ttk.Entry(row4, textvariable=self.vars['x'], width=6)
+        e6.pack(side=tk.LEFT, padx=1)
+        e7 = ttk.Entry(row4, textvariable=self.vars['y'], width=6)
+        e7.pack(side=tk.LEFT)
+        
+        self.entries = [e1, e2, e3, e4, e5, e6, e7]
+        for entry in self.entries:
+            entry.bind("<Return>", self.commit)
+            entry.bind("<FocusOut>", self.commit)
+
+    def has_focus(self):
+        try:
+            return self.frame.focus_get() in self.entries
+        except KeyError: # focus_get() fails on some popup widgets
+            return False
+
+    def bind_monitor(self, idx):
+        # Don't lose a half-typed value when this row is recycled for another monitor
+        if self.idx is not None and self.idx != idx and self.has_focus():
+            self.commit()
+        self.idx = idx
+        self.title_lbl.config(text=f"Screen {idx+1}")
+        self.sync()
+
+    def sync(self, fields=None):
+        m = self.app.monitors[self.idx]
+        values = {
+            'diag': f"{m.diag:.1f}", 'resw': m.res_w, 'resh': m.res_h,
+            'osx': m.os_x, 'osy': m.os_y, 'x': f"{m.x:.1f}", 'y': f"{m.y:.1f}"
+        }
+        for key in (fields or values):
+            self.vars[key].set(values[key])
+
+    def commit(self, event=None):
+        if self.idx is None or self.idx >= len(self.app.monitors):
+            return
+        try:
+            m = self.app.monitors[self.idx]
+            m.diag = float(self.vars['diag'].get())
+            m.res_w = int(self.vars['resw'].get())
+            m.res_h = int(self.vars['resh'].get())
+            m.os_x = int(self.vars['osx'].get())
+            m.os_y = int(self.vars['osy'].get())
+            m.x = float(self.vars['x'].get())
+            m.y = float(self.vars['y'].get())
+            # Force center refresh
+            self.app.drag_data["mode"] = None
+            self.app.draw_preview()
+        except ValueError: pass
+
 class OmniScreenForgeApp:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        self.profiler = profiler or StartupProfiler()
         self.root.title("OmniScreen Forge - Universal Multi-Monitor Rescaler")
         self.root.geometry("1100x950")
         
         self.apply_window_dark_titlebar(self.root)
         
         # Apply modern dark theme
-        sv_ttk.set_theme("dark")
-        self.root.configure(bg="#1c1c1c")
+        with self.profiler.stage("theme setup"):
+            import sv_ttk
+            sv_ttk.set_theme("dark")
+            self.root.configure(bg="#1c1c1c")
 
         # Load persisted settings
-        self.settings_file = "bezel_settings.json"
-        self.last_dirs = {"media_in": os.path.expanduser("~"), "preset_out": os.path.expanduser("~"), "render_out": os.path.expanduser("~")}
-        self.load_settings()
+        with self.profiler.stage("settings"):
+            self.settings_file = "bezel_settings.json"
+            self.last_dirs = {"media_in": os.path.expanduser("~"), "preset_out": os.path.expanduser("~"), "render_out": os.path.expanduser("~")}
+            self.load_settings()
+        
+        # Cosmetic animations pause while minimized, unfocused or rendering
+        self.animations_enabled = tk.BooleanVar(value=self.last_dirs.get("animations_enabled", True))
+        self.animator = AnimationScheduler(self.root, enabled=self.animations_enabled.get())
+        self.animator.register("buttons", resume=self.start_shimmer)
+        self.animator.register("global_shimmer", resume=self.schedule_global_shimmer, on_pause=self.reset_global_shimmer)
         
         self.monitors = []
         self.input_file = tk.StringVar()
         self.bezel_gap = tk.DoubleVar(value=0.0) # Physical inches
-        self.ui_vars = {}
+        # Virtualized monitor sidebar: a small pool of rows bound to the visible indices
+        self.mon_rows = []
+        self.row_slots = {}
+        self.row_height = None
 
         # Drag state
         self.drag_data = {"idx": -1, "mode": None, "start_x": 0, "start_y": 0, "orig_x": 0, "orig_y": 0, "orig_diag": 0}
+        self.drag_pointer = None # Latest motion position, consumed once per frame
+        self.drag_after_id = None
+        self.drag_stats = {"events": 0, "frames": 0}
+        self.spatial_index = None # Rebuilt lazily whenever the LayoutPlan changes
+        self.spatial_index_plan = None
+        self.snap_engine = None
         self.view_scale = 1.0
         self.view_offset_x = 0
         self.view_offset_y = 0
@@ -209,37 +3289,149 @@ class OmniScreenForgeApp:
         self.box_w = 10
         self.box_h = 10
         
-        self.setup_ui()
-        self.draw_preview()
-        self.mon_canvas.bind('<Configure>', lambda e: self.mon_canvas.configure(scrollregion=self.mon_canvas.bbox("all")))
+        # Retained canvas scene: item ids per monitor, only rebuilt when monitors are added/removed
+        self.scene_backdrop = None
+        self.scene_items = []
+        
+        # Live media preview inside the canvas, sampled from a small cached proxy of the input
+        self.media_proxy = None
+        self.media_proxy_key = None
+        self.scene_photos = {}
+        self.scene_media_keys = {}
         
+        # Timing spans of the current render (or of UI work between renders), see RenderTrace
+        self.render_trace = RenderTrace()
+        self.last_render_trace = None
+        self.current_render = {}
+        self.render_usage = None
+        self.watchdog = None # StallWatchdog, attached by main() with --watch-stalls
+        self.governor = None # RenderGovernor of the running local render
+        self.ui_probe = None
+        
+        with self.profiler.stage("ui construction"):
+            self.setup_ui()
+            self.input_file.trace_add("write", lambda *args: self.request_media_proxy())
+            self.draw_preview()
+            self.mon_canvas.bind('<Configure>', lambda e: self.layout_monitor_rows())
+        
+        # Paint straight from the last preset; monitor enumeration never blocks the first frame
+        preset_loaded = False
         last_preset = self.last_dirs.get("last_preset_file")
         if last_preset and os.path.exists(last_preset):
             try:
-                with open(last_preset, 'r') as f:
-                    self.monitors = [MonitorConfig.from_dict(d) for d in json.load(f)]
-                self.refresh_monitor_list()
+                with self.profiler.stage("preset loading"):
+                    with open(last_preset, 'r') as f:
+                        self.monitors = [MonitorConfig.from_dict(d) for d in json.load(f)]
+                    self.refresh_monitor_list()
+                preset_loaded = True
             except Exception as e:
                 print(f"Failed to load last preset: {e}")
-                self.auto_detect_monitors()
-        else:
-            self.auto_detect_monitors()
+                
+        with self.profiler.stage("monitor detection"):
+            self.start_startup_detection(apply=not preset_loaded)
             
         # Quality of Life feature: Pre-fill the input file with the user's current desktop wallpaper
-        self.try_load_current_wallpaper()
+        with self.profiler.stage("wallpaper lookup"):
+            self.try_load_current_wallpaper()
+            
+        # Logos and other cosmetic assets are decoded once the window is already on screen
+        # (the idle round lets Tk map and paint the window first)
+        self.root.after_idle(lambda: self.root.after(1, self.on_first_frame))
 
-    def try_load_current_wallpaper(self):
+    def on_first_frame(self):
+        self.profiler.mark_interactive()
+        with self.profiler.stage("deferred assets"):
+            self.load_header_logos()
+        if self.profiler.enabled:
+            report = self.profiler.report()
+            print(report)
+            self.log_message(report + "\n")
+        for callback in self.profiler.on_finished:
+            callback()
+
+    def attach_watchdog(self, watchdog):
+        self.watchdog = watchdog
+        watchdog.on_stall = self.on_ui_stall
+        self.view_menu.add_command(label="UI Stall Report", command=lambda: self.log_message(watchdog.report() + "\n"))
+
+    def on_ui_stall(self, stall):
+        print(format_stall(stall))
+        for frame in stall["stack"]:
+            print(f"    {frame}")
+        self.log_message(format_stall(stall) + "\n")
+
+    def log_message(self, text):
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, text)
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
+
+    def run_in_background(self, func, on_done):
+        """Runs func() on a worker thread and hands its result to on_done() on the Tk thread."""
+        def worker():
+            try:
+                self.ui_queue.put((on_done, func(), None))
+            except Exception as e:
+                self.ui_queue.put((on_done, None, e))
+        self.ui_jobs += 1
+        threading.Thread(target=worker, daemon=True).start()
+        if self.ui_jobs == 1:
+            self.root.after(30, self._process_ui_queue)
+
+    def _process_ui_queue(self):
         try:
-            if os.name == 'nt':
-                import ctypes
-                SPI_GETDESKWALLPAPER = 0x0073
-                buffer = ctypes.create_unicode_buffer(512)
-                ctypes.windll.user32.SystemParametersInfoW(SPI_GETDESKWALLPAPER, 512, buffer, 0)
-                wallpaper_path = buffer.value
-                if wallpaper_path and os.path.exists(wallpaper_path):
-                    self.input_file.set(wallpaper_path)
-        except Exception as e:
-            print(f"Failed to detect active wallpaper: {e}")
+            while True:
+                on_done, result, error = self.ui_queue.get_nowait()
+                self.ui_jobs -= 1
+                if error is not None:
+                    print(f"Background task failed: {error}")
+                else:
+                    on_done(result)
+        except queue.Empty:
+            pass
+        if self.ui_jobs > 0:
+            self.root.after(30, self._process_ui_queue)
+
+    def try_load_current_wallpaper(self):
+        def on_wallpaper(wallpaper_path):
+            # Don't clobber a file the user already picked while we were looking
+            if wallpaper_path and not self.input_file.get():
+                self.input_file.set(wallpaper_path)
+                self.update_render_btn()
+        self.run_in_background(lookup_current_wallpaper, on_wallpaper)
+
+    def start_startup_detection(self, apply):
+        # Reuse the last detected topology when the display fingerprint hasn't changed
+        signature = display_signature(self.root)
+        cached = self.last_dirs.get("display_topology")
+        if cached and cached.get("signature") == signature and cached.get("monitors"):
+            if apply:
+                self.apply_detected_monitors(cached["monitors"])
+            return
+        self.detect_monitors_async(apply=apply, signature=signature)
+
+    def layout_revision(self):
+        """Changes whenever a monitor is added, removed, replaced or edited."""
+        return tuple(m._revision for m in self.monitors)
+
+    def detect_monitors_async(self, apply=True, signature=None):
+        signature = signature or display_signature(self.root)
+        started = time.perf_counter()
+        revision = self.layout_revision()
+        def on_detected(topology):
+            self.profiler.record("monitor detection (background)", started, time.perf_counter())
+            if topology:
+                self.last_dirs["display_topology"] = {"signature": signature, "monitors": topology}
+                self.save_settings()
+            if not apply:
+                return
+            # Slow EDID enumeration: don't replace a layout the user built or loaded meanwhile
+            if self.layout_revision() != revision:
+                if topology:
+                    self.log_message("Monitor detection finished after the layout was changed; kept the current layout.\n")
+                return
+            self.apply_detected_monitors(topology)
+        self.run_in_background(detect_display_topology, on_detected)
 
     def create_bordered_button(self, parent, text, command, **kwargs):
         # Override bg to match parent mostly
@@ -264,6 +3456,29 @@ class OmniScreenForgeApp:
         # Setup Menu
         self.menubar = tk.Menu(self.root)
         self.root.config(menu=self.menubar)
+        self.view_menu = tk.Menu(self.menubar, tearoff=0, postcommand=self.update_view_menu)
+        self.menubar.add_cascade(label="View", menu=self.view_menu)
+        self.view_menu.add_checkbutton(label="Enable Animations", variable=self.animations_enabled, command=self.toggle_animations)
+        # Filled in by update_view_menu each time the menu opens, so the counter costs no timers
+        self.view_menu.add_command(label="Animation wakeups: -", state=tk.DISABLED)
+        self.wakeups_menu_index = self.view_menu.index(tk.END) # Later items are appended, so this stays valid
+        self.view_menu.add_separator()
+        self.view_menu.add_command(label="Export Render Trace...", command=self.export_render_trace)
+        self.render_menu = tk.Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(label="Render", menu=self.render_menu)
+        self.render_on_server = tk.BooleanVar(value=self.last_dirs.get("render_on_server", False))
+        self.render_menu.add_checkbutton(label="Render on Server", variable=self.render_on_server, command=self.toggle_render_on_server)
+        self.render_menu.add_command(label="Render Server...", command=self.configure_render_server)
+        self.render_menu.add_command(label="Server Status", command=self.check_render_server)
+        self.render_menu.add_separator()
+        # Switchable while a render runs; see RenderGovernor
+        self.render_policy = tk.StringVar(value=self.last_dirs.get("render_policy", DEFAULT_RENDER_POLICY))
+        self.render_menu.add_radiobutton(label="Background Priority", variable=self.render_policy, value="background", command=self.set_render_policy)
+        self.render_menu.add_radiobutton(label="Turbo", variable=self.render_policy, value="turbo", command=self.set_render_policy)
+        self.render_menu.add_command(label="Background Core Budget...", command=self.configure_core_budget)
+        self.render_menu.add_separator()
+        self.decimate_frames = tk.BooleanVar(value=self.last_dirs.get("decimate_frames", False))
+        self.render_menu.add_checkbutton(label="Skip Duplicate Frames", variable=self.decimate_frames, command=self.toggle_decimate_frames)
         self.help_menu = tk.Menu(self.menubar, tearoff=0)
         self.menubar.add_cascade(label="Help", menu=self.help_menu)
         self.help_menu.add_command(label="Instructions", command=self.show_instructions)
@@ -294,43 +3509,13 @@ class OmniScreenForgeApp:
             self.title_lbls.append(lbl)
             self.title_base_colors.append(hex_color)
             
-        try:
-            from PIL import Image, ImageTk, ImageChops, ImageOps
-            import os, webbrowser
-            logo_path = os.path.join(os.path.dirname(__file__), "LynxGenLOGO.png")
-            if os.path.exists(logo_path):
-                img = Image.open(logo_path).convert("RGBA")
-                
-                # Create a solid green-cyan image
-                blue_bg = Image.new("RGBA", img.size, "#00A86B")
-                # Use the original image's alpha channel
-                alpha = img.split()[3]
-                blue_bg.putalpha(alpha)
-                img = blue_bg
-                
-                img = img.resize((75, 75), Image.Resampling.LANCZOS)
-                self.base_logo_img = img
-                self.logo_photo = ImageTk.PhotoImage(img)
-                
-                self.logo_lbl = tk.Label(header_frame, image=self.logo_photo, bg="#1c1c1c", padx=0, pady=0, cursor="hand2")
-                self.logo_lbl.pack(side=tk.LEFT, padx=(105, 30))
-                self.logo_lbl.bind("<Button-1>", lambda e: webbrowser.open("https://www.youtube.com/@LynxGenisys"))
-                
-            logo2_path = os.path.join(os.path.dirname(__file__), "GradMorls-Logo.png")
-            if os.path.exists(logo2_path):
-                img2 = Image.open(logo2_path)
-                img2.thumbnail((250, 75), Image.Resampling.LANCZOS)
-                self.base_logo2_img = img2
-                self.logo2_photo = ImageTk.PhotoImage(img2)
-                
-                self.logo2_lbl = tk.Label(header_frame, image=self.logo2_photo, bg="#1c1c1c", padx=0, pady=0, cursor="hand2")
-                self.logo2_lbl.pack(side=tk.LEFT, padx=(0, 0))
-                self.logo2_lbl.bind("<Button-1>", lambda e: webbrowser.open("https://gradient-morals.pages.dev/"))
-                
-            # Start shimmer loop
-            self.root.after(30000, self.trigger_global_shimmer)
-        except Exception as e:
-            print(f"Could not load logo: {e}")
+        # Blank placeholders keep the header layout stable until load_header_logos() fills them
+        self.logo_placeholder = tk.PhotoImage(width=75, height=75)
+        self.logo_lbl = tk.Label(header_frame, image=self.logo_placeholder, bg="#1c1c1c", padx=0, pady=0, cursor="hand2")
+        self.logo_lbl.pack(side=tk.LEFT, padx=(105, 30))
+        self.logo2_placeholder = tk.PhotoImage(width=1, height=75)
+        self.logo2_lbl = tk.Label(header_frame, image=self.logo2_placeholder, bg="#1c1c1c", padx=0, pady=0, cursor="hand2")
+        self.logo2_lbl.pack(side=tk.LEFT, padx=(0, 0))
         
         import webbrowser
         
@@ -384,14 +3569,7 @@ class OmniScreenForgeApp:
         
         # Add a canvas and scrollbar for the monitor list
         self.mon_canvas = tk.Canvas(self.monitors_frame, width=390, highlightthickness=0)
-        self.mon_scrollbar = ttk.Scrollbar(self.monitors_frame, orient="vertical", command=self.mon_canvas.yview)
-        self.mon_list_frame = ttk.Frame(self.mon_canvas)
-        
-        self.mon_list_frame.bind(
-            "<Configure>",
-            lambda e: self.mon_canvas.configure(scrollregion=self.mon_canvas.bbox("all"))
-        )
-        self.mon_canvas.create_window((0, 0), window=self.mon_list_frame, anchor="nw")
+        self.mon_scrollbar = ttk.Scrollbar(self.monitors_frame, orient="vertical", command=self.scroll_monitor_list)
         self.mon_canvas.configure(yscrollcommand=self.mon_scrollbar.set)
         
         self.mon_canvas.pack(side="left", fill="both", expand=True)
@@ -421,9 +3599,27 @@ class OmniScreenForgeApp:
         ttk.Scale(settings_frame, from_=0.0, to=5.0, variable=self.bezel_gap, orient=tk.HORIZONTAL, command=lambda e: self.draw_preview()).pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         ttk.Label(settings_frame, textvariable=self.bezel_gap).pack(side=tk.LEFT, padx=(5, 20))
         
+        # Live Media Preview Toggle
+        self.show_media_preview = tk.BooleanVar(value=True)
+        ttk.Checkbutton(settings_frame, text="Show Media on Canvas", variable=self.show_media_preview, command=self.request_media_proxy).pack(side=tk.RIGHT, padx=5)
+        
+        # Edge Snapping Toggle
+        self.snap_enabled = tk.BooleanVar(value=True)
+        ttk.Checkbutton(settings_frame, text="Snap to Edges", variable=self.snap_enabled).pack(side=tk.RIGHT, padx=5)
+        
         # Audio Toggle
         self.include_audio = tk.BooleanVar(value=True)
         ttk.Checkbutton(settings_frame, text="Include Source Audio", variable=self.include_audio).pack(side=tk.RIGHT, padx=5)
+        
+        # Memory budget for still-image compositing (larger sources are processed out-of-core)
+        self.ram_budget_mb = tk.IntVar(value=self.last_dirs.get("ram_budget_mb", DEFAULT_RAM_BUDGET_MB))
+        ttk.Spinbox(settings_frame, from_=256, to=65536, increment=256, textvariable=self.ram_budget_mb, width=7, command=self.save_ram_budget).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Label(settings_frame, text="RAM Budget (MB):").pack(side=tk.RIGHT, padx=(10, 5))
+        
+        # Encode profile for composited stills
+        self.encode_profile = tk.StringVar(value=self.last_dirs.get("encode_profile", DEFAULT_ENCODE_PROFILE))
+        ttk.Combobox(settings_frame, textvariable=self.encode_profile, values=list(ENCODE_PROFILES), state="readonly", width=13).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Label(settings_frame, text="Still Output:").pack(side=tk.RIGHT, padx=(10, 5))
 
         controls_frame = ttk.Frame(main_frame)
         controls_frame.pack(fill=tk.X, pady=(20, 10))
@@ -438,8 +3634,13 @@ class OmniScreenForgeApp:
         self.progress_frame.pack(fill=tk.BOTH, expand=True, pady=0)
         
         self.progress_var = tk.DoubleVar(value=0)
-        self.progress_label = ttk.Label(self.progress_frame, text="Ready", font=("Segoe UI", 9))
-        self.progress_label.pack(anchor="w")
+        progress_header = ttk.Frame(self.progress_frame)
+        progress_header.pack(fill=tk.X)
+        self.progress_label = ttk.Label(progress_header, text="Ready", font=("Segoe UI", 9))
+        self.progress_label.pack(side=tk.LEFT)
+        # Live CPU / memory / I/O of the running render, fed by a ProcessSampler
+        self.resource_label = ttk.Label(progress_header, text="", font=("Consolas", 9), foreground="#8A8A8A")
+        self.resource_label.pack(side=tk.RIGHT)
         
         self.progress_bar = ttk.Progressbar(self.progress_frame, variable=self.progress_var, maximum=100)
         self.progress_bar.pack(fill=tk.X, pady=(5, 10))
@@ -450,6 +3651,14 @@ class OmniScreenForgeApp:
         self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Results of background helpers (detection, decoding) marshalled back to the Tk thread
+        self.ui_queue = queue.Queue()
+        self.ui_jobs = 0
+        
+        # Calibration patterns survive closing the colorimeter so repeated clicks are instant
+        self.calibration_patterns = CalibrationPatternCache()
+        self.cal_pattern = tk.StringVar(value="gradient")
+        
         # Log queue for thread-safe UI updates
         self.log_queue = queue.Queue()
         self.is_rendering = False
@@ -461,6 +3670,64 @@ class OmniScreenForgeApp:
         except ImportError:
             pass
 
+    def load_header_logos(self):
+        try:
+            from PIL import Image, ImageTk
+            import webbrowser
+            self.asset_cache = getattr(self, 'asset_cache', None) or AssetCache()
+            self.shimmer_sheets = {}
+            self.shimmer_photos = {}
+            
+            logo_path = os.path.join(os.path.dirname(__file__), "LynxGenLOGO.png")
+            if os.path.exists(logo_path):
+                def build_logo():
+                    img = Image.open(logo_path).convert("RGBA")
+                    
+                    # Create a solid green-cyan image
+                    blue_bg = Image.new("RGBA", img.size, "#00A86B")
+                    # Use the original image's alpha channel
+                    alpha = img.split()[3]
+                    blue_bg.putalpha(alpha)
+                    return blue_bg.resize((75, 75), Image.Resampling.LANCZOS)
+                    
+                img = self.asset_cache.get(logo_path, "tint00A86B-75x75", build_logo)
+                self.base_logo_img = img
+                self.logo_photo = ImageTk.PhotoImage(img)
+                self.logo_base_photo = self.logo_photo
+                self.load_shimmer_sheet('logo', logo_path, img)
+                
+                self.logo_lbl.config(image=self.logo_photo)
+                self.logo_lbl.bind("<Button-1>", lambda e: webbrowser.open("https://www.youtube.com/@LynxGenisys"))
+                
+            logo2_path = os.path.join(os.path.dirname(__file__), "GradMorls-Logo.png")
+            if os.path.exists(logo2_path):
+                def build_logo2():
+                    img2 = Image.open(logo2_path)
+                    img2.thumbnail((250, 75), Image.Resampling.LANCZOS)
+                    return img2
+                    
+                img2 = self.asset_cache.get(logo2_path, "thumb-250x75", build_logo2)
+                self.base_logo2_img = img2
+                self.logo2_photo = ImageTk.PhotoImage(img2)
+                self.logo2_base_photo = self.logo2_photo
+                self.load_shimmer_sheet('logo2', logo2_path, img2)
+                
+                self.logo2_lbl.config(image=self.logo2_photo)
+                self.logo2_lbl.bind("<Button-1>", lambda e: webbrowser.open("https://gradient-morals.pages.dev/"))
+                
+            # Start shimmer loop
+            self.schedule_global_shimmer()
+        except Exception as e:
+            print(f"Could not load logo: {e}")
+
+    def load_shimmer_sheet(self, name, source_path, base_img):
+        window = SHIMMER_WINDOWS[name]
+        w, h = base_img.size
+        variant = f"shimmer-{window[0]}-{window[1]}-{w}x{h}"
+        sheet = self.asset_cache.get(source_path, variant, lambda: build_shimmer_sheet(base_img, window))
+        self.shimmer_sheets[name] = (sheet, {phase: k for k, phase in enumerate(shimmer_window_phases(window))}, h)
+        self.shimmer_photos[name] = {}
+
     def handle_drop(self, event):
         files = self.root.tk.splitlist(event.data)
         if not files: return
@@ -474,52 +3741,114 @@ class OmniScreenForgeApp:
 
     # --- Interaction Logic ---
     
+    def get_spatial_index(self):
+        plan = get_layout_plan(self.monitors)
+        if self.spatial_index is None or self.spatial_index_plan is not plan:
+            self.spatial_index = SpatialIndex(plan.phys_rects)
+            self.spatial_index_plan = plan
+        return self.spatial_index
+
     def on_press(self, event):
-        for i, mon in reversed(list(enumerate(self.monitors))):
-            x1 = mon.x * self.view_scale + self.view_offset_x
-            y1 = mon.y * self.view_scale + self.view_offset_y
-            x2 = x1 + mon.phys_w * self.view_scale
-            y2 = y1 + mon.phys_h * self.view_scale
-            
-            handle_size = 12
-            if x2 - handle_size <= event.x <= x2 and y2 - handle_size <= event.y <= y2:
-                self.drag_data = {"idx": i, "mode": "resize", "start_x": event.x, "start_y": event.y, "orig_diag": mon.diag}
-                return
+        prev_idx = self.drag_data["idx"]
+        self.drag_pointer = None
+        self.drag_stats = {"events": 0, "frames": 0}
+        
+        index = self.get_spatial_index()
+        i = index.hit((event.x - self.view_offset_x) / self.view_scale, (event.y - self.view_offset_y) / self.view_scale)
+        if i == -1:
+            self.drag_data["mode"] = None
+            return
             
-            if x1 <= event.x <= x2 and y1 <= event.y <= y2:
-                self.drag_data = {"idx": i, "mode": "move", "start_x": event.x, "start_y": event.y, "orig_x": mon.x, "orig_y": mon.y}
-                return
-        self.drag_data["mode"] = None
+        mon = self.monitors[i]
+        x2 = index.rects[i][2] * self.view_scale + self.view_offset_x
+        y2 = index.rects[i][3] * self.view_scale + self.view_offset_y
+        
+        handle_size = 12
+        if x2 - handle_size <= event.x <= x2 and y2 - handle_size <= event.y <= y2:
+            self.drag_data = {"idx": i, "mode": "resize", "start_x": event.x, "start_y": event.y, "orig_diag": mon.diag,
+                              "orig_w": mon.phys_w, "orig_h": mon.phys_h}
+        else:
+            self.drag_data = {"idx": i, "mode": "move", "start_x": event.x, "start_y": event.y, "orig_x": mon.x, "orig_y": mon.y}
+            
+        # Edge lists only need sorting once per drag, every frame after that is a bisect
+        self.snap_engine = None
+        if self.snap_enabled.get():
+            others = [r for j, r in enumerate(index.rects) if j != i]
+            self.snap_engine = SnapEngine(others, self.bezel_gap.get())
+        self.update_selection_items(prev_idx)
+
+    def update_selection_items(self, prev_idx):
+        # Only the previously and newly highlighted monitors change colour
+        if prev_idx != self.drag_data["idx"]:
+            self.update_monitor_items(prev_idx)
+        self.update_monitor_items(self.drag_data["idx"])
 
     def on_drag(self, event):
         idx = self.drag_data["idx"]
         if idx == -1 or not self.drag_data["mode"]: return
         
+        # Motion events can arrive far faster than the screen refreshes (high polling rate mice),
+        # so only remember the latest position and apply it once per frame.
+        self.drag_stats["events"] += 1
+        self.drag_pointer = (event.x, event.y)
+        if self.drag_after_id is None:
+            self.drag_after_id = self.root.after(DRAG_FRAME_MS, self.apply_drag_frame)
+
+    def apply_drag_frame(self):
+        self.drag_after_id = None
+        idx = self.drag_data["idx"]
+        if idx == -1 or not self.drag_data["mode"] or self.drag_pointer is None: return
+        
         mon = self.monitors[idx]
+        px, py = self.drag_pointer
         
         if self.drag_data["mode"] == "move":
-            dx_inch = (event.x - self.drag_data["start_x"]) / self.view_scale
-            dy_inch = (event.y - self.drag_data["start_y"]) / self.view_scale
-            mon.x = self.drag_data["orig_x"] + dx_inch
-            mon.y = self.drag_data["orig_y"] + dy_inch
-            self.refresh_ui_vars()
-            self.draw_preview()
+            dx_inch = (px - self.drag_data["start_x"]) / self.view_scale
+            dy_inch = (py - self.drag_data["start_y"]) / self.view_scale
+            new_x = self.drag_data["orig_x"] + dx_inch
+            new_y = self.drag_data["orig_y"] + dy_inch
+            if self.snap_engine:
+                new_x, new_y = self.snap_engine.snap_move(new_x, new_y, mon.phys_w, mon.phys_h, SNAP_DISTANCE_PX / self.view_scale)
+            mon.x = new_x
+            mon.y = new_y
             
         elif self.drag_data["mode"] == "resize":
-            dx_inch = (event.x - self.drag_data["start_x"]) / self.view_scale
-            old_w = mon.phys_w
-            new_w = max(1.0, old_w + dx_inch)
-            mon.diag = self.drag_data["orig_diag"] * (new_w / old_w)
-            self.refresh_ui_vars()
-            self.draw_preview()
+            # Scaled from the size at press, so the result doesn't depend on how many frames were drawn
+            dx_inch = (px - self.drag_data["start_x"]) / self.view_scale
+            orig_w = self.drag_data["orig_w"]
+            new_w = max(1.0, orig_w + dx_inch)
+            if self.snap_engine:
+                new_w = self.snap_engine.snap_resize(mon.x, mon.y, new_w, self.drag_data["orig_h"] * (new_w / orig_w), SNAP_DISTANCE_PX / self.view_scale)
+            mon.diag = self.drag_data["orig_diag"] * (new_w / orig_w)
+            
+        self.update_monitor_items(idx)
+        # Moving one monitor can grow/shrink the layout bounds, which shifts every crop.
+        # Monitors whose crop did not change are skipped by the media cache key.
+        for i in range(len(self.monitors)):
+            if i != idx:
+                self.update_monitor_media(i)
+        self.drag_stats["frames"] += 1
 
     def on_release(self, event):
+        was_dragging = self.drag_data["mode"] is not None
+        if self.drag_after_id is not None:
+            # Flush the last pending position so the drop lands where the pointer was
+            self.root.after_cancel(self.drag_after_id)
+            self.apply_drag_frame()
+            
         self.drag_data["mode"] = None
+        self.snap_engine = None
+        if was_dragging:
+            # Sidebar entries are only synced once the drag has finished, and only for that monitor
+            self.update_monitor_row(self.drag_data["idx"], ('diag', 'x', 'y'))
+            if DEBUG:
+                print(f"[drag] {self.drag_stats['events']} motion events -> {self.drag_stats['frames']} frames drawn")
         self.draw_preview() # Force re-center
 
     def draw_preview(self):
-        self.preview_canvas.delete("all")
-        if not self.monitors: return
+        if not self.monitors:
+            self.clear_canvas_scene()
+            return
 
         cw = self.preview_canvas.winfo_width()
         ch = self.preview_canvas.winfo_height()
@@ -529,10 +3858,8 @@ class OmniScreenForgeApp:
 
         # Do not recalculate bounds during drag, to prevent screen oscillation!
         if self.drag_data["mode"] is None:
-            self.bb_min_x = min([m.x for m in self.monitors] + [0])
-            self.bb_min_y = min([m.y for m in self.monitors] + [0])
-            self.bb_max_x = max([m.x + m.phys_w for m in self.monitors] + [1])
-            self.bb_max_y = max([m.y + m.phys_h for m in self.monitors] + [1])
+            with self.render_trace.span("canvas.layout"):
+                self.bb_min_x, self.bb_min_y, self.bb_max_x, self.bb_max_y = get_layout_plan(self.monitors).canvas_bounds
             self.box_w = self.bb_max_x - self.bb_min_x
             self.box_h = self.bb_max_y - self.bb_min_y
             
@@ -540,38 +3867,162 @@ class OmniScreenForgeApp:
             self.view_offset_x = (cw - self.box_w * self.view_scale) / 2 - self.bb_min_x * self.view_scale
             self.view_offset_y = (ch - self.box_h * self.view_scale) / 2 - self.bb_min_y * self.view_scale
 
-        # Draw physical bounding box backdrop
+        # Only rebuild the canvas items when monitors were added or removed
+        if self.scene_backdrop is None or len(self.scene_items) != len(self.monitors):
+            with self.render_trace.span("canvas.rebuild_scene"):
+                self.rebuild_canvas_scene()
+
+        # Physical bounding box backdrop
         bb_x1 = self.bb_min_x * self.view_scale + self.view_offset_x
         bb_y1 = self.bb_min_y * self.view_scale + self.view_offset_y
         bb_x2 = self.bb_max_x * self.view_scale + self.view_offset_x
         bb_y2 = self.bb_max_y * self.view_scale + self.view_offset_y
-        self.preview_canvas.create_rectangle(bb_x1, bb_y1, bb_x2, bb_y2, outline="#404040", dash=(4,4), fill="#121212")
+        self.preview_canvas.coords(self.scene_backdrop, bb_x1, bb_y1, bb_x2, bb_y2)
         
-        for i, m in enumerate(self.monitors):
-            x1 = m.x * self.view_scale + self.view_offset_x
-            y1 = m.y * self.view_scale + self.view_offset_y
-            w = m.phys_w * self.view_scale
-            h = m.phys_h * self.view_scale
-            
-            x2 = x1 + w
-            y2 = y1 + h
-            
-            # Gradient Morals theme colors
-            is_dragged = self.drag_data["idx"] == i
-            fill_color = "#0A0A0A" if not is_dragged else "#1A1A1A"
-            border_color = "#00FFFF" if not is_dragged else "#FF00FF"
-            text_color = "#ECF0F1"
-            subtext_color = "#BDC3C7"
-            os_color = "#FF00FF"
-            
-            self.preview_canvas.create_rectangle(x1, y1, x2, y2, fill=fill_color, outline=border_color, width=2)
-            self.preview_canvas.create_text((x1+x2)/2, y1 + 20, text=f"Screen {i+1} ({m.diag:.1f}\")", fill=text_color, font=("Segoe UI", 10, "bold"))
-            self.preview_canvas.create_text((x1+x2)/2, y1 + 40, text=f"Native OS: {m.res_w}x{m.res_h}", fill=subtext_color, font=("Segoe UI", 9))
-            self.preview_canvas.create_text((x1+x2)/2, y1 + 60, text=f"Virtual X,Y: {m.os_x}, {m.os_y}", fill=os_color, font=("Segoe UI", 8))
-            
-            # Resize notch
-            notch_color = border_color
-            self.preview_canvas.create_polygon(x2-12, y2, x2, y2, x2, y2-12, fill=notch_color)
+        with self.render_trace.span("canvas.update_items", monitors=len(self.monitors)):
+            for i in range(len(self.monitors)):
+                self.update_monitor_items(i)
+
+    def clear_canvas_scene(self):
+        self.preview_canvas.delete("all")
+        self.scene_backdrop = None
+        self.scene_items = []
+        self.scene_photos = {}
+        self.scene_media_keys = {}
+
+    def rebuild_canvas_scene(self):
+        self.clear_canvas_scene()
+        c = self.preview_canvas
+        self.scene_backdrop = c.create_rectangle(0, 0, 0, 0, outline="#404040", dash=(4,4), fill="#121212")
+        
+        # Gradient Morals theme colors (fill/border are set per-state in update_monitor_items)
+        text_color = "#ECF0F1"
+        subtext_color = "#BDC3C7"
+        os_color = "#FF00FF"
+        
+        for i in range(len(self.monitors)):
+            self.scene_items.append({
+                'rect': c.create_rectangle(0, 0, 0, 0, width=2),
+                'media': c.create_image(0, 0, anchor="nw"),
+                'title': c.create_text(0, 0, fill=text_color, font=("Segoe UI", 10, "bold")),
+                'res': c.create_text(0, 0, fill=subtext_color, font=("Segoe UI", 9)),
+                'os': c.create_text(0, 0, fill=os_color, font=("Segoe UI", 8)),
+                'notch': c.create_polygon(0, 0, 0, 0, 0, 0),
+            })
+
+    def update_monitor_items(self, idx):
+        if not (0 <= idx < len(self.scene_items)) or idx >= len(self.monitors):
+            return
+        c = self.preview_canvas
+        items = self.scene_items[idx]
+        m = self.monitors[idx]
+        
+        x1 = m.x * self.view_scale + self.view_offset_x
+        y1 = m.y * self.view_scale + self.view_offset_y
+        x2 = x1 + m.phys_w * self.view_scale
+        y2 = y1 + m.phys_h * self.view_scale
+        cx = (x1 + x2) / 2
+        
+        is_dragged = self.drag_data["idx"] == idx
+        fill_color = "#0A0A0A" if not is_dragged else "#1A1A1A"
+        border_color = "#00FFFF" if not is_dragged else "#FF00FF"
+        
+        c.coords(items['rect'], x1, y1, x2, y2)
+        c.itemconfig(items['rect'], fill=fill_color, outline=border_color)
+        c.coords(items['title'], cx, y1 + 20)
+        c.itemconfig(items['title'], text=f"Screen {idx+1} ({m.diag:.1f}\")")
+        c.coords(items['res'], cx, y1 + 40)
+        c.itemconfig(items['res'], text=f"Native OS: {m.res_w}x{m.res_h}")
+        c.coords(items['os'], cx, y1 + 60)
+        c.itemconfig(items['os'], text=f"Virtual X,Y: {m.os_x}, {m.os_y}")
+        
+        # Resize notch
+        c.coords(items['notch'], x2-12, y2, x2, y2, x2, y2-12)
+        c.itemconfig(items['notch'], fill=border_color)
+        
+        self.update_monitor_media(idx)
+
+    def update_monitor_media(self, idx):
+        if not (0 <= idx < len(self.scene_items)) or idx >= len(self.monitors):
+            return
+        c = self.preview_canvas
+        item = self.scene_items[idx]['media']
+        
+        if self.media_proxy is None or not self.show_media_preview.get():
+            if idx in self.scene_photos:
+                c.itemconfig(item, image="")
+                del self.scene_photos[idx]
+                self.scene_media_keys.pop(idx, None)
+            return
+            
+        m = self.monitors[idx]
+        plan = get_layout_plan(self.monitors)
+        # Inset by the 2px border so the outline stays visible
+        x1 = m.x * self.view_scale + self.view_offset_x + 1
+        y1 = m.y * self.view_scale + self.view_offset_y + 1
+        w = int(m.phys_w * self.view_scale) - 2
+        h = int(m.phys_h * self.view_scale) - 2
+        c.coords(item, x1, y1)
+        
+        crop = plan.monitors[idx].crop
+        key = (id(self.media_proxy), crop, plan.map_w, plan.map_h, w, h)
+        if self.scene_media_keys.get(idx) == key:
+            return
+        if w < 2 or h < 2:
+            c.itemconfig(item, image="")
+            self.scene_photos.pop(idx, None)
+            self.scene_media_keys[idx] = key
+            return
+            
+        from PIL import Image, ImageTk
+        import numpy as np
+        
+        # Nearest-neighbour resample of this monitor's crop, mapped from map pixels into the proxy
+        proxy = self.media_proxy
+        ph, pw = proxy.shape[:2]
+        crop_x, crop_y, crop_w, crop_h = crop
+        xs = ((np.arange(w) + 0.5) * (crop_w / w) + crop_x) * (pw / plan.map_w)
+        ys = ((np.arange(h) + 0.5) * (crop_h / h) + crop_y) * (ph / plan.map_h)
+        xs = np.clip(xs.astype(np.intp), 0, pw - 1)
+        ys = np.clip(ys.astype(np.intp), 0, ph - 1)
+        
+        photo = ImageTk.PhotoImage(Image.fromarray(proxy[ys[:, None], xs]))
+        self.scene_photos[idx] = photo # Maintain reference to avoid garbage collection
+        self.scene_media_keys[idx] = key
+        c.itemconfig(item, image=photo)
+
+    def request_media_proxy(self):
+        path = self.input_file.get()
+        key = None
+        if self.show_media_preview.get() and path.lower().endswith(IMAGE_EXTS + VIDEO_EXTS):
+            try:
+                key = (path, os.path.getmtime(path))
+            except OSError:
+                pass
+        if key == self.media_proxy_key:
+            self.draw_preview()
+            return
+            
+        self.media_proxy_key = key
+        self.media_proxy = None
+        self.draw_preview()
+        if key is None:
+            return
+            
+        # Decoding (or pulling a video's first frame through FFmpeg) happens off the Tk thread
+        def on_proxy(proxy):
+            if key != self.media_proxy_key:
+                return # Input changed while decoding
+            self.media_proxy = proxy
+            self.draw_preview()
+        self.run_in_background(lambda: load_media_proxy(path), on_proxy)
+
+    def save_ram_budget(self):
+        try:
+            self.last_dirs["ram_budget_mb"] = max(256, int(self.ram_budget_mb.get()))
+        except (tk.TclError, ValueError):
+            return
+        self.save_settings()
 
     def save_settings(self):
         try:
@@ -590,9 +4041,11 @@ class OmniScreenForgeApp:
                 pass
 
     def apply_window_dark_titlebar(self, window):
+        if os.name != 'nt':
+            return # DWM attributes only exist on Windows
         try:
             import ctypes
-            window.update() # Ensure window is drawn so hwnd is available
+            window.update_idletasks() # Map the window so the hwnd is available, without a full event pump
             hwnd = ctypes.windll.user32.GetParent(window.winfo_id())
             # DWMWA_USE_IMMERSIVE_DARK_MODE is 20 in Windows 11, 19 in Windows 10
             value = ctypes.c_int(2)
@@ -602,63 +4055,27 @@ class OmniScreenForgeApp:
 
     def generate_calibration_image(self):
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            import numpy as np
-            WIDTH = 3840
-            HEIGHT = 2160
-            OUTPUT_FILENAME = "gradient_morals_calibrator.png"
+            from PIL import Image
+            pattern = self.cal_pattern.get()
+            OUTPUT_FILENAME = CALIBRATION_PATTERNS[pattern]
 
-            # Create smooth multi-channel gradients
-            # We will divide the vertical space into 4 main bands: Gray, Red, Green, Blue
-            band_h = HEIGHT // 4
-            
-            # Create a 0-255 sweep across the width
-            sweep = np.linspace(0, 255, WIDTH, dtype=np.uint8)
-            sweep_2d = np.tile(sweep, (band_h, 1))
-            
-            # Master array
-            img_arr = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
-            
-            # Gray Band (0 to band_h)
-            img_arr[0:band_h, :, 0] = sweep_2d
-            img_arr[0:band_h, :, 1] = sweep_2d
-            img_arr[0:band_h, :, 2] = sweep_2d
-            
-            # Red Band
-            img_arr[band_h:band_h*2, :, 0] = sweep_2d
-            
-            # Green Band
-            img_arr[band_h*2:band_h*3, :, 1] = sweep_2d
-            
-            # Blue Band
-            img_arr[band_h*3:HEIGHT, :, 2] = sweep_2d
-            
-            img = Image.fromarray(img_arr, mode='RGB')
-            draw = ImageDraw.Draw(img)
+            if self.monitors:
+                # Every monitor gets the pattern at its native resolution, pasted where the OS puts it
+                plan = get_layout_plan(self.monitors)
+                patterns = self.calibration_patterns.render_many(pattern, [mp.res for mp in plan.monitors])
+                img = Image.new('RGB', (plan.out_w, plan.out_h), (0, 0, 0))
+                for mp, mon_img in zip(plan.monitors, patterns):
+                    img.paste(mon_img, mp.paste)
+            else:
+                img = self.calibration_patterns.get(pattern, 3840, 2160)
+
+            # Fast deflate: the patterns are flat colour and compress well even at level 1
+            img.save(OUTPUT_FILENAME, compress_level=1)
             
-            try:
-                font = ImageFont.truetype("arial.ttf", size=60)
-                font_small = ImageFont.truetype("arial.ttf", size=40)
-            except IOError:
-                font = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-                
-            labels = ["GRAY (Luma) 256-Level Sweep", "RED Channel 256-Level Sweep", "GREEN Channel 256-Level Sweep", "BLUE Channel 256-Level Sweep"]
+            # Running previews switch to the new pattern straight from memory
+            self.show_pattern_in_previews(pattern)
             
-            for i, label in enumerate(labels):
-                y_pos = i * band_h
-                # Background rect for text readability
-                draw.rectangle([10, y_pos + 10, 900, y_pos + 80], fill=(20, 20, 20))
-                draw.text((20, y_pos + 15), label, font=font, fill=(255, 255, 255))
-                
-                # Draw markers at 25%, 50%, 75%
-                for pct in [0.25, 0.50, 0.75]:
-                    mx = int(WIDTH * pct)
-                    draw.line([(mx, y_pos + band_h - 50), (mx, y_pos + band_h)], fill=(255, 255, 255), width=3)
-                    draw.text((mx - 30, y_pos + band_h - 100), f"{int(pct*100)}%", font=font_small, fill=(255,255,255))
-
-            img.save(OUTPUT_FILENAME, quality=100)
-            messagebox.showinfo("Success", f"Rich Calibration image generated successfully:\n{os.path.abspath(OUTPUT_FILENAME)}\n\nPlease span this image across all your monitors, or use Live Previews.")
+            messagebox.showinfo("Success", f"Calibration image generated successfully:\n{os.path.abspath(OUTPUT_FILENAME)}\n\nPlease span this image across all your monitors, or use Live Previews.")
             
             if os.name == 'nt':
                 os.startfile(OUTPUT_FILENAME)
@@ -667,95 +4084,27 @@ class OmniScreenForgeApp:
 
     def generate_omni_grid(self):
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib.patches as patches
-            import numpy as np
-
             # --- Configuration ---
             Resolution = 4096  # High res square image
-            Grid_Spacing = 16  # How many grid squares across
-            Line_Thickness = 2.0
-
-            # Colors (Cyberpunk Palette)
-            BG_COLOR = 'black'
-            GRID_COLOR = 'magenta'
-            ANGLE_COLOR = 'cyan'
-            CIRCLE_COLOR = 'lime' # Using lime for bright green
-
-            # --- Setup ---
-            fig, ax = plt.subplots(figsize=(20, 20), dpi=Resolution/20)
-            fig.patch.set_facecolor(BG_COLOR)
-            ax.set_facecolor(BG_COLOR)
-
-            # Ensure equal aspect ratio (squares look square)
-            ax.set_aspect('equal')
-
-            # Set limits and remove standard axes/ticks
-            ax.set_xlim(0, Grid_Spacing)
-            ax.set_ylim(0, Grid_Spacing)
-            ax.set_xticks([])
-            ax.set_yticks([])
-
-            # --- 1. The Magenta Grid & Numbering ---
-            for i in range(Grid_Spacing + 1):
-                # Vertical lines
-                ax.axvline(i, color=GRID_COLOR, linewidth=Line_Thickness/2, alpha=0.5)
-                # Horizontal lines
-                ax.axhline(i, color=GRID_COLOR, linewidth=Line_Thickness/2, alpha=0.5)
-                
-                # Numbering (1,1 is bottom left)
-                # Bottom edge numbers
-                if i > 0: ax.text(i - 0.5, 0.2, str(i), color=GRID_COLOR, ha='center', fontsize=12, fontweight='bold')
-                # Left edge numbers
-                if i > 0: ax.text(0.2, i - 0.5, str(i), color=GRID_COLOR, va='center', fontsize=12, fontweight='bold')
-
-
-            # --- 2. The Cyan Radial Angle Lines ---
-            angles = [15, 30, 45, 60, 75, 90]
-            corners = [(0,0), (Grid_Spacing, 0), (0, Grid_Spacing), (Grid_Spacing, Grid_Spacing)]
-
-            for cx, cy in corners:
-                for angle in angles:
-                    # Calculate end points based on which corner we are in
-                    if cx == 0 and cy == 0: # Bottom-Left
-                        rad = np.radians(angle)
-                        ex, ey = Grid_Spacing * 2 * np.cos(rad), Grid_Spacing * 2 * np.sin(rad)
-                    elif cx == Grid_Spacing and cy == 0: # Bottom-Right
-                        rad = np.radians(180 - angle)
-                        ex, ey = cx + Grid_Spacing * 2 * np.cos(rad), Grid_Spacing * 2 * np.sin(rad)
-                    elif cx == 0 and cy == Grid_Spacing: # Top-Left
-                        rad = np.radians(-angle)
-                        ex, ey = Grid_Spacing * 2 * np.cos(rad), cy + Grid_Spacing * 2 * np.sin(rad)
-                    elif cx == Grid_Spacing and cy == Grid_Spacing: # Top-Right
-                         rad = np.radians(180 + angle)
-                         ex, ey = cx + Grid_Spacing * 2 * np.cos(rad), cy + Grid_Spacing * 2 * np.sin(rad)
-                         
-                    ax.plot([cx, ex], [cy, ey], color=ANGLE_COLOR, linewidth=Line_Thickness, linestyle='--')
-
-
-            # --- 3. The Green Concentric Circles ---
-            center_x, center_y = Grid_Spacing / 2, Grid_Spacing / 2
-            max_radius = Grid_Spacing * 0.7
-            num_circles = 8
-
-            for i in range(1, num_circles + 1):
-                radius = (i / num_circles) * max_radius
-                circle = patches.Circle((center_x, center_y), radius, fill=False, edgecolor=CIRCLE_COLOR, linewidth=Line_Thickness)
-                ax.add_patch(circle)
-
-            # --- Final Formatting and Save ---
-            # Remove white border around the plot area
-            plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
             OUTPUT_FILENAME = 'Omni_Calibration_Grid.png'
-            plt.savefig(OUTPUT_FILENAME, facecolor=BG_COLOR, bbox_inches='tight', pad_inches=0)
-            plt.close(fig) # Prevent memory leak and plot display
+
+            img = render_omni_grid(Resolution, Resolution, Resolution / OMNI_GRID_CELLS)
+            img.save(OUTPUT_FILENAME)
+            saved = [os.path.abspath(OUTPUT_FILENAME)]
+
+            # Per-screen copies at native resolution, scaled to each panel's physical size
+            if self.monitors:
+                for i, mon_img in enumerate(render_omni_grid_per_monitor(self.monitors)):
+                    path = f'Omni_Calibration_Grid_Screen{i+1}.png'
+                    mon_img.save(path)
+                    saved.append(os.path.abspath(path))
             
-            messagebox.showinfo("Success", f"Omni Calibration Grid generated successfully:\n{os.path.abspath(OUTPUT_FILENAME)}\n\nPlease span this image across all your monitors to begin visual alignment.")
+            messagebox.showinfo("Success", "Omni Calibration Grid generated successfully:\n" + "\n".join(saved) + "\n\nPlease span this image across all your monitors to begin visual alignment, or show each Screen file on its matching monitor.")
             
             if os.name == 'nt':
                 os.startfile(OUTPUT_FILENAME)
         except ImportError:
-            messagebox.showerror("Error", "Missing required libraries. Please ensure matplotlib and numpy are installed.")
+            messagebox.showerror("Error", "Missing required libraries. Please ensure Pillow and numpy are installed.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate Omni Grid:\n{str(e)}")
 
@@ -782,6 +4131,12 @@ class OmniScreenForgeApp:
         self.create_bordered_button(btn_frame, text="2. Generate Omni Alignment Grid", command=self.generate_omni_grid, bg="#1A1A1A").grid(row=0, column=1, padx=(5, 0), sticky="ew")
         btn_frame.columnconfigure(0, weight=1)
         btn_frame.columnconfigure(1, weight=1)
+        
+        pattern_frame = ttk.Frame(btn_frame)
+        pattern_frame.grid(row=1, column=0, columnspan=2, sticky="w", pady=(8, 0))
+        ttk.Label(pattern_frame, text="Pattern:").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Combobox(pattern_frame, textvariable=self.cal_pattern, values=list(CALIBRATION_PATTERNS), state="readonly", width=12).pack(side=tk.LEFT)
+        self.create_bordered_button(pattern_frame, text="Preview Pattern Live", command=lambda: self.launch_live_previews(pattern=self.cal_pattern.get()), bg="#1A1A1A").pack(side=tk.LEFT, padx=10)
 
         config_frame = ttk.Frame(top)
         config_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -912,37 +4267,51 @@ class OmniScreenForgeApp:
         # Override the native window close (X button) to clean up previews
         top.protocol("WM_DELETE_WINDOW", lambda: [self.close_live_previews(), top.destroy()])
 
-    def launch_live_previews(self):
+    def launch_live_previews(self, pattern=None):
         from tkinter import filedialog
         from PIL import Image, ImageTk
         
         if self.preview_windows:
-            messagebox.showinfo("Info", "Live Previews are already running.")
+            if pattern:
+                self.show_pattern_in_previews(pattern)
+            else:
+                messagebox.showinfo("Info", "Live Previews are already running.")
             return
             
-        filepath = filedialog.askopenfilename(
-            title="Select Reference Image for Live Previews",
-            filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.webp")]
-        )
-        if not filepath:
-            return
+        if pattern is None:
+            filepath = filedialog.askopenfilename(
+                title="Select Reference Image for Live Previews",
+                filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.webp")]
+            )
+            if not filepath:
+                return
             
         try:
-            # We map the chosen image exactly as the render engine does
-            img = Image.open(filepath).convert('RGB')
-            self.base_reference_image = img
+            # Scale the preview image to 70% of the native resolution to fit cleanly 
+            # in a window without hiding taskbars or desktop features
+            scale_factor = 0.70
+            sizes = [(max(100, int(mon.res_w * scale_factor)), max(100, int(mon.res_h * scale_factor))) for mon in self.monitors]
+            
+            if pattern is None:
+                # We map the chosen image exactly as the render engine does, decoding only
+                # as many pixels as the largest preview window needs
+                target = (max(w for w, h in sizes), max(h for w, h in sizes))
+                img, decode = open_image_reduced(filepath, target)
+                self.base_reference_image = img
+                self.log_message(f"[Live Preview] {format_decode_stats(decode)}\n")
+            else:
+                # Patterns are generated at the preview size directly, in memory and in parallel
+                patterns = self.calibration_patterns.render_many(pattern, sizes)
             
             # Spawn a standard window on every single monitor
             for idx, mon in enumerate(self.monitors):
+                pw_w, pw_h = sizes[idx]
                 
-                # Scale the preview image to 70% of the native resolution to fit cleanly 
-                # in a window without hiding taskbars or desktop features
-                scale_factor = 0.70
-                pw_w = max(100, int(mon.res_w * scale_factor))
-                pw_h = max(100, int(mon.res_h * scale_factor))
-                
-                # Directly resize the full original image to the preview window size
-                seg_native = img.resize((pw_w, pw_h), Image.Resampling.LANCZOS)
+                if pattern is None:
+                    # Directly resize the full original image to the preview window size
+                    seg_native = img.resize((pw_w, pw_h), Image.Resampling.LANCZOS)
+                else:
+                    seg_native = patterns[idx]
                 
                 self.preview_images[idx] = seg_native
                 
@@ -993,36 +4362,51 @@ class OmniScreenForgeApp:
             sat = float(self.cal_vars[mon_idx]['sat'].get())
             
             # Apply exactly identical math as the Engine Render logic
-            edited_img = clean_img.copy()
+            trace = self.render_trace
+            with trace.span("preview.copy", monitor=mon_idx):
+                edited_img = clean_img.copy()
             
             if abs(sat - 1.0) > 0.02:
-                edited_img = ImageEnhance.Color(edited_img).enhance(sat)
+                with trace.span("preview.enhance", monitor=mon_idx):
+                    edited_img = ImageEnhance.Color(edited_img).enhance(sat)
                 
             if abs(bright) > 0.02:
-                edited_img = ImageEnhance.Brightness(edited_img).enhance(1.0 + bright)
+                with trace.span("preview.enhance", monitor=mon_idx):
+                    edited_img = ImageEnhance.Brightness(edited_img).enhance(1.0 + bright)
                 
             if any(abs(m - 1.0) > 0.02 for m in [gray, r, g, b, gamma]):
-                arr = np.array(edited_img, dtype=np.float32)
-                
-                arr[:, :, 0] *= (gray * r)
-                arr[:, :, 1] *= (gray * g)
-                arr[:, :, 2] *= (gray * b)
-                
-                if abs(gamma - 1.0) > 0.02:
-                    arr = 255.0 * np.power((arr / 255.0).clip(0, 1), 1.0 / gamma)
+                with trace.span("preview.calibrate", monitor=mon_idx):
+                    arr = np.array(edited_img, dtype=np.float32)
+                    
+                    arr[:, :, 0] *= (gray * r)
+                    arr[:, :, 1] *= (gray * g)
+                    arr[:, :, 2] *= (gray * b)
                     
-                np.clip(arr, 0, 255, out=arr)
-                edited_img = Image.fromarray(arr.astype(np.uint8))
+                    if abs(gamma - 1.0) > 0.02:
+                        arr = 255.0 * np.power((arr / 255.0).clip(0, 1), 1.0 / gamma)
+                        
+                    np.clip(arr, 0, 255, out=arr)
+                    edited_img = Image.fromarray(arr.astype(np.uint8))
                 
             # Convert to Tkinter PhotoImage and push to the on-screen label instantly
-            tk_img = ImageTk.PhotoImage(image=edited_img)
-            self.preview_tk_images[mon_idx] = tk_img # Maintain reference to avoid garbage collection
-            self.preview_labels[mon_idx].configure(image=tk_img)
+            with trace.span("preview.photo", monitor=mon_idx):
+                tk_img = ImageTk.PhotoImage(image=edited_img)
+                self.preview_tk_images[mon_idx] = tk_img # Maintain reference to avoid garbage collection
+                self.preview_labels[mon_idx].configure(image=tk_img)
             
         except Exception as e:
             # Silently catch math errors during typing/sliding to prevent crashing the UI loop
             pass
 
+    def show_pattern_in_previews(self, pattern):
+        if not self.preview_windows:
+            return
+        indices = list(self.preview_images)
+        patterns = self.calibration_patterns.render_many(pattern, [self.preview_images[idx].size for idx in indices])
+        for idx, img in zip(indices, patterns):
+            self.preview_images[idx] = img
+            self.update_preview(idx)
+
     def close_live_previews(self):
         for pw in self.preview_windows.values():
             pw.destroy()
@@ -1159,51 +4543,61 @@ class OmniScreenForgeApp:
             self.render_btn.set_colors(bg=hex_color, border=hex_color)
             
         self.shimmer_step += 1
-        self.root.after(100, self.start_shimmer)
+        self.animator.after("buttons", 100, self.start_shimmer)
+
+    def toggle_animations(self):
+        self.last_dirs["animations_enabled"] = self.animations_enabled.get()
+        self.save_settings()
+        self.animator.set_enabled(self.animations_enabled.get())
+
+    def update_view_menu(self):
+        rate = self.animator.wakeups_per_second()
+        reason = self.animator.pause_reason()
+        status = f" (paused: {reason})" if reason else ""
+        self.view_menu.entryconfigure(self.wakeups_menu_index, label=f"Animation wakeups: {rate:.1f}/s{status}")
+
+    def schedule_global_shimmer(self):
+        self.animator.after("global_shimmer", 30000, self.trigger_global_shimmer)
 
     def trigger_global_shimmer(self):
         self.global_shimmer_phase = 0
         self.animate_global_shimmer()
 
-    def draw_shimmer_frame(self, progress, base_img, lbl, photo_attr_name):
-        from PIL import Image, ImageTk, ImageDraw, ImageChops
-        overlay = Image.new('RGBA', base_img.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        w, h = base_img.size
-        center_x = int(progress * (w + h + 80)) - int(h/2) - 40
-        
-        # Widen the shimmer wave significantly
-        draw.line([(center_x - 15, 0), (center_x - h - 15, h)], fill=(0, 255, 255, 110), width=25)
-        draw.line([(center_x,      0), (center_x - h,      h)], fill=(255, 255, 255, 220), width=18)
-        draw.line([(center_x + 15, 0), (center_x - h + 15, h)], fill=(255, 0, 255, 110), width=25)
-        base_rgba = base_img.convert('RGBA')
-        r, g, b, alpha = base_rgba.split()
-        overlay_alpha = overlay.split()[3]
-        overlay.putalpha(ImageChops.darker(overlay_alpha, alpha))
-        shimmer_img = Image.alpha_composite(base_rgba, overlay)
-        photo = ImageTk.PhotoImage(shimmer_img)
+    def reset_global_shimmer(self):
+        # Put the logos and title back to their resting look
+        self.is_global_shimmering = False
+        if hasattr(self, 'logo_base_photo'):
+            self.logo_photo = self.logo_base_photo
+            self.logo_lbl.config(image=self.logo_photo)
+        if hasattr(self, 'logo2_base_photo'):
+            self.logo2_photo = self.logo2_base_photo
+            self.logo2_lbl.config(image=self.logo2_photo)
+        for i, lbl in enumerate(getattr(self, 'title_lbls', [])):
+            lbl.config(fg=self.title_base_colors[i])
+
+    def show_shimmer_frame(self, name, phase, lbl, photo_attr_name):
+        # Frames come from the pre-baked sprite sheet; each is turned into a PhotoImage only once
+        sheet, frame_index, h = self.shimmer_sheets[name]
+        k = frame_index.get(phase)
+        if k is None:
+            return
+        photo = self.shimmer_photos[name].get(k)
+        if photo is None:
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(sheet.crop((0, k * h, sheet.width, (k + 1) * h)))
+            self.shimmer_photos[name][k] = photo
         setattr(self, photo_attr_name, photo)
         lbl.config(image=photo)
 
     def animate_global_shimmer(self):
         self.is_global_shimmering = True
         
-        if self.global_shimmer_phase > 60:
-            self.is_global_shimmering = False
-            self.root.after(30000, self.trigger_global_shimmer)
-            if hasattr(self, 'logo_photo') and hasattr(self, 'base_logo_img'):
-                from PIL import ImageTk
-                self.logo_photo = ImageTk.PhotoImage(self.base_logo_img)
-                self.logo_lbl.config(image=self.logo_photo)
-            if hasattr(self, 'logo2_photo') and hasattr(self, 'base_logo2_img'):
-                from PIL import ImageTk
-                self.logo2_photo = ImageTk.PhotoImage(self.base_logo2_img)
-                self.logo2_lbl.config(image=self.logo2_photo)
-            for i, lbl in enumerate(getattr(self, 'title_lbls', [])):
-                lbl.config(fg=self.title_base_colors[i])
+        if self.global_shimmer_phase > SHIMMER_PHASES:
+            self.reset_global_shimmer()
+            self.schedule_global_shimmer()
             return
 
-        progress = self.global_shimmer_phase / 60.0
+        progress = self.global_shimmer_phase / SHIMMER_PHASES
 
         for i, lbl in enumerate(getattr(self, 'title_lbls', [])):
             char_pos = (i / len(self.title_lbls)) * 0.4
@@ -1215,18 +4609,14 @@ class OmniScreenForgeApp:
             else:
                 lbl.config(fg=self.title_base_colors[i])
 
-        if hasattr(self, 'base_logo_img'):
-            if 0.35 <= progress <= 0.65:
-                logo_prog = (progress - 0.35) / 0.30
-                self.draw_shimmer_frame(logo_prog, self.base_logo_img, self.logo_lbl, 'logo_photo')
+        if 'logo' in getattr(self, 'shimmer_sheets', {}):
+            self.show_shimmer_frame('logo', self.global_shimmer_phase, self.logo_lbl, 'logo_photo')
 
-        if hasattr(self, 'base_logo2_img'):
-            if 0.65 <= progress <= 0.95:
-                logo_prog = (progress - 0.65) / 0.30
-                self.draw_shimmer_frame(logo_prog, self.base_logo2_img, self.logo2_lbl, 'logo2_photo')
+        if 'logo2' in getattr(self, 'shimmer_sheets', {}):
+            self.show_shimmer_frame('logo2', self.global_shimmer_phase, self.logo2_lbl, 'logo2_photo')
 
         self.global_shimmer_phase += 1
-        self.root.after(40, self.animate_global_shimmer)
+        self.animator.after("global_shimmer", 40, self.animate_global_shimmer)
 
     def show_qr(self):
         qr_path = "qr-code.png"
@@ -1247,8 +4637,19 @@ class OmniScreenForgeApp:
         target_size = min(screen_w, screen_h) // 2
         
         try:
-            img = Image.open(qr_path)
-            img.thumbnail((target_size, target_size), Image.Resampling.LANCZOS)
+            from PIL import Image, ImageTk
+            cache = getattr(self, 'asset_cache', None) or AssetCache()
+            img = cache.load(qr_path, f"thumb-{target_size}")
+            if img is None:
+                # Decode the large source once and bake every common size alongside this one
+                src = Image.open(qr_path)
+                src.load()
+                for size in sorted(set(QR_THUMB_SIZES + (target_size,))):
+                    thumb = src.copy()
+                    thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+                    cache.store(qr_path, f"thumb-{size}", thumb)
+                    if size == target_size:
+                        img = thumb
             
             top.qr_image = ImageTk.PhotoImage(img)
             
@@ -1290,9 +4691,10 @@ class OmniScreenForgeApp:
             self.render_btn.set_text("Render Media!")
 
     def add_monitor_ui(self, config=None):
+        self.commit_monitor_rows()
         if config is None:
             if self.monitors:
-                max_x = max([m.x + m.phys_w for m in self.monitors])
+                max_x = get_layout_plan(self.monitors).max_phys_x
                 config = MonitorConfig(name=f"Monitor {len(self.monitors) + 1}", x=max_x + self.bezel_gap.get())
             else:
                 config = MonitorConfig(name=f"Monitor 1")
@@ -1300,117 +4702,109 @@ class OmniScreenForgeApp:
         self.refresh_monitor_list()
 
     def refresh_ui_vars(self):
-        for i, mon in enumerate(self.monitors):
-            if i in self.ui_vars:
-                self.ui_vars[i]['diag'].set(f"{mon.diag:.1f}")
-                self.ui_vars[i]['x'].set(f"{mon.x:.1f}")
-                self.ui_vars[i]['y'].set(f"{mon.y:.1f}")
+        for row in self.row_slots.values():
+            row.sync(('diag', 'x', 'y'))
+
+    def update_monitor_row(self, idx, fields=None):
+        # Monitors scrolled out of view have no row; they are synced when bound
+        row = self.row_slots.get(idx)
+        if row is not None:
+            row.sync(fields)
 
     def refresh_monitor_list(self):
-        for widget in self.mon_list_frame.winfo_children():
-            widget.destroy()
-        
-        self.ui_vars = {}
-        for i, mon in enumerate(self.monitors):
-            f = ttk.Frame(self.mon_list_frame, padding="8", relief=tk.RAISED)
-            f.pack(fill=tk.X, pady=4, padx=4)
-            
-            row1 = ttk.Frame(f)
-            row1.pack(fill=tk.X, pady=(0, 5))
-            ttk.Label(row1, text=f"Screen {i+1}", font=("Segoe UI", 11, "bold")).pack(side=tk.LEFT, padx=2)
-            self.create_bordered_button(row1, text="X Remove", command=lambda idx=i: self.remove_monitor(idx), fg="#FF00FF").pack(side=tk.RIGHT, padx=2)
-            
-            row2 = ttk.Frame(f)
-            row2.pack(fill=tk.X, pady=2)
-            ttk.Label(row2, text="Diag (\"):").pack(side=tk.LEFT, padx=(0, 5))
-            diag_str = tk.StringVar(value=f"{mon.diag:.1f}")
-            e1 = ttk.Entry(row2, textvariable=diag_str, width=6)
-            e1.pack(side=tk.LEFT, padx=(0, 15))
-            
-            ttk.Label(row2, text="Native Res:").pack(side=tk.LEFT, padx=(0, 5))
-            resw_v = tk.IntVar(value=mon.res_w)
-            e2 = ttk.Entry(row2, textvariable=resw_v, width=5)
-            e2.pack(side=tk.LEFT, padx=1)
-            ttk.Label(row2, text="x").pack(side=tk.LEFT)
-            resh_v = tk.IntVar(value=mon.res_h)
-            e3 = ttk.Entry(row2, textvariable=resh_v, width=5)
-            e3.pack(side=tk.LEFT)
-
-            row3 = ttk.Frame(f)
-            row3.pack(fill=tk.X, pady=2)
-            ttk.Label(row3, text="OS Virtual X,Y:").pack(side=tk.LEFT, padx=(0, 5))
-            osx_v = tk.IntVar(value=mon.os_x)
-            e4 = ttk.Entry(row3, textvariable=osx_v, width=6)
-            e4.pack(side=tk.LEFT, padx=1)
-            osy_v = tk.IntVar(value=mon.os_y)
-            e5 = ttk.Entry(row3, textvariable=osy_v, width=6)
-            e5.pack(side=tk.LEFT)
-
-            row4 = ttk.Frame(f)
-            row4.pack(fill=tk.X, pady=2)
-            ttk.Label(row4, text="Physical X,Y:").pack(side=tk.LEFT, padx=(0, 5))
-            x_str = tk.StringVar(value=f"{mon.x:.1f}")
-            e6 = ttk.Entry(row4, textvariable=x_str, width=6)
-            e6.pack(side=tk.LEFT, padx=1)
-            y_str = tk.StringVar(value=f"{mon.y:.1f}")
-            e7 = ttk.Entry(row4, textvariable=y_str, width=6)
-            e7.pack(side=tk.LEFT)
-
-            self.ui_vars[i] = {
-                'diag': diag_str, 'resw': resw_v, 'resh': resh_v,
-                'osx': osx_v, 'osy': osy_v, 'x': x_str, 'y': y_str
-            }
+        # Indices may now point at different monitors, so every visible row is re-bound. Rows
+        # forget their index first, or re-binding would commit a half-typed edit into
+        # whichever monitor now sits at the old index.
+        for row in self.mon_rows:
+            row.idx = None
+        self.row_slots = {}
+        self.layout_monitor_rows()
+        self.draw_preview()
 
-            def update_from_entries(event=None, idx=i):
-                try:
-                    m = self.monitors[idx]
-                    m.diag = float(self.ui_vars[idx]['diag'].get())
-                    m.res_w = int(self.ui_vars[idx]['resw'].get())
-                    m.res_h = int(self.ui_vars[idx]['resh'].get())
-                    m.os_x = int(self.ui_vars[idx]['osx'].get())
-                    m.os_y = int(self.ui_vars[idx]['osy'].get())
-                    m.x = float(self.ui_vars[idx]['x'].get())
-                    m.y = float(self.ui_vars[idx]['y'].get())
-                    # Force center refresh
-                    self.drag_data["mode"] = None
-                    self.draw_preview()
-                except ValueError: pass
-
-            for entry in [e1, e2, e3, e4, e5, e6, e7]:
-                entry.bind("<Return>", update_from_entries)
-                entry.bind("<FocusOut>", update_from_entries)
+    def scroll_monitor_list(self, *args):
+        self.mon_canvas.yview(*args)
+        self.layout_monitor_rows()
 
-        self.draw_preview()
+    def create_monitor_row(self):
+        row = MonitorRow(self, self.mon_canvas)
+        row.window = self.mon_canvas.create_window(4, 0, window=row.frame, anchor="nw", state="hidden")
+        self.mon_rows.append(row)
+        if self.row_height is None:
+            row.frame.update_idletasks()
+            self.row_height = row.frame.winfo_reqheight() + 8
+        return row
+
+    def layout_monitor_rows(self):
+        count = len(self.monitors)
+        if self.row_height is None:
+            if not count: return
+            self.create_monitor_row()
+        row_h = self.row_height
+        
+        self.mon_canvas.configure(scrollregion=(0, 0, self.mon_canvas.winfo_reqwidth(), count * row_h))
+        top = self.mon_canvas.canvasy(0)
+        view_h = max(self.mon_canvas.winfo_height(), row_h)
+        first = max(0, int(top // row_h))
+        last = min(count, int((top + view_h) // row_h) + 1)
+        visible = range(first, last)
+        
+        # Rows that stay visible keep their monitor; the rest are recycled
+        slots = {idx: row for idx, row in self.row_slots.items() if idx in visible}
+        bound = set(map(id, slots.values()))
+        free = [row for row in self.mon_rows if id(row) not in bound]
+        for idx in visible:
+            row = slots.get(idx)
+            if row is None:
+                row = free.pop() if free else self.create_monitor_row()
+                row.bind_monitor(idx)
+                slots[idx] = row
+            self.mon_canvas.coords(row.window, 4, idx * row_h + 4)
+            self.mon_canvas.itemconfigure(row.window, state="normal")
+        for row in free:
+            if row.idx is not None and row.has_focus():
+                row.commit()
+            row.idx = None
+            self.mon_canvas.itemconfigure(row.window, state="hidden")
+        self.row_slots = slots
+
+    def commit_monitor_rows(self):
+        """Commits a half-typed edit while the rows' indices still match self.monitors."""
+        for row in self.mon_rows:
+            if row.idx is not None and row.has_focus():
+                row.commit()
 
     def remove_monitor(self, idx):
+        self.commit_monitor_rows()
         self.monitors.pop(idx)
         self.refresh_monitor_list()
 
     def auto_detect_monitors(self):
-        try:
-            detected = get_monitors()
-            if detected:
-                self.monitors = []
-                for m in detected:
-                    diag = 24.0
-                    if m.width_mm and m.height_mm:
-                        diag = math.sqrt((m.width_mm / 25.4)**2 + (m.height_mm / 25.4)**2)
-                    
-                    phys_x = m.x / 100.0
-                    phys_y = m.y / 100.0
-                    
-                    self.add_monitor_ui(MonitorConfig(
-                        name=m.name or "Detected", 
-                        diag=diag,
-                        res_w=m.width, 
-                        res_h=m.height,
-                        x=phys_x,
-                        y=phys_y,
-                        os_x=m.x,
-                        os_y=m.y
-                    ))
-        except Exception as e:
-            print(f"Monitor detection failed: {e}")
+        # EDID enumeration can be slow on some machines, so it always runs off the Tk thread
+        self.detect_monitors_async(apply=True)
+
+    def apply_detected_monitors(self, detected):
+        if not detected:
+            return
+        self.monitors = []
+        for m in detected:
+            diag = 24.0
+            if m.get("width_mm") and m.get("height_mm"):
+                diag = math.sqrt((m["width_mm"] / 25.4)**2 + (m["height_mm"] / 25.4)**2)
+            
+            phys_x = m["x"] / 100.0
+            phys_y = m["y"] / 100.0
+            
+            self.monitors.append(MonitorConfig(
+                name=m.get("name") or "Detected", 
+                diag=diag,
+                res_w=m["width"], 
+                res_h=m["height"],
+                x=phys_x,
+                y=phys_y,
+                os_x=m["x"],
+                os_y=m["y"]
+            ))
+        self.refresh_monitor_list()
 
     def save_preset(self):
         file_path = filedialog.asksaveasfilename(
@@ -1454,16 +4848,47 @@ class OmniScreenForgeApp:
         is_img = input_path.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff'))
         
         if is_img:
+            # The chosen encode profile decides the default format offered first
+            profile = self.encode_profile.get()
+            profile_ext = ENCODE_PROFILES.get(profile, ENCODE_PROFILES[DEFAULT_ENCODE_PROFILE])["ext"]
+            filetypes = [("PNG Image", "*.png"), ("JPEG Image", "*.jpg *.jpeg"), ("Bitmap", "*.bmp"), ("WebP Image", "*.webp"), ("TIFF Image", "*.tiff")]
+            filetypes.sort(key=lambda ft: profile_ext not in ft[1])
             out_path = filedialog.asksaveasfilename(
                 title="Save Composited Image",
                 initialdir=self.last_dirs["media_out"],
-                defaultextension=".png", 
-                filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg *.jpeg"), ("Bitmap", "*.bmp"), ("WebP Image", "*.webp"), ("TIFF Image", "*.tiff"), ("All", "*.*")])
+                defaultextension=profile_ext, 
+                filetypes=filetypes + [("All", "*.*")])
             if not out_path: return
             self.last_dirs["media_out"] = os.path.dirname(out_path)
+            self.last_dirs["encode_profile"] = profile
             self.save_settings()
             
-            self.render_image(input_path, out_path)
+            if self.is_rendering:
+                messagebox.showwarning("Warning", "Already rendering!")
+                return
+            if self.render_on_server.get():
+                self.start_server_render("image", input_path, out_path, profile)
+                return
+            
+            self.is_rendering = True
+            self.render_trace = RenderTrace("image render")
+            self.governor = RenderGovernor(self.render_policy.get(), self.last_dirs.get("render_core_budget"))
+            self.begin_render_record("image", input_path, out_path)
+            self.animator.set_render_active(True)
+            self.render_btn.config(state=tk.DISABLED)
+            self.progress_var.set(0)
+            self.progress_label.config(text="Compositing Image...")
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.delete(1.0, tk.END)
+            self.log_text.config(state=tk.DISABLED)
+            
+            # Large panoramas can take a while; keep the Tk loop free while compositing
+            self.save_ram_budget()
+            ram_budget_mb = self.last_dirs.get("ram_budget_mb", DEFAULT_RAM_BUDGET_MB)
+            monitors = [m.copy() for m in self.monitors]
+            threading.Thread(target=self.render_image, args=(input_path, out_path, monitors, ram_budget_mb, profile, self.render_trace, self.governor),
+                             name="compositor", daemon=True).start()
+            self._process_log_queue()
             return
 
         out_path = filedialog.asksaveasfilename(
@@ -1475,155 +4900,137 @@ class OmniScreenForgeApp:
         self.last_dirs["media_out"] = os.path.dirname(out_path)
         self.save_settings()
 
-        min_phys_x = min([m.x for m in self.monitors])
-        min_phys_y = min([m.y for m in self.monitors])
-        max_phys_x = max([m.x + m.phys_w for m in self.monitors])
-        max_phys_y = max([m.y + m.phys_h for m in self.monitors])
-        
-        map_ppi = 100.0 # Virtual coordinate system scaling
-        map_w = int(max(1, (max_phys_x - min_phys_x) * map_ppi))
-        map_h = int(max(1, (max_phys_y - min_phys_y) * map_ppi))
-        map_w += map_w % 2
-        map_h += map_h % 2
-        
-        # Determine OS Virtual Desktop bounds (can be negative!)
-        min_os_x = min([m.os_x for m in self.monitors])
-        min_os_y = min([m.os_y for m in self.monitors])
-        max_os_x = max([m.os_x + m.res_w for m in self.monitors])
-        max_os_y = max([m.os_y + m.res_h for m in self.monitors])
-        
-        out_w = max(1, max_os_x - min_os_x)
-        out_h = max(1, max_os_y - min_os_y)
-        out_w += out_w % 2
-        out_h += out_h % 2
-        
-        splits = "".join([f"[m{i+1}]" for i in range(len(self.monitors))])
-        filter_str = f"[0:v]scale={map_w}:{map_h},split={len(self.monitors)}{splits};"
-        filter_str += f" color=c=black:s={out_w}x{out_h}[bg];"
-        
-        for i, mon in enumerate(self.monitors):
-            crop_w = int(mon.phys_w * map_ppi)
-            crop_h = int(mon.phys_h * map_ppi)
-            crop_x = int((mon.x - min_phys_x) * map_ppi)
-            crop_y = int((mon.y - min_phys_y) * map_ppi)
-            
-            crop_w += crop_w % 2
-            crop_h += crop_h % 2
-            crop_x += crop_x % 2
-            crop_y += crop_y % 2
-            
-            crop = f"crop={crop_w}:{crop_h}:{crop_x}:{crop_y}"
-            scale = f"scale={mon.res_w}:{mon.res_h}"
-            
-            # --- Absolute Color Calibration Math ---
-            m_gray = getattr(mon, 'cal_gray', 1.0)
-            m_r = getattr(mon, 'cal_r', 1.0)
-            m_g = getattr(mon, 'cal_g', 1.0)
-            m_b = getattr(mon, 'cal_b', 1.0)
-            
-            p_gamma = getattr(mon, 'gamma', 1.0)
-            p_bright = getattr(mon, 'brightness', 0.0)
-            p_sat = getattr(mon, 'saturation', 1.0)
-            
-            eq_filter = ""
-            if any(abs(m - 1.0) > 0.02 for m in [p_gamma, p_sat]) or abs(p_bright) > 0.02:
-                eq_filter += f",eq=gamma={p_gamma:.2f}:brightness={p_bright:.2f}:saturation={p_sat:.2f}"
-                
-            if any(abs(m - 1.0) > 0.02 for m in [m_gray, m_r, m_g, m_b]):
-                rr = m_gray * m_r
-                gg = m_gray * m_g
-                bb = m_gray * m_b
-                eq_filter += f",colorchannelmixer=rr={rr:.3f}:gg={gg:.3f}:bb={bb:.3f}"
-            
-            out_v = f"v{i+1}"
-            filter_str += f" [m{i+1}]{crop},{scale}{eq_filter}[{out_v}];"
-        
-        curr_bg = "bg"
-        for i, mon in enumerate(self.monitors):
-            out_bg = f"ov{i+1}" if i < len(self.monitors) - 1 else "outv"
-            paste_x = mon.os_x - min_os_x
-            paste_y = mon.os_y - min_os_y
-            # We must specify :shortest=1 so that the infinite black [bg] layer 
-            # stops generating when the finite [v{i+1}] source video ends!
-            filter_str += f" [{curr_bg}][v{i+1}]overlay={paste_x}:{paste_y}:shortest=1[{out_bg}];"
-            curr_bg = out_bg
-        
         try:
-            # Build the raw ffmpeg command list to avoid Python wrapper dictionary map mangling
-            cmd = ['ffmpeg', '-y', '-i', input_path, '-filter_complex', filter_str]
-            
-            # Map the combined video output
-            cmd.extend(['-map', '[outv]'])
-            
-            # Map the original audio if requested
-            if self.include_audio.get():
-                cmd.extend(['-map', '0:a?'])
-                cmd.extend(['-c:a', 'copy'])
-                
-            # Set video codec
-            cmd.extend(['-c:v', 'libx264', out_path])
-
             if self.is_rendering:
                 messagebox.showwarning("Warning", "Already rendering!")
                 return
+            if self.render_on_server.get():
+                self.start_server_render("video", input_path, out_path, None)
+                return
+            
+            trace = RenderTrace("video render")
+            # We need the total duration to calculate progress, and the frame rate for the graph.
+            with trace.span("ffmpeg.probe"):
+                duration, rate = probe_video(input_path)
+            
+            governor = RenderGovernor(self.render_policy.get(), self.last_dirs.get("render_core_budget"))
+            decimate = self.decimate_frames.get()
+            if not decimate:
+                global_args, thread_args = governor.ffmpeg_args()
+                with trace.span("ffmpeg.build_graph", monitors=len(self.monitors)):
+                    cmd = build_render_command(self.monitors, global_args + ['-i', input_path], thread_args + VIDEO_CODEC_ARGS + [out_path],
+                                               include_audio=self.include_audio.get(), rate=rate)
             
             self.is_rendering = True
+            self.render_trace = trace
+            self.governor = governor
+            self.begin_render_record("video", input_path, out_path)
+            self.animator.set_render_active(True)
             self.render_btn.config(state=tk.DISABLED)
             self.progress_var.set(0)
             self.log_text.config(state=tk.NORMAL)
             self.log_text.delete(1.0, tk.END)
             self.log_text.config(state=tk.DISABLED)
             
-            # We need the total duration to calculate progress.
-            try:
-                probe = ffmpeg.probe(input_path)
-                video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
-                duration = float(video_stream['duration']) if video_stream and 'duration' in video_stream else float(probe['format']['duration'])
-            except:
-                duration = 0
-            
+            if decimate:
+                # The analysis pass decodes the whole source, so it runs on the worker thread too
+                self.progress_label.config(text="Analyzing Frames...")
+                monitors = [m.copy() for m in self.monitors]
+                threading.Thread(target=self._run_decimated_render,
+                                 args=(input_path, out_path, monitors, self.include_audio.get(), duration, rate, trace, governor),
+                                 name="ffmpeg", daemon=True).start()
+                self._process_log_queue()
+                return
             self.progress_label.config(text="Starting FFmpeg Engine...")
 
-            threading.Thread(target=self._run_ffmpeg_thread, args=(cmd, out_path, duration), daemon=True).start()
+            threading.Thread(target=self._run_ffmpeg_thread, args=(cmd, out_path, duration, trace, governor),
+                             name="ffmpeg", daemon=True).start()
             self._process_log_queue()
                 
         except Exception as e:
             messagebox.showerror("Execution Error", f"Failed to start FFmpeg:\n{str(e)}")
+            self.governor = None
             self.is_rendering = False
+            self.animator.set_render_active(False)
             self.render_btn.config(state=tk.NORMAL)
 
-    def _run_ffmpeg_thread(self, cmd, out_path, total_duration):
+    def _run_decimated_render(self, input_path, out_path, monitors, include_audio, total_duration, rate, trace, governor):
+        """Worker thread of a render with "Skip Duplicate Frames": analysis pass, then _run_ffmpeg_thread.
+
+        monitors is a snapshot taken on the Tk thread, so layout edits during the render don't leak in.
+        """
+        self.log_queue.put(("log", "Analyzing source frames for duplicates...\n"))
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
+            cmd, info = prepare_video_render(input_path, out_path, monitors, include_audio=include_audio,
+                                             rate=rate, decimate=True, governor=governor, trace=trace)
+        except Exception as e:
+            governor.release()
+            self.log_queue.put(("error", str(e)))
+            return
+        if info is None:
+            self.log_queue.put(("log", "Frame analysis failed; rendering every frame.\n"))
+        try:
+            self._run_ffmpeg_thread(cmd, out_path, total_duration or (info["duration"] if info else 0), trace, governor,
+                                    decimation=info)
+        finally:
+            if info and info.get("still"):
+                with contextlib.suppress(OSError):
+                    os.remove(info["still"])
+
+    def _run_ffmpeg_thread(self, cmd, out_path, total_duration, trace, governor, decimation=None):
+        try:
+            with trace.span("ffmpeg.spawn"):
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    universal_newlines=True,
+                    creationflags=governor.creationflags()
+                )
+                governor.govern_process(process.pid)
+            spawned = time.perf_counter()
+            first_frame = None
+            sampler = ProcessSampler(process.pid, "ffmpeg", on_sample=lambda s: self.log_queue.put(("resources", s))).start()
 
             time_pattern = re.compile(r"time=(\d+):(\d+):(\d+\.\d+)")
+            frame_pattern = re.compile(r"frame=\s*(\d+)")
+            frames_out = None
 
             for line in process.stdout:
                 self.log_queue.put(("log", line))
+                frame = frame_pattern.search(line)
+                if frame:
+                    frames_out = int(frame.group(1))
                 
                 # Parse progress
                 match = time_pattern.search(line)
+                if match and first_frame is None:
+                    # Input open, graph setup and encoder init, until the first progress report
+                    first_frame = time.perf_counter()
+                    trace.record("ffmpeg.startup", spawned, first_frame)
+                    governor.apply() # Threads FFmpeg started before it was governed
                 if match and total_duration > 0:
                     hrs, mins, secs = map(float, match.groups())
                     curr_time = hrs * 3600 + mins * 60 + secs
                     progress = min(100.0, (curr_time / total_duration) * 100)
                     self.log_queue.put(("progress", progress))
 
+            # Output closed: take the last sample before the child is reaped
+            self.log_queue.put(("usage", sampler.stop()))
             process.wait()
+            trace.record("ffmpeg.encode", first_frame or spawned, time.perf_counter())
             
             if process.returncode == 0:
+                if decimation:
+                    self.log_queue.put(("decimation", decimation_stats(decimation, frames_out)))
                 self.log_queue.put(("done", out_path))
             else:
                 self.log_queue.put(("error", "FFmpeg exited with error status. See Engine Log."))
                 
         except Exception as e:
             self.log_queue.put(("error", str(e)))
+        finally:
+            governor.release()
 
     def _process_log_queue(self):
         try:
@@ -1638,17 +5045,33 @@ class OmniScreenForgeApp:
                 elif msg_type == "progress":
                     self.progress_var.set(data)
                     self.progress_label.config(text=f"Rendering: {data:.1f}%")
+                elif msg_type == "resources":
+                    self.resource_label.config(text=format_resource_sample(data))
+                elif msg_type == "usage":
+                    self.render_usage = data
+                    if data:
+                        self.log_message(format_resource_summary(data) + "\n")
+                elif msg_type == "decimation":
+                    self.current_render["decimation"] = data
+                    self.log_message(format_decimation(data) + "\n")
                 elif msg_type == "done":
                     self.progress_var.set(100)
                     self.progress_label.config(text="Render Engine Complete!")
+                    self.finish_render_trace()
+                    self.finish_render_record("done")
                     messagebox.showinfo("Success", f"Render complete: {data}")
                     self.is_rendering = False
+                    self.animator.set_render_active(False)
                     self.render_btn.config(state=tk.NORMAL)
                     return
                 elif msg_type == "error":
+                    title, data = data if isinstance(data, tuple) else ("FFmpeg Error", data)
                     self.progress_label.config(text="Render Engine Failed!")
-                    messagebox.showerror("FFmpeg Error", data)
+                    self.finish_render_trace()
+                    self.finish_render_record("failed")
+                    messagebox.showerror(title, data)
                     self.is_rendering = False
+                    self.animator.set_render_active(False)
                     self.render_btn.config(state=tk.NORMAL)
                     return
         except queue.Empty:
@@ -1657,98 +5080,309 @@ class OmniScreenForgeApp:
         if self.is_rendering:
             self.root.after(100, self._process_log_queue)
 
-    def render_image(self, input_path, output_path):
+    def finish_render_trace(self):
+        """Closes the render's trace, logs its timing table and starts a fresh one for UI work."""
+        trace = self.render_trace
+        trace.finish()
+        self.log_message(trace.report() + "\n")
+        self.last_render_trace = trace
+        self.render_trace = RenderTrace()
+
+    def begin_render_record(self, kind, input_path, output_path):
+        plan = get_layout_plan(self.monitors)
+        self.current_render = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "kind": kind,
+            "input": input_path,
+            "output": output_path,
+            "monitors": len(self.monitors),
+            "output_size": [plan.out_w, plan.out_h],
+        }
+        self.render_usage = None
+        self.resource_label.config(text="")
+        if self.governor:
+            self.current_render["policy"] = self.governor.policy
+            self.log_queue.put(("log", f"Render policy {self.governor.describe()}\n"))
+        self.ui_probe = UILatencyProbe(self.root, self.governor.policy if self.governor else "server").start()
+
+    def finish_render_record(self, status):
+        """Stores the finished render, with its stage timings and resource peaks/averages, in the render history."""
+        trace = self.last_render_trace
+        if "server" in self.current_render:
+            category = "server"
+        else:
+            category = "composite" if self.current_render.get("kind") == "image" else "ffmpeg"
+        latency = self.ui_probe.stop()
+        self.governor = None
+        if latency:
+            self.log_message(format_ui_latency(latency) + "\n")
+        record = dict(self.current_render, status=status, seconds=round(trace.t1 - trace.t0, 2),
+                      stages=trace.stage_seconds(category),
+                      resources=self.render_usage, ui_latency=latency)
+        history = self.last_dirs.setdefault("render_history", [])
+        history.append(record)
+        del history[:-RENDER_HISTORY_LIMIT]
+        self.save_settings()
+        if self.render_usage:
+            self.resource_label.config(text=f"{self.render_usage['process']}: peak RSS {self.render_usage['rss_peak_mb']:.0f} MB, "
+                                            f"avg CPU {self.render_usage['cpu_avg_pct']:.0f}%")
+
+    def export_render_trace(self):
+        trace = self.last_render_trace or self.render_trace
+        path = filedialog.asksaveasfilename(
+            title="Export Render Trace",
+            initialdir=self.last_dirs.get("media_out", os.path.expanduser("~")),
+            initialfile=f"{trace.label.replace(' ', '_')}_trace.json",
+            defaultextension=".json",
+            filetypes=[("Chrome Trace JSON", "*.json"), ("All files", "*.*")])
+        if not path: return
+        try:
+            trace.save_chrome_trace(path)
+            self.log_message(f"Trace of the {trace.label} written to {path} (open in chrome://tracing or ui.perfetto.dev)\n")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export trace:\n{str(e)}")
+
+    def set_render_policy(self):
+        policy = self.render_policy.get()
+        self.last_dirs["render_policy"] = policy
+        self.save_settings()
+        governor = self.governor
+        if governor and self.is_rendering:
+            notes = governor.set_policy(policy)
+            self.ui_probe.set_label(policy)
+            self.log_message(f"Render policy switched to {governor.describe()}\n" + "".join(f"  {n}\n" for n in notes))
+
+    def configure_core_budget(self):
+        from tkinter import simpledialog
+        cores = len(RenderGovernor().all_cores)
+        budget = simpledialog.askinteger("Background Core Budget", f"Cores a background-priority render may use (1-{cores}):",
+                                         initialvalue=RenderGovernor(core_budget=self.last_dirs.get("render_core_budget")).core_budget,
+                                         minvalue=1, maxvalue=cores, parent=self.root)
+        if budget is None: return
+        self.last_dirs["render_core_budget"] = budget
+        self.save_settings()
+        governor = self.governor
+        if governor and self.is_rendering:
+            governor.core_budget = budget
+            governor.apply()
+            self.log_message(f"Render policy {governor.describe()}\n")
+
+    def toggle_decimate_frames(self):
+        self.last_dirs["decimate_frames"] = self.decimate_frames.get()
+        self.save_settings()
+
+    def render_server_client(self):
+        return RenderServerClient(self.last_dirs.get("render_server", ""), token=self.last_dirs.get("render_server_token"))
+
+    def configure_render_server(self):
+        from tkinter import simpledialog
+        url = simpledialog.askstring("Render Server", "Render server URL (e.g. http://render-host:8765).\n"
+                                     "Leave blank to render on this machine.",
+                                     initialvalue=self.last_dirs.get("render_server", ""), parent=self.root)
+        if url is None: return
+        self.last_dirs["render_server"] = url.strip()
+        self.render_on_server.set(bool(url.strip()))
+        self.toggle_render_on_server()
+
+    def toggle_render_on_server(self):
+        if self.render_on_server.get() and not self.last_dirs.get("render_server"):
+            self.render_on_server.set(False)
+            self.configure_render_server()
+            return
+        self.last_dirs["render_on_server"] = self.render_on_server.get()
+        self.save_settings()
+        if self.render_on_server.get():
+            self.check_render_server()
+
+    def check_render_server(self):
+        client = self.render_server_client()
+        def probe():
+            try:
+                status = client.status()
+            except (ConnectionError, RuntimeError) as e:
+                return f"{e}\n"
+            busy = sum(1 for w in status["workers"].values() if w["job"])
+            return (f"Render server {client.url}: {len(status['workers'])} workers seen ({busy} busy), "
+                    f"{status['jobs']['queued']} jobs queued\n")
+        self.run_in_background(probe, self.log_message)
+
+    def start_server_render(self, kind, input_path, out_path, profile):
+        """Queues the render on the render server instead of running it here; its workers must see the same paths."""
+        client = self.render_server_client()
+        self.save_ram_budget()
+        spec = {"input": os.path.abspath(input_path), "output": os.path.abspath(out_path),
+                "preset": [m.to_dict() for m in self.monitors], "profile": profile,
+                "include_audio": self.include_audio.get(), "decimate": self.decimate_frames.get(),
+                "ram_budget_mb": self.last_dirs.get("ram_budget_mb", DEFAULT_RAM_BUDGET_MB)}
+        
+        self.is_rendering = True
+        self.render_trace = RenderTrace(f"{kind} render on server")
+        self.governor = None
+        self.begin_render_record(kind, input_path, out_path)
+        self.current_render["server"] = client.url
+        self.animator.set_render_active(True)
+        self.render_btn.config(state=tk.DISABLED)
+        self.progress_var.set(0)
+        self.progress_label.config(text="Submitting to Render Server...")
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.config(state=tk.DISABLED)
+        
+        threading.Thread(target=self._run_server_render, args=(client, spec, self.render_trace),
+                         name="render-client", daemon=True).start()
+        self._process_log_queue()
+
+    def _run_server_render(self, client, spec, trace):
+        # Polls the job and feeds its progress, log and worker resources into the log queue like a local render
+        try:
+            with trace.span("server.submit"):
+                job = client.submit(spec)
+            self.log_queue.put(("log", f"Submitted job {job['id']} to {client.url}\n"))
+            # Queue and render spans come from the server's timestamps, not from when we happened to poll
+            offset = time.perf_counter() - job["submitted"]
+            announced = False
+            seen_lines = 0
+            failures = 0
+            while job["state"] not in ("done", "failed", "cancelled"):
+                time.sleep(RENDER_HEARTBEAT_S)
+                try:
+                    job = client.job(job["id"])
+                    failures = 0
+                except ConnectionError as e:
+                    failures += 1
+                    if failures * RENDER_HEARTBEAT_S >= RENDER_JOB_LEASE_S:
+                        raise
+                    self.log_queue.put(("log", f"{e}; retrying\n"))
+                    continue
+                new_lines = job["log_total"] - seen_lines
+                for line in job["log"][-new_lines:] if new_lines else []:
+                    self.log_queue.put(("log", line))
+                seen_lines = job["log_total"]
+                if job["state"] == "running":
+                    if not announced:
+                        announced = True
+                        self.log_queue.put(("log", f"Job {job['id']} running on {job['worker']}\n"))
+                    self.log_queue.put(("progress", job["progress"] * 100))
+                    if job["resources"]:
+                        self.log_queue.put(("resources", dict(job["resources"], label=f"{job['worker']} {job['resources']['label']}")))
+            if job["started"] is not None:
+                trace.record("server.queued", job["submitted"] + offset, job["started"] + offset)
+                trace.record("server.render", job["started"] + offset, job["finished"] + offset, worker=job["worker"])
+            result = job["result"] or {}
+            self.log_queue.put(("usage", result.get("usage")))
+            if result.get("decimation"):
+                self.log_queue.put(("decimation", result["decimation"]))
+            if job["state"] == "done":
+                self.log_queue.put(("done", result.get("output", spec["output"])))
+            elif job["state"] == "cancelled":
+                self.log_queue.put(("error", ("Render Server", f"Job {job['id']} was cancelled.")))
+            else:
+                self.log_queue.put(("error", ("Render Server", f"Job {job['id']} failed on {job['worker']}:\n{job['error']}")))
+        except (ConnectionError, RuntimeError) as e:
+            self.log_queue.put(("error", ("Render Server", str(e))))
+
+    def render_image(self, input_path, output_path, monitors, ram_budget_mb, profile, trace=None, governor=None):
+        # Runs on a worker thread; results go back through the log queue. monitors is a
+        # snapshot, so edits made in the UI meanwhile can't mix geometry between strips.
+        # Compositing runs in this process, so the sampler watches the app itself
+        # and the governor this thread and its encoder pool.
+        if governor:
+            governor.govern_threads(threading.current_thread().name)
+        sampler = ProcessSampler(os.getpid(), "compositor", on_sample=lambda s: self.log_queue.put(("resources", s))).start()
         try:
-            img = Image.open(input_path).convert('RGB')
-            
-            min_phys_x = min([m.x for m in self.monitors])
-            min_phys_y = min([m.y for m in self.monitors])
-            max_phys_x = max([m.x + m.phys_w for m in self.monitors])
-            max_phys_y = max([m.y + m.phys_h for m in self.monitors])
-            
-            map_ppi = 100.0
-            map_w = int(max(1, (max_phys_x - min_phys_x) * map_ppi))
-            map_h = int(max(1, (max_phys_y - min_phys_y) * map_ppi))
-            mapped_img = img.resize((map_w, map_h), Image.Resampling.LANCZOS)
-            
-            min_os_x = min([m.os_x for m in self.monitors])
-            min_os_y = min([m.os_y for m in self.monitors])
-            max_os_x = max([m.os_x + m.res_w for m in self.monitors])
-            max_os_y = max([m.os_y + m.res_h for m in self.monitors])
-            
-            out_w = max(1, max_os_x - min_os_x)
-            out_h = max(1, max_os_y - min_os_y)
-            master_canvas = Image.new('RGB', (out_w, out_h), (0, 0, 0))
-            
-            for mon in self.monitors:
-                crop_x = int((mon.x - min_phys_x) * map_ppi)
-                crop_y = int((mon.y - min_phys_y) * map_ppi)
-                crop_w = int(mon.phys_w * map_ppi)
-                crop_h = int(mon.phys_h * map_ppi)
-                
-                seg = mapped_img.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
-                seg_native = seg.resize((mon.res_w, mon.res_h), Image.Resampling.LANCZOS)
-                
-                # --- Absolute Color Calibration Math (PIL) ---
-                m_gray = getattr(mon, 'cal_gray', 1.0)
-                m_r = getattr(mon, 'cal_r', 1.0)
-                m_g = getattr(mon, 'cal_g', 1.0)
-                m_b = getattr(mon, 'cal_b', 1.0)
-                
-                p_gamma = getattr(mon, 'gamma', 1.0)
-                p_bright = getattr(mon, 'brightness', 0.0)
-                p_sat = getattr(mon, 'saturation', 1.0)
-                
-                if abs(p_sat - 1.0) > 0.02:
-                    from PIL import ImageEnhance
-                    enhancer = ImageEnhance.Color(seg_native)
-                    seg_native = enhancer.enhance(p_sat)
-                    
-                if abs(p_bright) > 0.02:
-                    from PIL import ImageEnhance
-                    # FFmpeg brightness is -1.0 to 1.0. PIL is a multiplier where 1.0 is original.
-                    # We map FFmpeg's additive offset into a rough PIL multiplier (1.0 + brightness).
-                    enhancer = ImageEnhance.Brightness(seg_native)
-                    seg_native = enhancer.enhance(1.0 + p_bright)
-                    
-                if any(abs(m - 1.0) > 0.02 for m in [m_gray, m_r, m_g, m_b, p_gamma]):
-                    # Apply raw RGB channel math and Gamma on a per-pixel array basis
-                    import numpy as np
-                    
-                    rr = m_gray * m_r
-                    gg = m_gray * m_g
-                    bb = m_gray * m_b
-                    
-                    arr = np.array(seg_native, dtype=np.float32)
-                    arr[:, :, 0] *= rr
-                    arr[:, :, 1] *= gg
-                    arr[:, :, 2] *= bb
-                    
-                    if abs(p_gamma - 1.0) > 0.02:
-                        # Standard simple gamma correction: V_out = V_in ** (1/gamma)
-                        arr = 255.0 * np.power((arr / 255.0).clip(0, 1), 1.0 / p_gamma)
-                        
-                    np.clip(arr, 0, 255, out=arr)
-                    seg_native = Image.fromarray(arr.astype(np.uint8))
-                    
-                paste_x = mon.os_x - min_os_x
-                paste_y = mon.os_y - min_os_y
-                master_canvas.paste(seg_native, (paste_x, paste_y))
-            
             valid_img_exts = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff')
             if not output_path.lower().endswith(valid_img_exts): 
-                output_path += ".png"
-            master_canvas.save(output_path)
-            messagebox.showinfo("Success", f"Raster completed successfully:\n{output_path}")
-            
+                output_path += ENCODE_PROFILES.get(profile, ENCODE_PROFILES[DEFAULT_ENCODE_PROFILE])["ext"]
+            stats = composite_image(input_path, output_path, monitors, ram_budget_mb=ram_budget_mb,
+                                    progress=lambda f: self.log_queue.put(("progress", f * 100)), profile=profile, trace=trace)
+            self.log_queue.put(("log", f"Composited {stats['source'][0]}x{stats['source'][1]} -> {stats['output'][0]}x{stats['output'][1]} "
+                                       f"({stats['mode']}, {stats['reader']} reader, {stats['bands']} bands) in {stats['seconds']:.2f}s\n"))
+            if "decode" in stats:
+                self.log_queue.put(("log", format_decode_stats(stats["decode"]) + "\n"))
+            enc = stats["encode"]
+            self.log_queue.put(("log", f"Encoded with {enc['profile']}: {enc['bytes'] / 1048576:.1f} MB in {enc['encode_s']:.2f}s\n"))
+            self.log_queue.put(("usage", sampler.stop()))
+            self.log_queue.put(("done", output_path))
         except Exception as e:
-            messagebox.showerror("Raster Error", f"Failed to generate composite image.\n{str(e)}")
+            self.log_queue.put(("usage", sampler.stop()))
+            self.log_queue.put(("error", ("Raster Error", f"Failed to generate composite image.\n{str(e)}")))
+        finally:
+            if governor:
+                governor.release()
 
-if __name__ == "__main__":
-    try:
-        from tkinterdnd2 import TkinterDnD
-        root = TkinterDnD.Tk()
-    except ImportError:
-            root = tk.Tk()
-    app = OmniScreenForgeApp(root)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OmniScreen Forge - Universal Multi-Monitor Rescaler")
+    parser.add_argument("--profile-startup", nargs="?", const=True, default=False, metavar="JSON_PATH",
+                        help="Print a timed breakdown of startup (optionally also written to JSON_PATH).")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="Quit as soon as the window is interactive (for scripted startup timing).")
+    watch = parser.add_argument_group("watch-folder daemon", "Render new or changed media from folders without the GUI.")
+    watch.add_argument("--watch", nargs="+", metavar="DIR", help="Folders to watch; runs headless instead of opening the window.")
+    watch.add_argument("--output", metavar="DIR", help="Where rendered files and the manifest go (required with --watch).")
+    watch.add_argument("--preset", metavar="JSON", help="Layout preset to render with (default: the last preset used in the app).")
+    watch.add_argument("--encode-profile", choices=list(ENCODE_PROFILES), help="Still output profile (default: the app's).")
+    watch.add_argument("--workers", type=int, default=WATCH_DEFAULT_WORKERS, help="Renders running at once; they share the RAM budget.")
+    watch.add_argument("--poll-interval", type=float, default=WATCH_POLL_INTERVAL_S, metavar="S", help="Polling period without inotify.")
+    watch.add_argument("--polling", action="store_true", help="Poll even where inotify is available (e.g. network shares).")
+    watch.add_argument("--no-audio", action="store_true", help="Drop source audio from rendered videos.")
+    watch.add_argument("--decimate", action="store_true",
+                       help="Skip near-duplicate video frames (variable frame rate output); static videos render as a looped still.")
+    watch.add_argument("--once", action="store_true", help="Render what is pending and exit instead of watching (also for --worker).")
+    server = parser.add_argument_group("render server", "Queue render jobs on a server and render them on a pool of worker processes.")
+    server.add_argument("--serve", nargs="?", const=f"127.0.0.1:{RENDER_SERVER_PORT}", metavar="[HOST:]PORT",
+                        help=f"Run the job server (default 127.0.0.1:{RENDER_SERVER_PORT}; use 0.0.0.0:PORT for workers on other hosts).")
+    server.add_argument("--local-workers", type=int, default=0, metavar="N", help="With --serve, also start N worker processes on this machine.")
+    server.add_argument("--worker", metavar="URL", help="Render jobs pulled from the server at URL.")
+    server.add_argument("--worker-name", help="Name the worker reports (default: host-pid).")
+    server.add_argument("--token", help="Shared secret the server requires from clients and workers.")
+    parser.add_argument("--render-policy", choices=list(RENDER_POLICIES),
+                        help="Govern headless renders (--watch, --worker): background keeps them to --render-cores at low "
+                             "CPU and I/O priority, turbo uses every core.")
+    parser.add_argument("--render-cores", type=int, metavar="N",
+                        help=f"Core budget of background renders (default: all but {RENDER_RESERVED_CORES}).")
+    parser.add_argument("--watch-stalls", nargs="?", type=float, const=STALL_THRESHOLD_MS, default=None, metavar="MS",
+                        help=f"Log every Tk event-loop stall longer than MS (default {STALL_THRESHOLD_MS}) with a stack sample, "
+                             "and print the worst stalls on exit.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.watch:
+        if not args.output:
+            print("--watch needs --output DIR")
+            return 2
+        return run_watch_daemon(args)
+    if args.serve:
+        return run_render_server(args)
+    if args.worker:
+        return run_render_worker(args)
+    profiler = StartupProfiler(enabled=bool(args.profile_startup))
+    profiler.record("imports", _MODULE_T0, time.perf_counter())
+    
+    with profiler.stage("tk root"):
+        try:
+            from tkinterdnd2 import TkinterDnD
+            root = TkinterDnD.Tk()
+        except ImportError:
+                root = tk.Tk()
+    app = OmniScreenForgeApp(root, profiler=profiler)
+    
+    def finish_startup_profile():
+        if isinstance(args.profile_startup, str):
+            with open(args.profile_startup, 'w') as f:
+                json.dump(profiler.to_dict(), f, indent=2)
+        if args.exit_after_startup:
+            root.destroy()
+    profiler.on_finished.append(finish_startup_profile)
+    
+    watchdog = None
+    if args.watch_stalls is not None:
+        watchdog = StallWatchdog(root, threshold_ms=args.watch_stalls).start()
+        app.attach_watchdog(watchdog)
     root.mainloop()
+    if watchdog:
+        watchdog.stop()
+        print(watchdog.report())
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Golden-image and performance regression gate for OmniScreen Forge.
+
+Renders every case in regression/cases.json through the still compositor (composite_image)
+and the video filter graph (build_render_command), compares the pixels with the stored
+goldens within each case's tolerances, and compares throughput with the stored baseline.
+Exits non-zero if any output drifts (crop geometry, scaling, calibration) or any case got
+slower than the baseline by more than --max-slowdown percent. Each timed sample repeats a
+render back to back for at least MIN_SAMPLE_S, and the median sample counts, so a single
+short render's timing noise can't fail the gate.
+
+    python regression_gate.py                    # check everything
+    python regression_gate.py --update-goldens   # after an intended change of the output
+    python regression_gate.py --update-baseline  # re-record throughput on the reference machine
+"""
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import main as forge
+from benchmark_compositor import environment
+
+REGRESSION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regression")
+CASES_FILE = os.path.join(REGRESSION_DIR, "cases.json")
+BASELINE_FILE = os.path.join(REGRESSION_DIR, "baseline.json")
+GOLDEN_DIR = os.path.join(REGRESSION_DIR, "golden")
+
+# Pixel tolerances, overridable per case: mean absolute difference over all channels, and the
+# fraction of channel values allowed to differ by more than "pixel" levels
+DEFAULT_TOLERANCE = {"mean": 0.5, "pixel": 16, "fraction": 0.001}
+DEFAULT_MAX_SLOWDOWN_PCT = 50.0 # Run-to-run noise of the median reached 39% on the shared 1-CPU reference VM
+DEFAULT_REPEAT = 9
+MIN_SAMPLE_S = 1.0 # Shortest timed sample; quick cases render several times per sample
+METRIC_UNITS = {"output_mp_per_s": "MP/s", "fps": "fps"}
+
+def corpus_path(name):
+    return os.path.join(REGRESSION_DIR, name)
+
+def load_monitors(case):
+    """Monitors of a case: its preset loaded like the app does, plus per-monitor calibration."""
+    with open(corpus_path(case["preset"])) as f:
+        monitors = [forge.MonitorConfig.from_dict(d) for d in json.load(f)]
+    for idx, values in case.get("calibration", {}).items():
+        for key, value in values.items():
+            setattr(monitors[int(idx)], key, value)
+    return monitors
+
+def compare_images(output_path, golden_path, tolerance, diff_path=None):
+    """Compares an output with its golden. Returns the diff stats and whether they pass."""
+    import numpy as np
+    from PIL import Image
+    with Image.open(output_path) as out, Image.open(golden_path) as gold:
+        a = np.asarray(out.convert("RGB"), dtype=np.int16)
+        b = np.asarray(gold.convert("RGB"), dtype=np.int16)
+    if a.shape != b.shape:
+        return {"ok": False, "reason": f"size {a.shape[1]}x{a.shape[0]} != golden {b.shape[1]}x{b.shape[0]}"}
+    diff = np.abs(a - b)
+    stats = {
+        "mean_abs": round(float(diff.mean()), 4),
+        "max_abs": int(diff.max()),
+        "over_fraction": round(float((diff > tolerance["pixel"]).mean()), 6),
+    }
+    stats["ok"] = stats["mean_abs"] <= tolerance["mean"] and stats["over_fraction"] <= tolerance["fraction"]
+    if not stats["ok"]:
+        stats["reason"] = f"mean {stats['mean_abs']} (max {tolerance['mean']}), {stats['over_fraction']:.4%} over {tolerance['pixel']} levels"
+        if diff_path:
+            # Amplified difference, so small drifts are visible
+            Image.fromarray(np.clip(diff * 8, 0, 255).astype(np.uint8)).save(diff_path)
+            stats["diff_image"] = diff_path
+    return stats
+
+def check_goldens(case, outputs, args):
+    """Compares (or with --update-goldens, replaces) each (output, golden name) pair of a case."""
+    tolerance = dict(DEFAULT_TOLERANCE, **case.get("tolerance", {}))
+    results = []
+    for output_path, golden_name in outputs:
+        golden_path = os.path.join(GOLDEN_DIR, golden_name)
+        if args.update_goldens or not os.path.exists(golden_path):
+            from PIL import Image
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with Image.open(output_path) as img:
+                img.save(golden_path, optimize=True) # Same pixels, smaller repository
+            results.append({"golden": golden_name, "ok": True, "updated": True})
+            continue
+        diff_path = os.path.join(args.workdir, f"diff_{golden_name}")
+        results.append(dict(compare_images(output_path, golden_path, tolerance, diff_path), golden=golden_name))
+    return results
+
+def timed_samples(render, warmup_s, repeat):
+    """Times repeat samples of render() calls, each batch at least MIN_SAMPLE_S long by the warm-up's estimate.
+
+    Returns (renders per sample, seconds per render of every sample).
+    """
+    per_sample = max(1, math.ceil(MIN_SAMPLE_S / max(warmup_s, 1e-3)))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(per_sample):
+            render()
+        samples.append((time.perf_counter() - started) / per_sample)
+    return per_sample, samples
+
+def run_image_case(case, args):
+    monitors = load_monitors(case)
+    profile = case.get("profile", "PNG Fast")
+    output_path = os.path.join(args.workdir, f"{case['name']}{forge.ENCODE_PROFILES[profile]['ext']}")
+    def render():
+        return forge.composite_image(corpus_path(case["input"]), output_path, monitors,
+                                     ram_budget_mb=case.get("ram_budget_mb", forge.DEFAULT_RAM_BUDGET_MB), profile=profile)
+
+    # The first render is checked against the golden and doubles as the untimed warm-up
+    started = time.perf_counter()
+    stats = render()
+    warmup_s = time.perf_counter() - started
+    if case.get("expect_mode") and stats["mode"] != case["expect_mode"]:
+        # The case no longer exercises the path it was written for
+        return {"mode": stats["mode"], "goldens": [{"golden": case["name"], "ok": False,
+                "reason": f"rendered {stats['mode']}, case expects {case['expect_mode']}"}]}
+    goldens = check_goldens(case, [(output_path, case["name"] + ".png")], args)
+    per_sample, samples = timed_samples(render, warmup_s, args.repeat)
+    wall = statistics.median(samples)
+    out_mp = stats["output"][0] * stats["output"][1] / 1e6
+    return {"mode": stats["mode"], "wall_s": round(wall, 4), "renders_per_sample": per_sample,
+            "spread_pct": round((max(samples) - min(samples)) / wall * 100, 1), "metric": "output_mp_per_s",
+            "value": round(out_mp / wall, 3), "goldens": goldens}
+
+def run_ffmpeg(cmd):
+    """Runs FFmpeg and returns the number of frames it reports having written."""
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"ffmpeg exit {proc.returncode}")
+    frames = re.findall(r"frame=\s*(\d+)", proc.stderr)
+    return int(frames[-1]) if frames else 0
+
+def run_video_case(case, args):
+    monitors = load_monitors(case)
+    input_args = ['-i', corpus_path(case["input"])]
+    rate = case.get("rate")
+
+    # Correctness: the first frames of the graph's output, written losslessly
+    frames = case.get("frames", 3)
+    pattern = os.path.join(args.workdir, f"{case['name']}_f%d.png")
+    run_ffmpeg(forge.build_render_command(monitors, input_args, ['-frames:v', str(frames), '-start_number', '0', pattern],
+                                          include_audio=False, rate=rate))
+    outputs = [(pattern % n, f"{case['name']}_f{n}.png") for n in range(frames)]
+
+    # Throughput: the full clip with the app's own codec settings
+    output_path = os.path.join(args.workdir, f"{case['name']}.mp4")
+    cmd = forge.build_render_command(monitors, input_args, forge.VIDEO_CODEC_ARGS + [output_path], include_audio=False, rate=rate)
+    started = time.perf_counter()
+    written = run_ffmpeg(cmd) # Untimed warm-up
+    per_sample, samples = timed_samples(lambda: run_ffmpeg(cmd), time.perf_counter() - started, args.repeat)
+    wall = statistics.median(samples)
+    return {"wall_s": round(wall, 4), "frames": written, "renders_per_sample": per_sample,
+            "spread_pct": round((max(samples) - min(samples)) / wall * 100, 1), "metric": "fps",
+            "value": round(written / wall, 2), "goldens": check_goldens(case, outputs, args)}
+
+def check_performance(record, baseline, args):
+    """Adds the slowdown versus baseline to a case record; fails it past --max-slowdown."""
+    if args.no_perf or "value" not in record:
+        return
+    reference = baseline.get("cases", {}).get(record["name"])
+    if not reference or reference["metric"] != record["metric"]:
+        record["perf"] = "no baseline"
+        return
+    slowdown = (1 - record["value"] / reference["value"]) * 100
+    record["baseline"] = reference["value"]
+    record["slowdown_pct"] = round(slowdown, 1)
+    if slowdown > args.max_slowdown:
+        record["perf_failed"] = True
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Golden-image and performance regression gate for OmniScreen Forge.")
+    parser.add_argument("--only", nargs="+", metavar="CASE", help="Run only these cases.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed samples per case (each at least {MIN_SAMPLE_S:g}s of back-to-back renders); the median counts.")
+    parser.add_argument("--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN_PCT, metavar="PCT",
+                        help="Fail a case whose throughput is more than PCT percent below the baseline.")
+    parser.add_argument("--no-perf", action="store_true", help="Check pixels only (e.g. on a machine without a baseline).")
+    parser.add_argument("--update-goldens", action="store_true", help="Replace the goldens with this run's output.")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run's throughput as the baseline.")
+    parser.add_argument("--workdir", help="Where outputs and diff images go (default: a temporary directory).")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(CASES_FILE) as f:
+        cases = json.load(f)["cases"]
+    if args.only:
+        cases = [c for c in cases if c["name"] in args.only]
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    keep_workdir = bool(args.workdir)
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix="omniscreen_gate_")
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    print(f"{'case':<28} {'kind':>5} {'pixels':>8} {'metric':>18} {'baseline':>9} {'change':>7}")
+    for case in cases:
+        record = {"name": case["name"], "kind": case["kind"]}
+        try:
+            record.update(run_image_case(case, args) if case["kind"] == "image" else run_video_case(case, args))
+        except Exception as e:
+            record["error"] = str(e)
+        check_performance(record, baseline, args)
+        results.append(record)
+
+        if "error" in record:
+            print(f"{case['name']:<28} {case['kind']:>5}  ERROR: {record['error']}")
+            continue
+        pixels = "updated" if any(g.get("updated") for g in record["goldens"]) else \
+                 "ok" if all(g["ok"] for g in record["goldens"]) else "DRIFT"
+        change = f"{-record['slowdown_pct']:+.1f}%" if "slowdown_pct" in record else record.get("perf", "")
+        if record.get("perf_failed"):
+            change += " SLOW"
+        baseline_value = f"{record['baseline']:.2f}" if "baseline" in record else "-"
+        print(f"{case['name']:<28} {case['kind']:>5} {pixels:>8} {record['value']:>11.2f} {METRIC_UNITS[record['metric']]:>6} "
+              f"{baseline_value:>9} {change:>7}")
+        for g in record["goldens"]:
+            if not g["ok"]:
+                print(f"    {g['golden']}: {g['reason']}" + (f" (diff: {g['diff_image']})" if "diff_image" in g else ""))
+
+    if args.update_baseline:
+        baseline = {"environment": environment(), "repeat": args.repeat, "cases": dict(baseline.get("cases", {}), **{
+            r["name"]: {"metric": r["metric"], "value": r["value"]} for r in results if "value" in r})}
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {BASELINE_FILE}")
+
+    failed = [r["name"] for r in results if "error" in r or r.get("perf_failed") or not all(g["ok"] for g in r["goldens"])]
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"benchmark": "regression-gate", "environment": environment(), "max_slowdown_pct": args.max_slowdown,
+                       "cases": results, "failed": failed}, f, indent=2)
+        print(f"Results written to {args.json}")
+    if not keep_workdir and not failed:
+        shutil.rmtree(args.workdir, ignore_errors=True)
+    elif failed:
+        print(f"Outputs and diff images kept in {args.workdir}")
+    print(f"{len(results) - len(failed)}/{len(results)} cases passed" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""Decimated video renders must last as long as their source."""
+import os
+import shutil
+import struct
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as forge
+
+pytestmark = pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+
+def mp4_duration(path):
+    """Presentation duration from the moov/mvhd box (FFmpeg's "Duration:" line is unreliable for VFR mp4)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    def boxes(pos, end):
+        while pos < end:
+            size, tag = struct.unpack(">I4s", data[pos:pos + 8])
+            yield tag, pos + 8, pos + size
+            pos += size
+
+    for tag, start, end in boxes(0, len(data)):
+        if tag == b"moov":
+            for inner, body, _ in boxes(start, end):
+                if inner == b"mvhd":
+                    if data[body] == 0:
+                        timescale, duration = struct.unpack(">II", data[body + 12:body + 20])
+                    else:
+                        timescale, duration = struct.unpack(">IQ", data[body + 20:body + 32])
+                    return duration / timescale
+    raise ValueError("no mvhd box")
+
+def layout():
+    return [forge.MonitorConfig(name="Left", diag=24.0, res_w=320, res_h=180),
+            forge.MonitorConfig(name="Right", diag=24.0, res_w=320, res_h=180, x=21.5, os_x=320)]
+
+def test_frozen_tail_keeps_source_duration(tmp_path):
+    # 4 s at 24 fps: one second of motion, then the last frame held for three
+    source = str(tmp_path / "frozen.mp4")
+    subprocess.run(['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc2=s=320x180:r=24:d=1',
+                    '-vf', 'tpad=stop_mode=clone:stop_duration=3', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', source], check=True)
+    output = str(tmp_path / "out.mp4")
+    stats = forge.render_media(source, output, layout(), decimate=True)
+    assert stats["decimation"]["skipped"] > 0
+    assert mp4_duration(output) == pytest.approx(mp4_duration(source), abs=0.5 / 24)
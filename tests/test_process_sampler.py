@@ -0,0 +1,23 @@
+"""ProcessSampler must not record an exited (zombie) child as using no memory."""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as forge
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="needs /proc")
+def test_zombie_child_is_not_sampled():
+    child = subprocess.Popen([sys.executable, "-c", "import time; x = bytearray(50 << 20); time.sleep(0.5)"])
+    try:
+        sampler = forge.ProcessSampler(child.pid, "child", interval=0.1).start()
+        time.sleep(1.2) # The child exits after 0.5 s and stays a zombie until waited for
+        summary = sampler.stop()
+    finally:
+        child.wait()
+    assert summary["samples"] > 0
+    assert min(s[2] for s in sampler.samples) > 40 << 20
+    assert summary["rss_avg_mb"] > 40
@@ -0,0 +1,71 @@
+"""Render server jobs must render with the submitted monitors' calibration."""
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import main as forge
+
+SOURCE = os.path.join(ROOT, "regression", "inputs", "still_photo.jpg")
+
+@pytest.fixture
+def client():
+    server = forge.serve_render_jobs(forge.RenderJobQueue(), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield forge.RenderServerClient(f"http://127.0.0.1:{server.server_address[1]}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def calibrated_layout():
+    return [forge.MonitorConfig(name="Left", diag=24.0, res_w=320, res_h=180, cal_r=2.0, cal_b=0.5),
+            forge.MonitorConfig(name="Right", diag=24.0, res_w=320, res_h=180, x=21.5, os_x=320, cal_gray=0.8, gamma=1.4)]
+
+def test_validate_keeps_calibration():
+    spec = forge.RenderJobQueue.validate({"input": SOURCE, "output": "out.png",
+                                          "preset": [m.to_dict() for m in calibrated_layout()]})
+    assert [(m["cal_r"], m["cal_b"], m["cal_gray"]) for m in spec["preset"]] == [(2.0, 0.5, 1.0), (1.0, 1.0, 0.8)]
+
+def test_calibrated_preset_survives_submit_claim_render(client, tmp_path):
+    monitors = calibrated_layout()
+    output = str(tmp_path / "server.png")
+    job = client.submit({"input": SOURCE, "output": output, "preset": [m.to_dict() for m in monitors], "profile": "PNG Fast"})
+    forge.RenderWorker(client, name="test").run(once=True)
+    assert client.job(job["id"])["state"] == "done"
+
+    local = str(tmp_path / "local.png")
+    forge.composite_image(SOURCE, local, calibrated_layout(), profile="PNG Fast")
+    with Image.open(output) as a, Image.open(local) as b:
+        assert np.array_equal(np.asarray(a), np.asarray(b))
+
+def test_network_bind_needs_token():
+    with pytest.raises(ValueError, match="--token"):
+        forge.serve_render_jobs(forge.RenderJobQueue(), host="0.0.0.0", port=0)
+    server = forge.serve_render_jobs(forge.RenderJobQueue(), host="0.0.0.0", port=0, token="secret")
+    server.server_close()
+
+def test_overlapping_attempts_keep_their_own_partial(tmp_path):
+    """A re-leased job can render while the old attempt still runs; neither may touch the other's file."""
+    output = str(tmp_path / "out.png")
+    results, errors = [], []
+
+    def attempt():
+        try:
+            results.append(forge.render_media(SOURCE, output, calibrated_layout(), profile="PNG Fast"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=attempt) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and len(results) == 2
+    assert os.listdir(tmp_path) == ["out.png"]
@@ -0,0 +1,114 @@
+"""Out-of-core row sources for sources FFmpeg refuses (past its ~268 MP picture limit)."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import main as forge
+
+BIG_SIZE = (16400, 16400) # Just past FFmpeg's limit
+
+@pytest.fixture(scope="module")
+def big_pgm(tmp_path_factory):
+    """Raw PGM, dark left half and bright right half; grayscale, so RawRowReader passes on it."""
+    path = str(tmp_path_factory.mktemp("big") / "big.pgm")
+    w, h = BIG_SIZE
+    band = np.zeros((1024, w), dtype=np.uint8)
+    band[:, w // 2:] = 255
+    with open(path, 'wb') as f:
+        f.write(b"P5\n%d %d\n255\n" % (w, h))
+        for y in range(0, h, len(band)):
+            f.write(band[:min(len(band), h - y)].tobytes())
+    return path
+
+def test_limit_matches_ffmpeg():
+    assert not forge.ffmpeg_can_decode(BIG_SIZE)
+    assert forge.ffmpeg_can_decode((16000, 16000))
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+def test_ffmpeg_reader_falls_back_on_short_read(big_pgm):
+    reader = forge.FFmpegRowReader(big_pgm, BIG_SIZE, 512 << 20)
+    try:
+        rows = reader.read(8)
+        assert reader.kind == "ffmpeg+pil"
+        assert rows.shape == (8, BIG_SIZE[0], 3)
+        assert rows[:, 0].max() == 0 and rows[:, -1].min() == 255
+        assert len(reader.read(BIG_SIZE[1] - 8)) == BIG_SIZE[1] - 8
+    finally:
+        reader.close()
+
+def test_composite_above_ffmpeg_limit(big_pgm, tmp_path):
+    left = forge.MonitorConfig(name="Left", diag=24.0, res_w=640, res_h=360, x=0.0, y=0.0)
+    right = forge.MonitorConfig(name="Right", diag=24.0, res_w=640, res_h=360, x=left.phys_w, y=0.0, os_x=640)
+    output = str(tmp_path / "out.png")
+    stats = forge.composite_image(big_pgm, output, [left, right], ram_budget_mb=512)
+    assert stats["mode"] == "out-of-core"
+    assert stats["reader"] == "pil"
+    with Image.open(output) as img:
+        out = np.asarray(img.convert("L"))
+    plan = forge.get_layout_plan([left, right])
+    for mp, expected in zip(plan.monitors, (0, 255)):
+        x, y = mp.paste
+        # Inner part of each screen, away from the seam where the halves meet
+        region = out[y + 40:y + mp.res[1] - 40, x + 160:x + mp.res[0] - 160]
+        assert abs(region.mean() - expected) < 2
+
+# Composites in a fresh process with FFmpeg ruled out, and reports its peak RSS growth
+RSS_SCRIPT = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import main as forge
+forge.ffmpeg_can_decode = lambda size: False
+left = forge.MonitorConfig(name="Left", diag=24.0, res_w=1920, res_h=1080)
+right = forge.MonitorConfig(name="Right", diag=24.0, res_w=1920, res_h=1080, x=left.phys_w, os_x=1920)
+def peak_mb():
+    # VmHWM belongs to this exec'd image; ru_maxrss would start from the forking parent's RSS
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+before = peak_mb()
+stats = forge.composite_image(sys.argv[2], sys.argv[3], [left, right], ram_budget_mb=int(sys.argv[4]))
+stats["rss_growth_mb"] = peak_mb() - before
+print(json.dumps(stats))
+"""
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads VmHWM from /proc")
+def test_pillow_fallback_stays_near_budget(tmp_path):
+    """A compressed RGB source decoded by Pillow must not be held in RAM in one piece."""
+    size = 8000
+    rows = np.linspace(0, 255, size).astype(np.uint8)
+    pixels = np.empty((size, size, 3), dtype=np.uint8)
+    pixels[:] = rows[None, :, None]
+    pixels[:, :, 1] = rows[:, None]
+    source = str(tmp_path / "big.png")
+    forge.write_png(source, pixels, compress_level=1)
+    del pixels # 192 MB decoded, 256 MB as Pillow keeps RGB
+    budget_mb = 64
+    proc = subprocess.run([sys.executable, "-c", RSS_SCRIPT, ROOT, source, str(tmp_path / "out.png"), str(budget_mb)],
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    stats = json.loads(proc.stdout.splitlines()[-1])
+    assert stats["mode"] == "out-of-core" and stats["reader"] == "pil"
+    assert stats["rss_growth_mb"] < 2 * budget_mb
+    with Image.open(str(tmp_path / "out.png")) as img:
+        out = np.asarray(img)
+    # Horizontal ramp in red, vertical ramp in green; the left screen shows the left half
+    assert out[540, 0, 0] < 8 and out[540, 1919, 0] > 100 and out[0, 0, 1] < 8 and out[1079, 0, 1] > 240
+
+def test_pillow_fallback_refuses_over_budget(tmp_path):
+    """Formats Pillow can only decode in one piece are refused rather than overrunning the budget."""
+    source = str(tmp_path / "big.webp")
+    Image.new("RGB", (1024, 1024), (10, 20, 30)).save(source)
+    with pytest.raises(MemoryError, match="RAM budget"):
+        forge.DecodedRowReader(source, 1 << 20)
+    reader = forge.DecodedRowReader(source, 8 << 20)
+    try:
+        assert reader.read(4).shape == (4, 1024, 3)
+    finally:
+        reader.close()
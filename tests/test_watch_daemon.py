@@ -0,0 +1,81 @@
+"""Watch-folder daemon: one output per source, and never two renders of one file at once."""
+import os
+import sys
+import threading
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as forge
+
+def layout():
+    return [forge.MonitorConfig(name="Left", diag=24.0, res_w=160, res_h=90),
+            forge.MonitorConfig(name="Right", diag=24.0, res_w=160, res_h=90, x=21.5, os_x=160)]
+
+def daemon(folders, output):
+    return forge.WatchFolderDaemon([str(f) for f in folders], str(output), layout(), "test", profile="PNG Fast", workers=2)
+
+def test_same_stem_different_extension(tmp_path):
+    src = tmp_path / "in"
+    src.mkdir()
+    Image.new("RGB", (64, 36), (255, 0, 0)).save(src / "a.jpg")
+    Image.new("RGB", (64, 36), (0, 0, 255)).save(src / "a.png")
+    first = daemon([src], tmp_path / "out")
+    assert first.run(once=True) == 0
+    assert first.counts["rendered"] == 2
+    outputs = {entry["output"] for entry in first.manifest["files"].values()}
+    assert len(outputs) == 2 and all(os.path.exists(p) for p in outputs)
+    with Image.open(first.output_path_for(str(src / "a.png"))) as img:
+        assert img.getpixel((40, 45))[2] > 200
+
+    again = daemon([src], tmp_path / "out")
+    again.run(once=True)
+    assert again.counts["skipped"] == 2 and again.counts["rendered"] == 0
+
+def test_same_named_folders_get_distinct_outputs(tmp_path):
+    folders = [tmp_path / "x" / "photos", tmp_path / "y" / "photos", tmp_path / "misc"]
+    for folder in folders:
+        folder.mkdir(parents=True)
+    watch = daemon(folders, tmp_path / "out")
+    outputs = {watch.output_path_for(str(folder / "a.jpg")) for folder in folders}
+    assert len(outputs) == 3
+    assert watch.output_path_for(str(folders[2] / "a.jpg")) == str(tmp_path / "out" / "misc" / "a.jpg_spanned.png")
+
+def test_event_during_render_reruns_after_it(tmp_path, monkeypatch):
+    src = tmp_path / "in"
+    src.mkdir()
+    path = str(src / "a.png")
+    Image.new("RGB", (64, 36)).save(path)
+    active, peak, calls = [0], [0], []
+    started = threading.Event()
+    lock = threading.Lock()
+
+    def slow_render(input_path, output_path, monitors, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            calls.append(input_path)
+        started.set()
+        time.sleep(0.3)
+        with open(output_path, 'wb') as f:
+            f.write(b"png")
+        with lock:
+            active[0] -= 1
+        return {"kind": "image", "bytes": 3}
+
+    monkeypatch.setattr(forge, "render_media", slow_render)
+    watch = daemon([src], tmp_path / "out")
+    watch.submit(path)
+    assert started.wait(5)
+    # The startup scan and an editor's second save land while the first render is running
+    Image.new("RGB", (64, 36), (9, 9, 9)).save(path)
+    watch.submit(path)
+    watch.submit(path)
+    deadline = time.monotonic() + 5
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    watch.pool.shutdown(wait=True)
+    assert peak[0] == 1
+    assert len(calls) == 2
+    assert watch.manifest["files"][path]["status"] == "rendered"